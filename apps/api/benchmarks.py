@@ -0,0 +1,112 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Data is bulk-created with a unique username prefix; callers run inside
+transaction.atomic() and roll back when done.
+"""
+
+import time
+import uuid
+from datetime import timedelta
+from django.utils import timezone
+from apps.bookings.models import Booking, Notification
+from apps.services.models import Service, Provider
+from apps.users.models import User
+
+
+def time_of(value):
+    return timezone.datetime.strptime(value, '%H:%M').time()
+
+
+def best_of(func, repeat):
+    """Run func `repeat` times; return (best seconds, last result)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure(func, repeat, setup=None):
+    """Like best_of, but calls `setup` untimed before every run"""
+    best, result = None, None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def percentile(values, share):
+    """Nearest-rank percentile of sorted `values`, `share` between 0 and 1"""
+    index = min(len(values) - 1, max(0, round(share * len(values)) - 1))
+    return values[index]
+
+
+def generate_benchmark_data(rows):
+    """Bulk-create users, providers, bookings and notifications"""
+    prefix = f'bench_{uuid.uuid4().hex[:8]}_'
+    now = timezone.now()
+    today = timezone.localdate()
+    start_time, booking_time, end_time = time_of('09:00'), time_of('10:00'), time_of('18:00')
+
+    service = Service.objects.filter(is_active=True).first()
+    if service is None:
+        service = Service.objects.create(name=f'{prefix}service', duration_minutes=30)
+
+    clients = User.objects.bulk_create([
+        User(
+            username=f'{prefix}client_{i}', first_name='Mijoz', last_name=str(i),
+            email=f'{prefix}client_{i}@example.com', role='client',
+        )
+        for i in range(min(rows, 100))
+    ])
+    provider_users = User.objects.bulk_create([
+        User(username=f'{prefix}provider_{i}', role='provider')
+        for i in range(rows)
+    ])
+    providers = Provider.objects.bulk_create([
+        Provider(
+            user=user, service=service, location='Toshkent',
+            start_time=start_time, end_time=end_time,
+            working_days=['monday', 'tuesday', 'wednesday', 'thursday', 'friday'],
+        )
+        for user in provider_users
+    ])
+
+    # One booking per provider and day keeps (provider, date, time) unique
+    bookings = Booking.objects.bulk_create([
+        Booking(
+            client=clients[i % len(clients)],
+            provider=providers[i % len(providers)],
+            date=today + timedelta(days=1 + i // len(providers)),
+            time=booking_time,
+            status='confirmed',
+            created_at=now - timedelta(seconds=i),
+        )
+        for i in range(rows)
+    ])
+
+    notifications = []
+    for i in range(rows):
+        booking = bookings[i]
+        client = clients[i % len(clients)]
+        if i % 2:
+            notifications.append(Notification(
+                user=client, type='queue_reminder_24h', template_key='queue_reminder_24h',
+                params={
+                    'client': client.full_name, 'provider': booking.provider.user.full_name,
+                    'date': str(booking.date), 'time': str(booking.time),
+                },
+            ))
+        else:
+            notifications.append(Notification(
+                user=client, type='provider_message', title='Xabar', message=f'Xabar {i}',
+            ))
+    Notification.objects.bulk_create(notifications)
+    return prefix
@@ -0,0 +1,131 @@
+"""
+Version checks for conditional GET on read-mostly API resources.
+
+Each resource has a cheap aggregate query (MAX(updated_at) plus a row
+count) that identifies the current version of the data. The views use it
+through Django's ``condition`` decorator, so an unchanged resource is
+answered with 304 Not Modified before the full query and the serializers
+run.
+"""
+
+import hashlib
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from apps.services.models import Service, Provider
+
+
+def _memoized(request, key, compute):
+    """Compute a version once per request (ETag and Last-Modified share it)"""
+    cache = getattr(request, '_resource_versions', None)
+    if cache is None:
+        cache = {}
+        request._resource_versions = cache
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def _make_etag(*parts):
+    raw = ':'.join('' if part is None else str(part) for part in parts)
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def service_list_version(request, *args, **kwargs):
+    def compute():
+        state = Service.objects.aggregate(
+            updated=Max('updated_at'),
+            active=Count('id', filter=Q(is_active=True)),
+        )
+        return _make_etag('services', state['active'], state['updated']), state['updated']
+    return _memoized(request, 'services', compute)
+
+
+def provider_list_version(request, *args, **kwargs):
+    service_id = request.GET.get('service_id')
+
+    def compute():
+        providers = Provider.objects.all()
+        if service_id:
+            providers = providers.filter(service_id=service_id)
+        state = providers.aggregate(
+            updated=Max('updated_at'),
+            user_updated=Max('user__updated_at'),
+            service_updated=Max('service__updated_at'),
+            accepting=Count('id', filter=Q(is_accepting=True)),
+        )
+        updated = _latest(state['updated'], state['user_updated'], state['service_updated'])
+        return _make_etag('providers', service_id, state['accepting'], updated), updated
+    return _memoized(request, 'providers', compute)
+
+
+def provider_detail_version(request, pk, *args, **kwargs):
+    def compute():
+        state = Provider.objects.filter(pk=pk).aggregate(
+            updated=Max('updated_at'),
+            user_updated=Max('user__updated_at'),
+            service_updated=Max('service__updated_at'),
+        )
+        updated = _latest(state['updated'], state['user_updated'], state['service_updated'])
+        if updated is None:
+            # Unknown provider: let the view return its 404
+            return None, None
+        return _make_etag('provider', pk, updated), updated
+    return _memoized(request, 'provider', compute)
+
+
+def available_slots_version(request, provider_id, *args, **kwargs):
+    date_str = request.GET.get('date')
+
+    def compute():
+        try:
+            booking_date = timezone.datetime.strptime(date_str or '', '%Y-%m-%d').date()
+        except ValueError:
+            # Invalid or missing date: let the view return its 400
+            return None, None
+        bookings_on_date = Q(bookings__date=booking_date)
+        # Active holds hide slots too; the count drops when one lapses
+        holds_on_date = Q(slot_holds__date=booking_date, slot_holds__expires_at__gt=timezone.now())
+        state = Provider.objects.filter(pk=provider_id).aggregate(
+            updated=Max('updated_at'),
+            service_updated=Max('service__updated_at'),
+            bookings_updated=Max('bookings__updated_at', filter=bookings_on_date),
+            bookings=Count('bookings', filter=bookings_on_date, distinct=True),
+            holds_created=Max('slot_holds__created_at', filter=holds_on_date),
+            holds=Count('slot_holds', filter=holds_on_date, distinct=True),
+        )
+        if state['updated'] is None:
+            return None, None
+        # Slots in the past drop out of the list, so today's version also
+        # changes every minute
+        now = timezone.localtime()
+        clock = now.strftime('%H:%M') if booking_date <= now.date() else None
+        etag = _make_etag(
+            'slots', provider_id, booking_date, state['updated'], state['service_updated'],
+            state['bookings'], state['bookings_updated'], state['holds'], state['holds_created'], clock,
+        )
+        return etag, None
+    return _memoized(request, 'slots', compute)
+
+
+def etag_func(version_func):
+    """Adapt a version function for ``condition(etag_func=...)``"""
+    def func(request, *args, **kwargs):
+        etag = version_func(request, *args, **kwargs)[0]
+        if etag is None:
+            return None
+        # Representations differ by renderer (JSON, MessagePack) and by
+        # query parameters such as fields= / exclude=
+        return _make_etag(etag, request.META.get('HTTP_ACCEPT', ''), request.META.get('QUERY_STRING', ''))
+    return func
+
+
+def last_modified_func(version_func):
+    """Adapt a version function for ``condition(last_modified_func=...)``"""
+    def func(request, *args, **kwargs):
+        return version_func(request, *args, **kwargs)[1]
+    return func
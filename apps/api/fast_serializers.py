@@ -0,0 +1,292 @@
+"""
+Lightweight read-only serializers for list endpoints.
+
+A fast serializer describes its output as a flat list of columns read from
+a ``.values()`` queryset. The columns are compiled once per class into
+plain extractor functions, so serializing a row is one dict build with no
+Field objects, model instances or ``to_representation`` dispatch. The
+output matches the corresponding DRF serializer exactly (see
+``benchmark_serializers``).
+"""
+
+from datetime import datetime
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.response import Response
+from apps.bookings.models import AddMinutes
+from apps.bookings.notification_templates import get_template
+
+
+def datetime_repr(value, context):
+    """Same output as serializers.DateTimeField"""
+    if value is None:
+        return None
+    if context['tz'] is not None and value.tzinfo is not None:
+        value = value.astimezone(context['tz'])
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def isoformat_repr(value, context):
+    """Same output as serializers.DateField / TimeField"""
+    if value is None:
+        return None
+    return value.isoformat()
+
+
+def get_context():
+    """Values shared by every row of one serialize() call.
+
+    Looking up the current time zone is slow compared to the rest of a
+    row, so it is done once per call rather than per value.
+    """
+    return {
+        'tz': timezone.get_current_timezone() if settings.USE_TZ else None,
+        'now': timezone.now(),
+    }
+
+
+class Column:
+    """Output field copied from one column, optionally converted"""
+
+    def __init__(self, path, convert=None):
+        self.path = path
+        self.convert = convert
+
+    def paths(self, fieldset=None):
+        return [self.path]
+
+    def compile(self, prefix, context, fieldset=None):
+        key = prefix + self.path
+        convert = self.convert
+        if convert is None:
+            return lambda row: row[key]
+        return lambda row: convert(row[key], context)
+
+
+class Computed:
+    """Output field computed from several columns"""
+
+    def __init__(self, func, *paths, needs_context=False):
+        self.func = func
+        self.path_list = list(paths)
+        self.needs_context = needs_context
+
+    def paths(self, fieldset=None):
+        return list(self.path_list)
+
+    def compile(self, prefix, context, fieldset=None):
+        keys = [prefix + path for path in self.path_list]
+        func = self.func
+        if self.needs_context:
+            return lambda row: func(context, *[row[key] for key in keys])
+        if len(keys) == 1:
+            key = keys[0]
+            return lambda row: func(row[key])
+        return lambda row: func(*[row[key] for key in keys])
+
+
+class Nested:
+    """Output field holding another fast serializer for a related object"""
+
+    def __init__(self, serializer, path):
+        self.serializer = serializer
+        self.path = path
+
+    def paths(self, fieldset=None):
+        return [f'{self.path}__{path}' for path in self.serializer.value_paths(fieldset)]
+
+    def compile(self, prefix, context, fieldset=None):
+        return self.serializer.compile(context, f'{prefix}{self.path}__', fieldset)
+
+
+class FastSerializer:
+    """Base class: subclasses set `fields` (output name -> column spec)"""
+
+    fields = {}
+    # SQL expressions annotated before .values(), keyed by column name
+    annotations = {}
+
+    @classmethod
+    def selected_fields(cls, fieldset=None):
+        """[(name, spec, sub_fieldset)] for the fields a fieldset selects"""
+        if fieldset is None:
+            return [(name, spec, None) for name, spec in cls.fields.items()]
+        return [(name, cls.fields[name], sub) for name, sub in fieldset.select(list(cls.fields))]
+
+    @classmethod
+    def value_paths(cls, fieldset=None):
+        """Every column the selected fields read, relative to the model"""
+        paths = []
+        for name, spec, sub_fieldset in cls.selected_fields(fieldset):
+            for path in spec.paths(sub_fieldset):
+                if path not in paths:
+                    paths.append(path)
+        return paths
+
+    @classmethod
+    def compile(cls, context, prefix='', fieldset=None):
+        """Build a function turning a values() row into the output dict"""
+        extractors = tuple(
+            (name, spec.compile(prefix, context, sub_fieldset))
+            for name, spec, sub_fieldset in cls.selected_fields(fieldset)
+        )
+
+        def convert(row):
+            return {name: extract(row) for name, extract in extractors}
+        return convert
+
+    @classmethod
+    def project(cls, queryset, fieldset=None, required_paths=()):
+        """Turn a model queryset into the values() queryset the serializer reads.
+
+        Only the columns of the selected fields (plus `required_paths`,
+        e.g. the pagination key) are read, so unselected relations are
+        not joined at all.
+        """
+        paths = cls.value_paths(fieldset)
+        paths += [path for path in required_paths if path not in paths]
+        missing = {
+            name: expression for name, expression in cls.annotations.items()
+            if name in paths and name not in queryset.query.annotations
+        }
+        if missing:
+            queryset = queryset.annotate(**missing)
+        return queryset.select_related(None).values(*paths)
+
+    @classmethod
+    def serialize(cls, rows, fieldset=None):
+        """Serialize rows of a projected queryset"""
+        # Extractors are compiled once per call, then applied to every row
+        convert = cls.compile(get_context(), fieldset=fieldset)
+        return [convert(row) for row in rows]
+
+
+def _full_name(first_name, last_name, username):
+    # User.full_name
+    if first_name and last_name:
+        return f"{first_name} {last_name}"
+    return username
+
+
+def _is_upcoming(context, date, time):
+    # Booking.is_upcoming; same as make_aware() without its checks
+    booking_datetime = datetime.combine(date, time, context['tz'])
+    return booking_datetime > context['now']
+
+
+def _render(part):
+    # Notification.get_title / get_message
+    def render(template_key, locale, params, stored):
+        if not template_key:
+            return str(stored)
+        template = get_template(template_key, locale)
+        if part == 'title':
+            return template.render_title(params)
+        return template.render_body(params)
+    return render
+
+
+class FastUserSerializer(FastSerializer):
+    """Same output as UserSerializer"""
+
+    fields = {
+        'id': Column('id'),
+        'username': Column('username'),
+        'email': Column('email'),
+        'first_name': Column('first_name'),
+        'last_name': Column('last_name'),
+        'full_name': Computed(_full_name, 'first_name', 'last_name', 'username'),
+        'role': Column('role'),
+        'phone': Column('phone'),
+        'telegram_id': Column('telegram_id'),
+        'telegram_username': Column('telegram_username'),
+        'is_provider': Computed(lambda role: role == 'provider', 'role'),
+        'is_client': Computed(lambda role: role == 'client', 'role'),
+        'date_joined': Column('date_joined', datetime_repr),
+    }
+
+
+class FastProviderListSerializer(FastSerializer):
+    """Same output as ProviderListSerializer"""
+
+    fields = {
+        'id': Column('id'),
+        'user_name': Computed(_full_name, 'user__first_name', 'user__last_name', 'user__username'),
+        'service_name': Column('service__name'),
+        'service_duration': Column('service__duration_minutes'),
+        'working_days': Column('working_days'),
+        'start_time': Column('start_time', isoformat_repr),
+        'end_time': Column('end_time', isoformat_repr),
+        'location': Column('location'),
+        'is_accepting': Column('is_accepting'),
+        'description': Column('description'),
+    }
+
+
+class FastBookingSerializer(FastSerializer):
+    """Same output as BookingSerializer"""
+
+    fields = {
+        'id': Column('id'),
+        'client': Nested(FastUserSerializer, 'client'),
+        'provider': Nested(FastProviderListSerializer, 'provider'),
+        'date': Column('date', isoformat_repr),
+        'time': Column('time', isoformat_repr),
+        'status': Column('status'),
+        'notes': Column('notes'),
+        'duration': Column('duration'),
+        'end_time': Column('end_time', isoformat_repr),
+        'can_be_cancelled': Computed(lambda status: status in ('pending', 'confirmed', 'active'), 'status'),
+        'is_upcoming': Computed(_is_upcoming, 'date', 'time', needs_context=True),
+        'created_at': Column('created_at', datetime_repr),
+    }
+    annotations = {
+        'duration': F('provider__service__duration_minutes'),
+        'end_time': AddMinutes(F('time'), F('provider__service__duration_minutes')),
+    }
+
+
+class FastNotificationSerializer(FastSerializer):
+    """Same output as NotificationSerializer"""
+
+    fields = {
+        'id': Column('id'),
+        'type': Column('type'),
+        'title': Computed(_render('title'), 'template_key', 'locale', 'params', 'title'),
+        'message': Computed(_render('message'), 'template_key', 'locale', 'params', 'message'),
+        'is_read': Column('is_read'),
+        'sent_at': Column('sent_at', datetime_repr),
+    }
+
+
+class FastListMixin:
+    """List view mixin serializing list pages with `fast_serializer_class`.
+
+    Only the list action is affected; detail, create and update keep the
+    regular serializer. Set API_FAST_SERIALIZERS = False to fall back.
+    Sparse fieldsets (QueryPlanViewMixin.get_fieldset) are honoured.
+    """
+
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        fast_serializer = self.fast_serializer_class
+        if fast_serializer is None or not getattr(settings, 'API_FAST_SERIALIZERS', True):
+            return super().list(request, *args, **kwargs)
+
+        fieldset = self.get_fieldset() if hasattr(self, 'get_fieldset') else None
+        required = ['id']
+        if hasattr(self, 'get_required_columns'):
+            required += self.get_required_columns()
+        queryset = fast_serializer.project(
+            self.filter_queryset(self.get_queryset()), fieldset, required
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast_serializer.serialize(page, fieldset))
+        return Response(fast_serializer.serialize(queryset, fieldset))
+
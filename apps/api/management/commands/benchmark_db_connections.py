@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client, RequestFactory, override_settings
+from apps.api.benchmarks import percentile
+from apps.users.models import User
+
+# Environment of each connection setup, read by settings.DATABASES
+MODES = {
+    'per_request': {'DB_CONN_MAX_AGE': '0', 'DB_CONN_HEALTH_CHECKS': '0', 'DB_POOL': ''},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': '0', 'DB_POOL': ''},
+    'persistent_checked': {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': '1', 'DB_POOL': ''},
+    'pool': {'DB_CONN_MAX_AGE': '0', 'DB_CONN_HEALTH_CHECKS': '0', 'DB_POOL': '1'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request database connection overhead with and without persistent connections or pooling'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Requests made in each mode (default: 500)'
+        )
+        parser.add_argument(
+            '--path',
+            default='/api/users/me/',
+            help='Endpoint requested as a logged-in client (default: /api/users/me/)'
+        )
+        parser.add_argument(
+            '--modes',
+            help=f"Comma-separated modes (default: {', '.join(MODES)}; pool only on PostgreSQL)"
+        )
+        parser.add_argument(
+            '--json',
+            help='Also write the results to this JSON file'
+        )
+        # Internal: run one mode in this process and print its results
+        parser.add_argument('--child', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be positive')
+        if options['child']:
+            self.stdout.write(json.dumps(self.run_mode(options['path'], options['requests'])))
+            return
+
+        if options['modes']:
+            modes = options['modes'].split(',')
+            unknown = set(modes) - set(MODES)
+            if unknown:
+                raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+        else:
+            modes = [mode for mode in MODES if mode != 'pool' or connection.vendor == 'postgresql']
+
+        self.stdout.write(
+            f"{connection.vendor}: {options['requests']} requests to {options['path']} per mode"
+        )
+        results = {}
+        for mode in modes:
+            # A fresh process per mode, so settings.DATABASES is built from
+            # the mode's environment exactly as in production
+            process = subprocess.run(
+                [
+                    sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'benchmark_db_connections',
+                    '--child', mode, '--requests', str(options['requests']), '--path', options['path'],
+                ],
+                env={**os.environ, **MODES[mode]},
+                capture_output=True,
+                text=True,
+            )
+            if process.returncode != 0:
+                raise CommandError(f'{mode} failed:\n{process.stderr.strip()}')
+            results[mode] = json.loads(process.stdout.strip().splitlines()[-1])
+            self.report(mode, results[mode])
+
+        if options['json']:
+            Path(options['json']).write_text(json.dumps(results, indent=2) + '\n')
+            self.stdout.write(f"Results written to {options['json']}")
+
+    def run_mode(self, path, count):
+        user = User.objects.filter(role='client').order_by('id').first()
+        if user is None:
+            raise CommandError('No client user to log in as; run generate_load_data first')
+        database = connection.settings_dict
+        connects = []
+
+        def on_connect(**kwargs):
+            connects.append(kwargs['connection'].alias)
+
+        # Time a bare connect with this mode's options (pragmas included)
+        connect_times = []
+        for _ in range(20):
+            connection.close()
+            start = time.perf_counter()
+            connection.ensure_connection()
+            connect_times.append(time.perf_counter() - start)
+        connection.close()
+
+        # The test Client keeps connections open across requests; the WSGI
+        # handler runs the request_started/finished connection handling a
+        # server would
+        client = Client()
+        client.force_login(user)
+        cookie = '; '.join(f'{name}={morsel.value}' for name, morsel in client.cookies.items())
+        factory = RequestFactory(HTTP_COOKIE=cookie)
+        handler = WSGIHandler()
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        connection.close()
+        connection_created.connect(on_connect)
+        latencies = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            start = time.perf_counter()
+            for _ in range(count):
+                request_start = time.perf_counter()
+                response = handler(factory.get(path).environ, start_response)
+                b''.join(response)
+                response.close()
+                latencies.append(time.perf_counter() - request_start)
+                if not statuses[-1].startswith('200'):
+                    raise CommandError(f'GET {path} returned {statuses[-1]}')
+            elapsed = time.perf_counter() - start
+        connection_created.disconnect(on_connect)
+
+        latencies.sort()
+        connect_times.sort()
+        return {
+            'conn_max_age': database['CONN_MAX_AGE'],
+            'health_checks': database['CONN_HEALTH_CHECKS'],
+            'pool': bool(database['OPTIONS'].get('pool')),
+            'connect_ms': percentile(connect_times, 0.5) * 1000,
+            'new_connections': len(connects),
+            'requests_per_sec': count / elapsed,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+        }
+
+    def report(self, mode, result):
+        self.stdout.write(
+            f"  {mode:<20} {result['requests_per_sec']:>8.1f} req/s  "
+            f"p50 {result['p50_ms']:.2f} / p95 {result['p95_ms']:.2f} / p99 {result['p99_ms']:.2f} ms  "
+            f"{result['new_connections']:>5} connections opened  (connect {result['connect_ms']:.2f} ms)"
+        )
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from apps.api import renderers
+from apps.api.benchmarks import best_of, generate_benchmark_data
+from apps.api.fast_serializers import FastBookingSerializer
+from apps.api.serializers import TimeSlotSerializer
+from apps.bookings.models import Booking
+from apps.services.models import Provider
+
+
+class Command(BaseCommand):
+    help = 'Compare encode time and payload size of the API renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Bookings in the bookings payload (default: 10000)'
+        )
+        parser.add_argument(
+            '--providers',
+            type=int,
+            default=50,
+            help='Providers to build slots responses for, 7 days each (default: 50)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per renderer; the best run is reported (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        if options['rows'] < 1 or options['providers'] < 1:
+            raise CommandError('--rows and --providers must be positive')
+
+        candidates = [('DRF JSON', JSONRenderer())]
+        if renderers.orjson is not None:
+            candidates.append(('orjson', renderers.OrjsonRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING('orjson is not installed, skipping OrjsonRenderer'))
+        if renderers.msgpack is not None:
+            candidates.append(('msgpack', renderers.MessagePackRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING('msgpack is not installed, skipping MessagePackRenderer'))
+
+        # Generated rows are rolled back at the end
+        with transaction.atomic():
+            self.stdout.write(f"Generating {options['rows']} bookings...")
+            prefix = generate_benchmark_data(options['rows'])
+
+            bookings = Booking.objects.filter(client__username__startswith=prefix)
+            bookings_payload = [{
+                'next': None,
+                'results': FastBookingSerializer.serialize(FastBookingSerializer.project(bookings)),
+            }]
+            slots_payloads = self.slots_payloads(prefix, options['providers'])
+
+            transaction.set_rollback(True)
+
+        for name, payloads in [('bookings', bookings_payload), ('slots', slots_payloads)]:
+            self.stdout.write(f'\n{name}: {len(payloads)} response(s)')
+            self.compare(payloads, candidates, repeat)
+
+    def slots_payloads(self, prefix, provider_count):
+        """available_slots responses for the next 7 days"""
+        providers = Provider.objects.filter(
+            user__username__startswith=prefix
+        ).select_related('service')[:provider_count]
+        today = timezone.localdate()
+        payloads = []
+        for provider in providers:
+            for offset in range(1, 8):
+                booking_date = today + timedelta(days=offset)
+                slots_data = [
+                    {'time': slot, 'available': True}
+                    for slot in provider.get_available_slots(booking_date)
+                ]
+                payloads.append({
+                    'provider_id': provider.id,
+                    'date': booking_date.strftime('%Y-%m-%d'),
+                    'slots': TimeSlotSerializer(slots_data, many=True).data,
+                })
+        return payloads
+
+    def compare(self, payloads, candidates, repeat):
+        """Encode every payload with each renderer and report time and size"""
+        # Identical documents are checked by apps.api.tests.RendererParityTests
+        baseline_seconds = baseline_size = None
+        for name, renderer in candidates:
+            seconds, encoded = best_of(lambda: [renderer.render(data) for data in payloads], repeat)
+            size = sum(len(body) for body in encoded)
+
+            if baseline_seconds is None:
+                baseline_seconds, baseline_size = seconds, size
+            self.stdout.write(
+                f'  {name:<9} encode {seconds * 1000:>9.2f} ms '
+                f'({baseline_seconds / seconds:>4.1f}x) | '
+                f'{size:>10} bytes ({size / baseline_size * 100:>5.1f}%)'
+            )
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.api.benchmarks import best_of, generate_benchmark_data
+from apps.api.fast_serializers import (
+    FastBookingSerializer, FastProviderListSerializer, FastNotificationSerializer
+)
+from apps.api.serializers import BookingSerializer, ProviderListSerializer, NotificationSerializer
+from apps.bookings.models import Booking, Notification
+from apps.services.models import Provider
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF and fast list serializers (rows/sec) on generated data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Rows per list (default: 10000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per serializer; the best run is reported (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = max(1, options['repeat'])
+        if rows < 1:
+            raise CommandError('--rows must be positive')
+
+        # Generated rows are rolled back at the end
+        with transaction.atomic():
+            self.stdout.write(f'Generating {rows} rows per list...')
+            prefix = generate_benchmark_data(rows)
+
+            providers = Provider.objects.filter(user__username__startswith=prefix)
+            bookings = Booking.objects.filter(client__username__startswith=prefix)
+            notifications = Notification.objects.filter(user__username__startswith=prefix)
+
+            cases = [
+                ('providers', providers, ProviderListSerializer, FastProviderListSerializer),
+                ('bookings', bookings, BookingSerializer, FastBookingSerializer),
+                ('notifications', notifications, NotificationSerializer, FastNotificationSerializer),
+            ]
+            for name, queryset, drf_serializer, fast_serializer in cases:
+                self.compare(name, queryset, drf_serializer, fast_serializer, repeat)
+
+            transaction.set_rollback(True)
+
+    def compare(self, name, queryset, drf_serializer, fast_serializer, repeat):
+        """Serialize the same queryset both ways and report rows/sec"""
+        def run_drf():
+            if hasattr(drf_serializer, 'apply_query_plan'):
+                planned = drf_serializer.apply_query_plan(queryset)
+            else:
+                planned = queryset
+            return drf_serializer(planned, many=True).data
+
+        def run_fast():
+            return fast_serializer.serialize(fast_serializer.project(queryset))
+
+        # Identical output is checked by apps.api.tests.SerializerParityTests
+        drf_seconds, _ = best_of(run_drf, repeat)
+        fast_seconds, fast_data = best_of(run_fast, repeat)
+
+        count = len(fast_data)
+        self.stdout.write(
+            f'{name:<14} {count} rows | '
+            f'DRF {count / drf_seconds:>9.0f} rows/s ({drf_seconds:.3f}s) | '
+            f'fast {count / fast_seconds:>9.0f} rows/s ({fast_seconds:.3f}s) | '
+            f'{drf_seconds / fast_seconds:.1f}x'
+        )
@@ -0,0 +1,240 @@
+import json
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.api.benchmarks import percentile
+
+ACTIVE_STATUSES = ('pending', 'confirmed', 'active')
+MODES = ('default', 'tuned')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure SQLite reader and writer throughput under contention, with Django\'s default '
+        'connection setup and with settings.SQLITE_OPTIONS (WAL, busy_timeout, BEGIN IMMEDIATE)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            help='SQLite file to copy for the runs; it is never written to (default: DATABASES["default"])'
+        )
+        parser.add_argument(
+            '--readers',
+            type=int,
+            default=8,
+            help='Threads running slot and dashboard reads (default: 8)'
+        )
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=4,
+            help='Threads creating bookings with their reminders (default: 4)'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Seconds each mode runs (default: 10)'
+        )
+        parser.add_argument(
+            '--modes',
+            default=','.join(MODES),
+            help=f"Comma-separated connection setups to compare (default: {','.join(MODES)})"
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Random seed for the picked rows (default: 1)'
+        )
+        parser.add_argument(
+            '--json',
+            help='Also write the results to this JSON file'
+        )
+
+    def handle(self, *args, **options):
+        database = settings.DATABASES['default']
+        source = Path(options['database'] or database['NAME'])
+        if not options['database'] and database['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('The default database is not SQLite; pass --database')
+        if not source.exists():
+            raise CommandError(f'{source} does not exist')
+        modes = options['modes'].split(',')
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+        if options['readers'] < 0 or options['writers'] < 0 or options['readers'] + options['writers'] == 0:
+            raise CommandError('--readers and --writers must not be negative, and not both 0')
+
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for mode in modes:
+                # Every mode starts from a fresh copy of the same data
+                path = Path(directory) / f'{mode}.sqlite3'
+                self.copy_database(source, path, mode)
+                self.load_ids(path)
+                self.stdout.write(
+                    f"{mode}: {options['readers']} readers, {options['writers']} writers, {options['duration']:g}s"
+                )
+                results[mode] = self.run(path, mode, options)
+                self.report(results[mode])
+
+        if options['json']:
+            Path(options['json']).write_text(json.dumps(results, indent=2) + '\n')
+            self.stdout.write(f"Results written to {options['json']}")
+
+    def copy_database(self, source, path, mode):
+        with sqlite3.connect(source) as origin, sqlite3.connect(path) as copy:
+            origin.backup(copy)
+        connection = sqlite3.connect(path, isolation_level=None)
+        # The journal mode is stored in the file, reset it for the default run
+        connection.execute(f"PRAGMA journal_mode = {'WAL' if mode == 'tuned' else 'DELETE'}")
+        connection.close()
+
+    def load_ids(self, path):
+        connection = sqlite3.connect(path)
+        self.client_ids = [row[0] for row in connection.execute(
+            "SELECT id FROM users WHERE role = 'client' LIMIT 5000"
+        )]
+        self.provider_ids = [row[0] for row in connection.execute('SELECT id FROM providers LIMIT 1000')]
+        connection.close()
+        if not self.client_ids or not self.provider_ids:
+            raise CommandError('The database has no clients or providers; run generate_load_data first')
+        today = datetime.now().date()
+        self.dates = [str(today + timedelta(days=offset)) for offset in range(365)]
+        self.times = [f'{hour:02d}:{minute:02d}:00' for hour in range(9, 18) for minute in (0, 30)]
+
+    def connect(self, path, mode):
+        """A connection set up the way Django's SQLite backend would for `mode`"""
+        # Django connects with sqlite3's default 5 second busy timeout and
+        # manages transactions itself (isolation_level=None)
+        connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        begin = 'BEGIN'
+        if mode == 'tuned':
+            for command in settings.SQLITE_OPTIONS['init_command'].split(';'):
+                if command.strip():
+                    connection.execute(command)
+            begin = f"BEGIN {settings.SQLITE_OPTIONS['transaction_mode']}"
+        return connection, begin
+
+    def run(self, path, mode, options):
+        stop = threading.Event()
+        stats = {'read': [], 'write': [], 'read_errors': 0, 'write_errors': 0}
+        lock = threading.Lock()
+
+        def worker(kind, seed):
+            rng = random.Random(seed)
+            connection, begin = self.connect(path, mode)
+            latencies = []
+            errors = 0
+            operation = self.read if kind == 'read' else self.write
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        operation(connection, begin, rng)
+                    except sqlite3.OperationalError:
+                        # "database is locked": what users would get as a 500
+                        errors += 1
+                        if connection.in_transaction:
+                            connection.execute('ROLLBACK')
+                        continue
+                    latencies.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+                with lock:
+                    stats[kind].extend(latencies)
+                    stats[f'{kind}_errors'] += errors
+
+        threads = [
+            threading.Thread(target=worker, args=('read', options['seed'] * 1000 + index))
+            for index in range(options['readers'])
+        ] + [
+            threading.Thread(target=worker, args=('write', options['seed'] * 1000 + 500 + index))
+            for index in range(options['writers'])
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        result = {'mode': mode, 'seconds': elapsed}
+        for kind in ('read', 'write'):
+            latencies = sorted(stats[kind])
+            result[kind] = {
+                'ops': len(latencies),
+                'ops_per_sec': len(latencies) / elapsed,
+                'errors': stats[f'{kind}_errors'],
+                'p50_ms': percentile(latencies, 0.5) * 1000 if latencies else None,
+                'p95_ms': percentile(latencies, 0.95) * 1000 if latencies else None,
+                'p99_ms': percentile(latencies, 0.99) * 1000 if latencies else None,
+            }
+        return result
+
+    def read(self, connection, begin, rng):
+        """Slot lookup for a provider and day, then a client's dashboard counts"""
+        connection.execute(
+            'SELECT time, status FROM bookings WHERE provider_id = ? AND date = ? AND status IN (?, ?, ?)',
+            (rng.choice(self.provider_ids), rng.choice(self.dates), *ACTIVE_STATUSES)
+        ).fetchall()
+        connection.execute(
+            'SELECT status, COUNT(*) FROM bookings WHERE client_id = ? GROUP BY status',
+            (rng.choice(self.client_ids),)
+        ).fetchall()
+
+    def write(self, connection, begin, rng):
+        """Check a slot is free, book it and schedule its reminders in one transaction"""
+        client_id = rng.choice(self.client_ids)
+        provider_id = rng.choice(self.provider_ids)
+        booking_date = rng.choice(self.dates)
+        booking_time = rng.choice(self.times)
+        now = datetime.now().isoformat(sep=' ')
+
+        connection.execute(begin)
+        taken, = connection.execute(
+            'SELECT COUNT(*) FROM bookings WHERE provider_id = ? AND date = ? AND time = ?',
+            (provider_id, booking_date, booking_time)
+        ).fetchone()
+        if taken:
+            connection.execute('ROLLBACK')
+            return
+        booking_id = connection.execute(
+            'INSERT INTO bookings (client_id, provider_id, date, time, status, notes, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (client_id, provider_id, booking_date, booking_time, 'pending', '', now, now)
+        ).lastrowid
+        connection.executemany(
+            'INSERT INTO notifications (user_id, booking_id, type, title, message, is_read, is_sent, sent_at, '
+            'locale, params, scheduled_for, sent_via, template_key) '
+            "VALUES (?, ?, ?, '', '', 0, 0, ?, 'uz', '{}', ?, '', ?)",
+            [
+                (client_id, booking_id, reminder, now, now, reminder)
+                for reminder in ('queue_reminder_24h', 'queue_reminder_3h', 'queue_reminder_1h')
+            ]
+        )
+        connection.execute('COMMIT')
+
+    def report(self, result):
+        for kind in ('read', 'write'):
+            stats = result[kind]
+            if not stats['ops'] and not stats['errors']:
+                continue
+            latency = (
+                f"p50 {stats['p50_ms']:.1f} / p95 {stats['p95_ms']:.1f} / p99 {stats['p99_ms']:.1f} ms"
+                if stats['ops'] else 'no successful operations'
+            )
+            errors = self.style.ERROR(f"{stats['errors']} locked") if stats['errors'] else '0 locked'
+            self.stdout.write(
+                f"  {kind + 's':<7} {stats['ops_per_sec']:>9.1f} ops/s  {latency}  {errors}"
+            )
@@ -0,0 +1,340 @@
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from apps.bookings.models import Booking, Notification
+from apps.bookings.notification_service import NotificationService
+from apps.services.models import Service, Provider
+from apps.users.models import User
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# (working days, share of providers)
+SCHEDULES = [
+    (WEEKDAYS[:5], 0.55),
+    (WEEKDAYS[:6], 0.35),
+    (WEEKDAYS[1:6], 0.10),
+]
+
+# Past and upcoming booking statuses with their shares
+PAST_STATUSES = (['completed', 'cancelled', 'no_show'], [0.82, 0.11, 0.07])
+FUTURE_STATUSES = (['confirmed', 'pending', 'cancelled'], [0.60, 0.33, 0.07])
+
+SERVICES = [
+    ('Soch olish', 30),
+    ('Soch bo\'yash', 60),
+    ('Manikyur', 45),
+    ('Massaj', 60),
+]
+
+FIRST_NAMES = ['Aziz', 'Dilnoza', 'Jasur', 'Madina', 'Bekzod', 'Nilufar', 'Sardor', 'Zebo', 'Otabek', 'Malika']
+LAST_NAMES = ['Karimov', 'Umarova', 'Toshmatov', 'Rahimova', 'Aliyev', 'Yusupova', 'Saidov', 'Ergasheva']
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic dataset (users, providers, bookings, notifications) for load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=10000,
+            help='Client users (default: 10000)'
+        )
+        parser.add_argument(
+            '--providers',
+            type=int,
+            default=200,
+            help='Providers (default: 200)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Days of booking history before today (default: 90)'
+        )
+        parser.add_argument(
+            '--future-days',
+            type=int,
+            default=14,
+            help='Days of upcoming bookings from today (default: 14)'
+        )
+        parser.add_argument(
+            '--bookings-per-day',
+            type=float,
+            default=8,
+            help='Mean bookings per provider and working day, capped by free slots (default: 8)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed; the same arguments and seed give the same data (default: 42)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk INSERT (default: 5000)'
+        )
+        parser.add_argument(
+            '--prefix',
+            default='load_',
+            help='Username prefix of the generated users (default: load_)'
+        )
+        parser.add_argument(
+            '--password',
+            help='Password of every generated user, e.g. for load_test.py (default: unusable)'
+        )
+        parser.add_argument(
+            '--no-notifications',
+            action='store_true',
+            help='Do not generate notifications'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously generated data with the same prefix first'
+        )
+
+    def handle(self, *args, **options):
+        for name in ('users', 'providers', 'chunk_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be positive")
+        if options['days'] < 0 or options['future_days'] < 0 or options['bookings_per_day'] < 0:
+            raise CommandError('--days, --future-days and --bookings-per-day must not be negative')
+
+        self.rng = random.Random(options['seed'])
+        self.verbosity = options['verbosity']
+        self.chunk_size = options['chunk_size']
+        self.prefix = options['prefix']
+        # Hashed once and shared: hashing per user would dominate the run time
+        self.password = make_password(options['password'])
+        self.now = timezone.now()
+        self.tz = timezone.get_current_timezone()
+
+        if options['clear']:
+            deleted, _ = User.objects.filter(username__startswith=self.prefix).delete()
+            self.stdout.write(f'Deleted {deleted} rows of earlier load data')
+        elif User.objects.filter(username__startswith=self.prefix).exists():
+            raise CommandError(f'Load data with prefix "{self.prefix}" exists; pass --clear or another --prefix')
+
+        started = time.perf_counter()
+        services = self.create_services()
+        client_ids, telegram_names = self.create_clients(options['users'])
+        providers = self.create_providers(options['providers'], services)
+        if options['no_notifications']:
+            telegram_names = {}
+        bookings, notifications = self.create_bookings(
+            providers, client_ids, telegram_names,
+            options['days'], options['future_days'], options['bookings_per_day']
+        )
+
+        elapsed = time.perf_counter() - started
+        total = len(client_ids) + len(providers) * 2 + bookings + notifications
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(client_ids)} clients, {len(providers)} providers, '
+            f'{bookings} bookings and {notifications} notifications '
+            f'in {elapsed:.1f}s ({total / elapsed:.0f} rows/sec)'
+        ))
+
+    def create_services(self):
+        services = list(Service.objects.filter(is_active=True))
+        if not services:
+            services = Service.objects.bulk_create([
+                Service(name=name, duration_minutes=duration) for name, duration in SERVICES
+            ])
+        return services
+
+    def random_name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def create_clients(self, count):
+        """Bulk-create client users; returns their ids and {id: name} of those on Telegram"""
+        ids, telegram_names = [], {}
+        for start in range(0, count, self.chunk_size):
+            users = []
+            for i in range(start, min(start + self.chunk_size, count)):
+                first_name, last_name = self.random_name()
+                has_telegram = self.rng.random() < 0.7
+                users.append(User(
+                    username=f'{self.prefix}client_{i}',
+                    password=self.password,
+                    first_name=first_name,
+                    last_name=last_name,
+                    email=f'{self.prefix}client_{i}@example.com',
+                    role='client',
+                    phone=f'+99890{i % 10000000:07d}',
+                    telegram_username=f'{self.prefix}tg_{i}' if has_telegram else None,
+                    created_at=self.now - timedelta(days=self.rng.randint(0, 730)),
+                ))
+            for user in User.objects.bulk_create(users):
+                ids.append(user.id)
+                if user.telegram_username:
+                    telegram_names[user.id] = user.full_name
+            self.progress('clients', len(ids), count)
+        return ids, telegram_names
+
+    def create_providers(self, count, services):
+        """Bulk-create provider users and profiles"""
+        schedules, schedule_weights = zip(*SCHEDULES)
+        providers = []
+        for start in range(0, count, self.chunk_size):
+            users = []
+            for i in range(start, min(start + self.chunk_size, count)):
+                first_name, last_name = self.random_name()
+                users.append(User(
+                    username=f'{self.prefix}provider_{i}',
+                    password=self.password,
+                    first_name=first_name,
+                    last_name=last_name,
+                    role='provider',
+                    telegram_username=f'{self.prefix}provider_tg_{i}' if self.rng.random() < 0.8 else None,
+                ))
+            users = User.objects.bulk_create(users)
+
+            profiles = []
+            for user in users:
+                opening = self.rng.choice([8, 9, 9, 10])
+                profiles.append(Provider(
+                    user=user,
+                    service=self.rng.choice(services),
+                    working_days=list(self.rng.choices(schedules, schedule_weights)[0]),
+                    start_time=timezone.datetime(2000, 1, 1, opening).time(),
+                    end_time=timezone.datetime(2000, 1, 1, opening + self.rng.choice([8, 9, 10])).time(),
+                    location='Toshkent',
+                    is_accepting=self.rng.random() < 0.95,
+                ))
+            providers.extend(Provider.objects.bulk_create(profiles))
+            self.progress('providers', len(providers), count)
+        return providers
+
+    def provider_slots(self, provider):
+        """Slot times of a working day with their popularity weights"""
+        slots = []
+        current = datetime.combine(datetime.min, provider.start_time)
+        end = datetime.combine(datetime.min, provider.end_time)
+        step = timedelta(minutes=provider.service.duration_minutes)
+        while current < end:
+            # Late morning and after-work slots are booked first
+            weight = 2.0 if 10 <= current.hour < 13 or 17 <= current.hour < 19 else 1.0
+            slots.append((current.time(), weight))
+            current += step
+        return slots
+
+    def poisson(self, mean):
+        """Knuth's Poisson sampler; fine for the small means used here"""
+        limit, k, p = math.exp(-mean), 0, 1.0
+        while True:
+            p *= self.rng.random()
+            if p <= limit:
+                return k
+            k += 1
+
+    def pick_slots(self, slots, count):
+        """Weighted sample of `count` distinct slots (Efraimidis-Spirakis)"""
+        keyed = sorted(slots, key=lambda slot: self.rng.random() ** (1.0 / slot[1]), reverse=True)
+        return [slot_time for slot_time, _ in keyed[:count]]
+
+    def aware(self, day, slot_time):
+        return timezone.make_aware(datetime.combine(day, slot_time), self.tz)
+
+    def pick_client(self, client_ids):
+        # One in five bookings comes from the 5% of regular clients
+        if self.rng.random() < 0.2:
+            return client_ids[self.rng.randrange(max(1, len(client_ids) // 20))]
+        return client_ids[self.rng.randrange(len(client_ids))]
+
+    def create_bookings(self, providers, client_ids, telegram_names, days, future_days, mean_per_day):
+        """Bulk-create bookings day by day, with the notifications of Telegram clients"""
+        today = timezone.localdate()
+        slots_by_provider = {provider.id: self.provider_slots(provider) for provider in providers}
+
+        pending_bookings = []
+        booking_count = notification_count = 0
+        expected = int(len(providers) * (days + future_days) * mean_per_day * 5 / 7)
+
+        for offset in range(-days, future_days):
+            day = today + timedelta(days=offset)
+            weekday = WEEKDAYS[day.weekday()]
+            statuses, weights = PAST_STATUSES if offset < 0 else FUTURE_STATUSES
+
+            for provider in providers:
+                if weekday not in provider.working_days:
+                    continue
+                slots = slots_by_provider[provider.id]
+                count = min(self.poisson(mean_per_day), len(slots))
+                for slot_time in self.pick_slots(slots, count):
+                    starts_at = self.aware(day, slot_time)
+                    # Booked a few days ahead, never in the future
+                    lead_time = timedelta(hours=self.rng.expovariate(1 / 72))
+                    created_at = min(starts_at - lead_time, self.now)
+                    pending_bookings.append(Booking(
+                        client_id=self.pick_client(client_ids),
+                        provider=provider,
+                        date=day,
+                        time=slot_time,
+                        status=self.rng.choices(statuses, weights)[0],
+                        created_at=created_at,
+                    ))
+
+                if len(pending_bookings) >= self.chunk_size:
+                    booking_count, notification_count = self.flush_bookings(
+                        pending_bookings, telegram_names, booking_count, notification_count
+                    )
+                    pending_bookings = []
+                    self.progress('bookings', booking_count, expected)
+
+        if pending_bookings:
+            booking_count, notification_count = self.flush_bookings(
+                pending_bookings, telegram_names, booking_count, notification_count
+            )
+        return booking_count, notification_count
+
+    def flush_bookings(self, bookings, telegram_names, booking_count, notification_count):
+        with transaction.atomic():
+            bookings = Booking.objects.bulk_create(bookings)
+            notifications = []
+            for booking in bookings:
+                if booking.client_id in telegram_names:
+                    notifications.extend(self.booking_notifications(booking, telegram_names[booking.client_id]))
+            for start in range(0, len(notifications), self.chunk_size):
+                Notification.objects.bulk_create(notifications[start:start + self.chunk_size])
+        return booking_count + len(bookings), notification_count + len(notifications)
+
+    def booking_notifications(self, booking, client_name):
+        """Reminders as the notification service would have left them"""
+        starts_at = self.aware(booking.date, booking.time)
+        params = {
+            'client': client_name,
+            'provider': booking.provider.user.full_name,
+            'date': str(booking.date),
+            'time': str(booking.time),
+        }
+        notifications = []
+        if booking.status in Booking.ACTIVE_STATUSES:
+            # Upcoming: unsent reminders still to go
+            for notification_type, offset in NotificationService.CUSTOMER_REMINDERS:
+                if starts_at - offset > self.now:
+                    notifications.append(Notification(
+                        user_id=booking.client_id, booking=booking,
+                        type=notification_type, template_key=notification_type, params=params,
+                        scheduled_for=starts_at - offset, sent_at=booking.created_at, is_sent=False,
+                    ))
+        elif booking.status != 'cancelled' and starts_at < self.now:
+            # Past: the 24h reminder was delivered
+            sent_at = max(starts_at - timedelta(hours=24), booking.created_at)
+            notifications.append(Notification(
+                user_id=booking.client_id, booking=booking,
+                type='queue_reminder_24h', template_key='queue_reminder_24h', params=params,
+                scheduled_for=sent_at, sent_at=sent_at, is_sent=True, is_read=self.rng.random() < 0.6,
+            ))
+        return notifications
+
+    def progress(self, name, done, total):
+        if self.verbosity > 1:
+            self.stdout.write(f'  {name}: {done}/~{total}')
@@ -0,0 +1,257 @@
+import json
+import platform
+from datetime import timedelta
+from pathlib import Path
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import Client, override_settings
+from django.utils import timezone
+from apps.api.benchmarks import generate_benchmark_data, measure
+from apps.bookings.fake_telegram import FakeTelegramServer
+from apps.bookings.models import Booking, Notification
+from apps.bookings.notification_service import NotificationService
+from apps.services.models import Provider
+from apps.users.models import User
+
+BENCHMARKS = [
+    'available_slots',
+    'schedule_notifications',
+    'send_pending_notifications',
+    'dashboard_stats',
+    'booking_list',
+    'booking_export',
+]
+
+
+class Command(BaseCommand):
+    help = 'Time the hot paths at several dataset sizes and compare with a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,10000',
+            help='Comma-separated dataset sizes (bookings) to run at (default: 1000,10000)'
+        )
+        parser.add_argument(
+            '--only',
+            help=f"Comma-separated benchmarks to run (default: all of {', '.join(BENCHMARKS)})"
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per benchmark; the best run is reported (default: 3)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Where to write the JSON results (default: benchmarks/results/<timestamp>.json)'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Results file to compare against (default: benchmarks/baseline.json if it exists)'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Slowdown against the baseline flagged as a regression (default: 0.2 = 20%%)'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Also store these results as the new baseline'
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when a regression is flagged'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+        if not sizes or min(sizes) < 1:
+            raise CommandError('--sizes must be positive')
+        selected = options['only'].split(',') if options['only'] else BENCHMARKS
+        unknown = set(selected) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        self.repeat = max(1, options['repeat'])
+
+        directory = Path(settings.BASE_DIR) / 'benchmarks'
+        baseline_path = Path(options['baseline']) if options['baseline'] else directory / 'baseline.json'
+        if options['baseline'] and not baseline_path.exists():
+            raise CommandError(f'Baseline {baseline_path} does not exist')
+
+        results = {}
+        with FakeTelegramServer() as telegram, override_settings(
+            TELEGRAM_BOT_TOKEN='benchmark',
+            TELEGRAM_API_BASE_URL=telegram.url,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        ):
+            for size in sizes:
+                self.stdout.write(f'Dataset: {size} bookings')
+                # Generated rows and everything the benchmarks write are rolled back
+                with transaction.atomic():
+                    self.prepare(generate_benchmark_data(size), size)
+                    for name in selected:
+                        seconds, operations = getattr(self, f'bench_{name}')()
+                        key = f'{name}@{size}'
+                        results[key] = {
+                            'seconds': seconds,
+                            'operations': operations,
+                            'ms_per_op': seconds * 1000 / operations,
+                        }
+                        self.stdout.write(
+                            f'  {name:<28} {results[key]["ms_per_op"]:>10.3f} ms/op '
+                            f'({operations} ops in {seconds:.3f}s)'
+                        )
+                    transaction.set_rollback(True)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'host': platform.node(),
+            'repeat': self.repeat,
+            'results': results,
+        }
+        output = Path(options['output']) if options['output'] else (
+            directory / 'results' / f"{timezone.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        self.write_json(output, report)
+        self.stdout.write(f'Results written to {output}')
+
+        regressions = []
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text())
+            regressions = self.compare(results, baseline.get('results', {}), options['threshold'])
+
+        if options['save_baseline']:
+            self.write_json(baseline_path, report)
+            self.stdout.write(f'Baseline saved to {baseline_path}')
+
+        if regressions:
+            message = f"{len(regressions)} regression(s): {', '.join(regressions)}"
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+
+    def write_json(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2) + '\n')
+
+    def compare(self, results, baseline, threshold):
+        """Print the change against the baseline; returns the regressed keys"""
+        self.stdout.write(f'\nAgainst baseline (regression: > {threshold:.0%} slower):')
+        regressions = []
+        for key, result in results.items():
+            if key not in baseline:
+                self.stdout.write(f'  {key:<36} no baseline')
+                continue
+            before = baseline[key]['ms_per_op']
+            change = result['ms_per_op'] / before - 1
+            flag = ''
+            if change > threshold:
+                regressions.append(key)
+                flag = self.style.ERROR('  REGRESSION')
+            self.stdout.write(
+                f'  {key:<36} {before:>10.3f} -> {result["ms_per_op"]:>10.3f} ms/op ({change:>+7.1%}){flag}'
+            )
+        return regressions
+
+    def prepare(self, prefix, size):
+        """Pick the users and rows the benchmarks run against"""
+        users = User.objects.filter(username__startswith=prefix)
+        # Everyone is reachable on Telegram so reminders get scheduled and sent
+        users.update(telegram_username=F('username'))
+
+        self.prefix = prefix
+        self.size = size
+        self.client_user = users.get(username=f'{prefix}client_0')
+        self.provider_user = users.get(username=f'{prefix}provider_0')
+        self.providers = list(Provider.objects.filter(
+            user__username__startswith=prefix
+        ).select_related('service')[:50])
+
+        # First working day from tomorrow on
+        day = timezone.localdate() + timedelta(days=1)
+        while day.strftime('%A').lower() not in self.providers[0].working_days:
+            day += timedelta(days=1)
+        self.slots_date = day
+
+        self.bookings = list(Booking.objects.filter(
+            client__username__startswith=prefix
+        ).select_related('client', 'provider__user')[:500])
+
+    def request(self, user, path, count):
+        """GET `path` as `user` `count` times; returns (best seconds, count)"""
+        client = Client()
+        client.force_login(user)
+
+        def run():
+            for _ in range(count):
+                response = client.get(path)
+                if response.status_code != 200:
+                    raise CommandError(f'GET {path} returned {response.status_code}')
+
+        seconds, _ = measure(run, self.repeat)
+        return seconds, count
+
+    def bench_available_slots(self):
+        def run():
+            for provider in self.providers:
+                provider.get_available_slots(self.slots_date)
+
+        seconds, _ = measure(run, self.repeat)
+        return seconds, len(self.providers)
+
+    def bench_schedule_notifications(self):
+        booking_ids = [booking.id for booking in self.bookings]
+
+        def setup():
+            Notification.objects.filter(booking_id__in=booking_ids, scheduled_for__isnull=False).delete()
+
+        def run():
+            for booking in self.bookings:
+                NotificationService.schedule_booking_notifications(booking)
+
+        seconds, _ = measure(run, self.repeat, setup)
+        return seconds, len(self.bookings)
+
+    def bench_send_pending_notifications(self):
+        count = min(self.size, 500)
+        due = timezone.now() - timedelta(minutes=1)
+        created = []
+
+        def setup():
+            # Every run sends the same number of due reminders
+            Notification.objects.filter(id__in=created).delete()
+            created[:] = [notification.id for notification in Notification.objects.bulk_create([
+                NotificationService.build_notification(
+                    booking.client, 'queue_reminder_1h',
+                    NotificationService.booking_params(booking),
+                    booking=booking, scheduled_for=due, is_sent=False
+                )
+                for booking in (self.bookings * (count // len(self.bookings) + 1))[:count]
+            ])]
+
+        seconds, _ = measure(NotificationService.send_pending_notifications, self.repeat, setup)
+        return seconds, count
+
+    def bench_dashboard_stats(self):
+        client_seconds, client_count = self.request(self.client_user, '/api/dashboard/stats/', 10)
+        provider_seconds, provider_count = self.request(self.provider_user, '/api/dashboard/stats/', 10)
+        return client_seconds + provider_seconds, client_count + provider_count
+
+    def bench_booking_list(self):
+        return self.request(self.client_user, '/api/bookings/', 10)
+
+    def bench_booking_export(self):
+        return self.request(self.client_user, '/bookings/export/', 5)
@@ -0,0 +1,47 @@
+import sqlite3
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary into the SQLite read replicas, once or every --interval seconds'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Seconds between copies, standing in for replication lag; 0 copies once (default: 0)'
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        replicas = [settings.DATABASES[alias] for alias in getattr(settings, 'DATABASE_REPLICAS', [])]
+        if not replicas:
+            raise CommandError('No replicas configured; set DATABASE_REPLICA_URLS')
+        sqlite = 'django.db.backends.sqlite3'
+        if primary['ENGINE'] != sqlite or any(replica['ENGINE'] != sqlite for replica in replicas):
+            raise CommandError('sync_sqlite_replica only copies between SQLite files')
+
+        while True:
+            start = time.perf_counter()
+            for replica in replicas:
+                self.copy(primary['NAME'], replica['NAME'])
+            self.stdout.write(
+                f"Copied {primary['NAME']} to {len(replicas)} replica(s) in {time.perf_counter() - start:.2f}s"
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, source, destination):
+        # One backup step: a consistent snapshot of the primary (under WAL
+        # its writers carry on) replacing the replica's content atomically
+        origin = sqlite3.connect(source, timeout=20)
+        copy = sqlite3.connect(destination, timeout=20)
+        try:
+            origin.backup(copy)
+        finally:
+            copy.close()
+            origin.close()
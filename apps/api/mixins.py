@@ -0,0 +1,296 @@
+import logging
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_paths(value):
+    """Parse 'a,b.c' into a tree: {'a': None, 'b': {'c': None}}"""
+    tree = {}
+    for item in (value or '').split(','):
+        parts = [part.strip() for part in item.split('.') if part.strip()]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                # The whole parent is already selected
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+class Fieldset:
+    """Sparse fieldset from `fields=` / `exclude=` query parameters.
+
+    Both take comma-separated field names; dotted names select fields of
+    nested objects, e.g. ``fields=id,date,time,provider.user_name`` or
+    ``exclude=client.email,notes``. Unknown names are ignored.
+    """
+
+    def __init__(self, include=None, exclude=None):
+        # include: tree of selected fields, None for all of them
+        self.include = include
+        self.exclude = exclude or {}
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        """Return a Fieldset, or None when the request selects every field"""
+        fields = query_params.get('fields')
+        exclude = query_params.get('exclude')
+        if not fields and not exclude:
+            return None
+        return cls(_parse_paths(fields) if fields else None, _parse_paths(exclude))
+
+    def select(self, names):
+        """Return [(name, sub_fieldset)] for the selected names, in order.
+
+        sub_fieldset is None when the whole field (and everything nested
+        in it) is selected.
+        """
+        selected = []
+        for name in names:
+            if self.include is not None and name not in self.include:
+                continue
+            excluded = self.exclude.get(name, {})
+            if excluded is None:
+                continue
+            included = None if self.include is None else self.include[name]
+            if included is None and not excluded:
+                selected.append((name, None))
+            else:
+                selected.append((name, Fieldset(included, excluded)))
+        return selected
+
+
+def select_all(names):
+    return [(name, None) for name in names]
+
+
+class QueryPlanMixin:
+    """Serializer mixin declaring the joins and annotations it needs.
+
+    Declare them on the serializer's Meta, keyed by serializer field name:
+
+        class Meta:
+            select_related = {'client': ['client']}
+            prefetch_related = {'tags': ['tags']}
+            annotations = {'duration': F('provider__service__duration_minutes')}
+            requires = {'full_name': ['first_name', 'last_name', 'username']}
+
+    Nested serializers using this mixin contribute their own joins, so
+    they need no entry. Annotations are added under the field name.
+    `requires` lists the model
+    columns a field reads when it is not a plain model field; it is used to
+    narrow the query with .only() for sparse fieldsets. Views using
+    QueryPlanViewMixin apply the plan to their queryset automatically.
+
+    The serializer also accepts a `fieldset` argument (see Fieldset) and
+    drops the fields it does not select, including nested ones.
+    """
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fieldset is not None:
+            self.apply_fieldset(fieldset)
+
+    def apply_fieldset(self, fieldset):
+        """Drop the fields the fieldset does not select"""
+        selected = dict(fieldset.select(list(self.fields)))
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+                continue
+            nested = self.fields[name]
+            nested = getattr(nested, 'child', nested)
+            if selected[name] is not None and hasattr(nested, 'apply_fieldset'):
+                nested.apply_fieldset(selected[name])
+
+    @classmethod
+    def get_plan_field_names(cls):
+        meta = getattr(cls, 'Meta', None)
+        return list(getattr(meta, 'fields', None) or [])
+
+    @classmethod
+    def get_query_plan(cls, fieldset=None):
+        """Return (select_related, prefetch_related, annotations) for the fields"""
+        meta = getattr(cls, 'Meta', None)
+        names = cls.get_plan_field_names()
+        selected = fieldset.select(names) if fieldset is not None else select_all(names)
+
+        select_related, prefetch_related, annotations = [], [], {}
+
+        def add(paths, target):
+            for path in paths:
+                if path not in target:
+                    target.append(path)
+
+        for name, sub_fieldset in selected:
+            declared = cls._declared_fields.get(name)
+            nested = getattr(declared, 'child', declared)
+            if name not in getattr(meta, 'select_related', {}) and hasattr(nested, 'get_query_plan'):
+                # Nested serializer with its own plan: join what it needs
+                source = declared.source or name
+                nested_select, nested_prefetch, _ = type(nested).get_query_plan(sub_fieldset)
+                add([source] + [f'{source}__{path}' for path in nested_select], select_related)
+                add([f'{source}__{path}' for path in nested_prefetch], prefetch_related)
+            add(getattr(meta, 'select_related', {}).get(name, []), select_related)
+            add(getattr(meta, 'prefetch_related', {}).get(name, []), prefetch_related)
+            expression = getattr(meta, 'annotations', {}).get(name)
+            if expression is not None:
+                annotations[name] = expression
+        return select_related, prefetch_related, annotations
+
+    @classmethod
+    def get_only_columns(cls, fieldset=None, prefix=''):
+        """Model columns (for .only()) read by the selected fields"""
+        meta = getattr(cls, 'Meta', None)
+        model = meta.model
+        requires = getattr(meta, 'requires', {})
+        annotations = getattr(meta, 'annotations', {})
+        names = cls.get_plan_field_names()
+        selected = fieldset.select(names) if fieldset is not None else select_all(names)
+
+        columns = [prefix + model._meta.pk.name]
+        for name, sub_fieldset in selected:
+            declared = cls._declared_fields.get(name)
+            nested = getattr(declared, 'child', declared)
+            if getattr(declared, 'write_only', False):
+                continue
+            if name in requires:
+                columns.extend(prefix + path for path in requires[name])
+            elif hasattr(nested, 'get_only_columns'):
+                source = declared.source or name
+                columns.extend(type(nested).get_only_columns(sub_fieldset, f'{prefix}{source}__'))
+            elif name in annotations:
+                continue
+            else:
+                source = getattr(declared, 'source', None) or name
+                try:
+                    model._meta.get_field(source)
+                except Exception:
+                    continue
+                columns.append(prefix + source)
+        return columns
+
+    @classmethod
+    def apply_query_plan(cls, queryset, fieldset=None, required_columns=()):
+        """Apply the declared joins and annotations to a queryset.
+
+        With a fieldset, only the joins of selected fields are made and the
+        selected columns (plus `required_columns`) are loaded with .only().
+        """
+        select_related, prefetch_related, annotations = cls.get_query_plan(fieldset)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        if fieldset is not None:
+            queryset = queryset.only(*cls.get_only_columns(fieldset), *required_columns)
+        return queryset
+
+
+class QueryPlanViewMixin:
+    """Generic view mixin applying the serializer's query plan.
+
+    The plan is applied in filter_queryset(), which the generic views call
+    on the result of get_queryset() for both lists and single objects, so
+    views can keep overriding get_queryset() with plain filters.
+
+    With `sparse_fieldsets = True`, GET requests accept `fields=` and
+    `exclude=` (see Fieldset); the serializer output, joins and loaded
+    columns are narrowed to the selected fields.
+    """
+
+    sparse_fieldsets = False
+
+    def get_fieldset(self):
+        if not self.sparse_fieldsets or self.request.method not in ('GET', 'HEAD'):
+            return None
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = Fieldset.from_query_params(self.request.query_params)
+        return self._fieldset
+
+    def get_required_columns(self):
+        """Columns loaded even when no selected field needs them"""
+        ordering_field = getattr(self.paginator, 'ordering_field', None)
+        return [ordering_field] if ordering_field else []
+
+    def get_serializer(self, *args, **kwargs):
+        fieldset = self.get_fieldset()
+        if fieldset is not None and hasattr(self.get_serializer_class(), 'apply_fieldset'):
+            kwargs.setdefault('fieldset', fieldset)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'apply_query_plan'):
+            queryset = serializer_class.apply_query_plan(
+                queryset, self.get_fieldset(), self.get_required_columns()
+            )
+        return queryset
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a view runs more queries than budgeted"""
+
+
+class QueryBudgetMixin:
+    """API view mixin enforcing a declared query budget.
+
+    `query_budget` is the maximum number of SQL queries per request, either
+    an int for every method or a dict keyed by HTTP method. The check is
+    controlled by settings.API_QUERY_BUDGET_MODE:
+
+        None     - disabled (no overhead)
+        'warn'   - log a warning when a request goes over budget
+        'strict' - raise QueryBudgetExceeded (use in tests)
+    """
+
+    query_budget = None
+
+    def get_query_budget(self, request):
+        budget = self.query_budget
+        if isinstance(budget, dict):
+            return budget.get(request.method)
+        return budget
+
+    def dispatch(self, request, *args, **kwargs):
+        mode = getattr(settings, 'API_QUERY_BUDGET_MODE', None)
+        budget = self.get_query_budget(request)
+        if not mode or budget is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        captured = []
+
+        def record(execute, sql, params, many, context):
+            captured.append(sql)
+            return execute(sql, params, many, context)
+
+        # Wrappers on every alias, so reads routed to a replica count as
+        # well; unlike CaptureQueriesContext they open no connection
+        with ExitStack() as stack:
+            for db in connections.all():
+                stack.enter_context(db.execute_wrapper(record))
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+
+        count = len(captured)
+        if count > budget:
+            message = (
+                f"{self.__class__.__name__} {request.method} {request.path} ran "
+                f"{count} queries (budget {budget})"
+            )
+            if mode == 'strict':
+                details = '\n'.join(captured)
+                raise QueryBudgetExceeded(f"{message}:\n{details}")
+            logger.warning(message)
+        return response
@@ -0,0 +1,187 @@
+import base64
+import json
+from collections import OrderedDict
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(position):
+    """Encode a (value, id) position as an opaque URL-safe cursor"""
+    value, pk = position
+    # Full isoformat: DjangoJSONEncoder would truncate microseconds
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = json.dumps([value, pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, queryset, field_name):
+    """Decode a cursor back into a (value, id) position"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        field = queryset.model._meta.get_field(field_name)
+        return field.to_python(value), int(pk)
+    except Exception as e:
+        raise InvalidCursor(str(e))
+
+
+def keyset_page(queryset, field_name, cursor=None, page_size=20, descending=True):
+    """Return one page of `queryset` ordered by (field_name, id).
+
+    Rows after the cursor position are selected with a WHERE clause on the
+    (field_name, id) pair instead of an OFFSET, so every page costs the same
+    as the first one. `queryset` may be a model or `.values()` queryset.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    direction = '-' if descending else ''
+    queryset = queryset.order_by(f'{direction}{field_name}', f'{direction}id')
+
+    if cursor:
+        value, pk = decode_cursor(cursor, queryset, field_name)
+        lookup = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field_name}__{lookup}': value}) |
+            Q(**{field_name: value, f'id__{lookup}': pk})
+        )
+
+    rows = list(queryset[:page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if has_next:
+        last = rows[-1]
+        if isinstance(last, dict):
+            position = [last[field_name], last['id']]
+        else:
+            position = [getattr(last, field_name), last.pk]
+        next_cursor = encode_cursor(position)
+    return rows, next_cursor
+
+
+def estimate_count(queryset, cap=1000):
+    """Cheap row count estimate for a queryset.
+
+    On PostgreSQL the planner's row estimate is used; elsewhere rows are
+    counted up to `cap`. Returns (count, is_estimate).
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), True
+
+    count = queryset[:cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on (ordering_field, id).
+
+    Query params:
+        cursor    - opaque cursor from a previous page's `next` link
+        page_size - rows per page (up to `max_page_size`)
+        total     - `exact` for COUNT(*), `estimate` for a cheap estimate;
+                    omitted by default so pages never run COUNT(*)
+    """
+
+    ordering_field = 'created_at'
+    descending = True
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    total_query_param = 'total'
+    estimate_cap = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count = None
+        self.count_is_estimate = False
+
+        total = request.query_params.get(self.total_query_param)
+        if total == 'exact':
+            self.count = queryset.count()
+        elif total == 'estimate':
+            self.count, self.count_is_estimate = estimate_count(queryset, self.estimate_cap)
+
+        try:
+            rows, self.next_cursor = keyset_page(
+                queryset,
+                self.ordering_field,
+                cursor=request.query_params.get(self.cursor_query_param),
+                page_size=self.get_page_size(request),
+                descending=self.descending,
+            )
+        except InvalidCursor:
+            raise ValidationError({self.cursor_query_param: ['Invalid cursor']})
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict([
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+        ])
+        if self.count is not None:
+            response['count'] = self.count
+            response['count_is_estimate'] = self.count_is_estimate
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_is_estimate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+
+class BookingPagination(KeysetPagination):
+    """Bookings, newest first"""
+
+    ordering_field = 'created_at'
+
+
+class NotificationPagination(KeysetPagination):
+    """Notifications, most recently sent first"""
+
+    ordering_field = 'sent_at'
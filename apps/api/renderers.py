@@ -0,0 +1,86 @@
+"""
+Optional fast JSON and MessagePack renderers.
+
+Both depend on optional packages (orjson, msgpack); settings.py only lists
+a renderer in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] when its package
+is installed, and DRF's JSONRenderer stays in the list as the fallback.
+
+- OrjsonRenderer serves application/json. Serializer output renders
+  exactly as with DRF's JSONRenderer (compact, UTF-8); raw datetime, date,
+  time and UUID values are encoded natively by orjson (keeping
+  microseconds, which DRF truncates to milliseconds).
+- MessagePackRenderer serves application/msgpack; clients opt in with
+  ``Accept: application/msgpack`` or ``?format=msgpack``.
+"""
+
+from django.utils.http import parse_header_parameters
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Fallback for values the encoder has no native support for.
+
+    Uses DRF's JSON encoder rules (Decimal, timedelta, lazy strings,
+    querysets, ...) so every renderer agrees on the representation.
+    """
+    return _encoder.default(obj)
+
+
+def _msgpack_default(obj):
+    # msgpack has no native date/time/UUID types; encode them like JSON
+    return encode_default(obj)
+
+
+class OrjsonRenderer(renderers.BaseRenderer):
+    """JSON renderer backed by orjson"""
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def get_indent(self, accepted_media_type, renderer_context):
+        if accepted_media_type:
+            base_media_type, params = parse_header_parameters(accepted_media_type)
+            try:
+                return int(params['indent'])
+            except (KeyError, ValueError, TypeError):
+                pass
+        return renderer_context.get('indent', None)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        if self.get_indent(accepted_media_type, renderer_context):
+            # orjson only supports two-space indentation
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=encode_default, option=option)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """MessagePack renderer"""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
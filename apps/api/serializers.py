@@ -1,13 +1,17 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from apps.services.models import Service, Provider
-from apps.bookings.models import Booking, Notification
+from apps.bookings.models import Booking, Notification, SlotHold
+from django.db.models import F
 from django.utils import timezone
+from apps.bookings.models import AddMinutes
+from apps.bookings.booking_service import BookingService
+from .mixins import QueryPlanMixin
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(QueryPlanMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     
     full_name = serializers.ReadOnlyField()
@@ -22,6 +26,11 @@ class UserSerializer(serializers.ModelSerializer):
             'is_provider', 'is_client', 'date_joined'
         ]
         read_only_fields = ['id', 'date_joined']
+        requires = {
+            'full_name': ['first_name', 'last_name', 'username'],
+            'is_provider': ['role'],
+            'is_client': ['role'],
+        }
 
 
 class ServiceSerializer(serializers.ModelSerializer):
@@ -33,7 +42,7 @@ class ServiceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class ProviderSerializer(serializers.ModelSerializer):
+class ProviderSerializer(QueryPlanMixin, serializers.ModelSerializer):
     """Serializer for Provider model"""
     
     user = UserSerializer(read_only=True)
@@ -49,9 +58,12 @@ class ProviderSerializer(serializers.ModelSerializer):
             'is_accepting', 'description', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        select_related = {
+            'service': ['service'],
+        }
 
 
-class ProviderListSerializer(serializers.ModelSerializer):
+class ProviderListSerializer(QueryPlanMixin, serializers.ModelSerializer):
     """Simplified serializer for Provider list"""
     
     user_name = serializers.CharField(source='user.full_name', read_only=True)
@@ -65,17 +77,27 @@ class ProviderListSerializer(serializers.ModelSerializer):
             'working_days', 'start_time', 'end_time', 'location',
             'is_accepting', 'description'
         ]
-
-
-class BookingSerializer(serializers.ModelSerializer):
+        select_related = {
+            'user_name': ['user'],
+            'service_name': ['service'],
+            'service_duration': ['service'],
+        }
+        requires = {
+            'user_name': ['user__first_name', 'user__last_name', 'user__username'],
+            'service_name': ['service__name'],
+            'service_duration': ['service__duration_minutes'],
+        }
+
+
+class BookingSerializer(QueryPlanMixin, serializers.ModelSerializer):
     """Serializer for Booking model"""
     
     client = UserSerializer(read_only=True)
     provider = ProviderListSerializer(read_only=True)
     provider_id = serializers.IntegerField(write_only=True)
     client_id = serializers.IntegerField(write_only=True)
-    duration = serializers.ReadOnlyField()
-    end_time = serializers.ReadOnlyField()
+    duration = serializers.IntegerField(source='get_duration_minutes', read_only=True)
+    end_time = serializers.TimeField(source='get_end_time', read_only=True)
     can_be_cancelled = serializers.ReadOnlyField()
     is_upcoming = serializers.ReadOnlyField()
     
@@ -87,6 +109,16 @@ class BookingSerializer(serializers.ModelSerializer):
             'can_be_cancelled', 'is_upcoming', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        # client and provider joins come from the nested serializers' plans
+        requires = {
+            'can_be_cancelled': ['status'],
+            'is_upcoming': ['date', 'time'],
+        }
+        # Computed in SQL; Booking.get_duration_minutes/get_end_time use them
+        annotations = {
+            'duration': F('provider__service__duration_minutes'),
+            'end_time': AddMinutes(F('time'), F('provider__service__duration_minutes')),
+        }
     
     def validate(self, data):
         """Validate booking data"""
@@ -114,24 +146,23 @@ class BookingSerializer(serializers.ModelSerializer):
         if data['time'] < provider.start_time or data['time'] >= provider.end_time:
             raise serializers.ValidationError(f"This time is outside working hours ({provider.start_time} - {provider.end_time})")
         
-        # Check if slot is available
-        if Booking.objects.filter(
-            provider=provider,
-            date=data['date'],
-            time=data['time'],
-            status__in=['pending', 'confirmed', 'active']
-        ).exists():
-            raise serializers.ValidationError("This time slot is already booked")
-        
+        # Who gets the slot is decided by ReservationService (slot holds
+        # and bookings_active_slot_unique), not by a check here
         return data
 
 
 class BookingCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating bookings"""
     
+    provider_id = serializers.IntegerField()
+    # Token from POST /api/providers/<id>/holds/; without one the slot is
+    # held and booked in one step
+    hold_token = serializers.CharField(write_only=True, required=False)
+    
     class Meta:
         model = Booking
-        fields = ['provider_id', 'date', 'time', 'notes']
+        fields = ['id', 'provider_id', 'date', 'time', 'notes', 'hold_token', 'status']
+        read_only_fields = ['id', 'status']
     
     def validate(self, data):
         """Validate booking creation"""
@@ -159,18 +190,33 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if data['time'] < provider.start_time or data['time'] >= provider.end_time:
             raise serializers.ValidationError(f"This time is outside working hours ({provider.start_time} - {provider.end_time})")
         
-        # Check if slot is available
-        if Booking.objects.filter(
-            provider=provider,
-            date=data['date'],
-            time=data['time'],
-            status__in=['pending', 'confirmed', 'active']
-        ).exists():
-            raise serializers.ValidationError("This time slot is already booked")
-        
+        # Who gets the slot is decided by ReservationService (slot holds
+        # and bookings_active_slot_unique), not by a check here
         return data
 
 
+class SlotHoldSerializer(serializers.ModelSerializer):
+    """Serializer for slot holds"""
+    
+    provider_id = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = SlotHold
+        fields = ['token', 'provider_id', 'date', 'time', 'expires_at']
+        read_only_fields = ['token', 'expires_at']
+
+
+class BulkBookingActionSerializer(serializers.Serializer):
+    """Serializer for bulk booking status changes"""
+    
+    action = serializers.ChoiceField(choices=list(BookingService.TRANSITIONS))
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BookingService.MAX_BULK_IDS
+    )
+
+
 class TimeSlotSerializer(serializers.Serializer):
     """Serializer for available time slots"""
     
@@ -178,10 +224,17 @@ class TimeSlotSerializer(serializers.Serializer):
     available = serializers.BooleanField()
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(QueryPlanMixin, serializers.ModelSerializer):
     """Serializer for Notification model"""
     
+    title = serializers.CharField(source='get_title', read_only=True)
+    message = serializers.CharField(source='get_message', read_only=True)
+    
     class Meta:
         model = Notification
         fields = ['id', 'type', 'title', 'message', 'is_read', 'sent_at']
         read_only_fields = ['id', 'sent_at']
+        requires = {
+            'title': ['template_key', 'locale', 'params', 'title'],
+            'message': ['template_key', 'locale', 'params', 'message'],
+        }
@@ -1,3 +1,317 @@
-from django.test import TestCase
+import json
+import unittest
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from apps.bookings.models import Booking, Notification, SlotHold
+from apps.bookings.reservation_service import ReservationService
+from apps.services.models import Provider, Service
+from apps.users.models import User
+from . import renderers
+from .benchmarks import generate_benchmark_data
+from .fast_serializers import FastBookingSerializer, FastNotificationSerializer, FastProviderListSerializer
+from .mixins import QueryBudgetExceeded
+from .pagination import decode_cursor, encode_cursor, estimate_count, keyset_page
+from .serializers import (
+    BookingSerializer, NotificationSerializer, ProviderListSerializer, TimeSlotSerializer
+)
 
-# Create your tests here.
+
+class BookingFixtureMixin:
+    """A provider and a client with a few upcoming bookings"""
+
+    def setUp(self):
+        service = Service.objects.create(name='Haircut', duration_minutes=30)
+        provider_user = User.objects.create_user(
+            username='provider', password='x', role='provider', first_name='Aziz'
+        )
+        self.provider = Provider.objects.create(
+            user=provider_user, service=service, working_days=['monday', 'tuesday', 'wednesday',
+                                                               'thursday', 'friday', 'saturday', 'sunday'],
+            start_time=time(9), end_time=time(18)
+        )
+        self.client_user = User.objects.create_user(
+            username='client', password='x', role='client', first_name='Dilnoza'
+        )
+        tomorrow = date.today() + timedelta(days=1)
+        for hour in range(10, 15):
+            Booking.objects.create(client=self.client_user, provider=self.provider, date=tomorrow, time=time(hour))
+        self.client.force_login(self.client_user)
+
+
+@override_settings(API_QUERY_BUDGET_MODE='strict', API_FAST_SERIALIZERS=False)
+class QueryBudgetTests(BookingFixtureMixin, TestCase):
+    """Strict query budgets catch N+1 regressions"""
+
+    def test_booking_list_within_budget(self):
+        response = self.client.get('/api/bookings/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_n_plus_one_exceeds_budget(self):
+        # A serializer that lost its joins loads client and provider per row
+        with mock.patch.object(BookingSerializer, 'get_query_plan', return_value=([], [], {})):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/bookings/')
+
+
+class BookingCreateTests(BookingFixtureMixin, TestCase):
+    """POST /api/bookings/"""
+
+    def test_rejected_booking_frees_its_slot(self):
+        slot = {'provider_id': self.provider.id, 'date': str(date.today() + timedelta(days=2)), 'time': '12:00'}
+        self.client.force_login(self.provider.user)
+
+        response = self.client.post('/api/bookings/', slot)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Providers cannot book services', response.content.decode())
+        self.assertFalse(SlotHold.objects.exists())
+
+        self.client.force_login(self.client_user)
+        response = self.client.post('/api/bookings/', slot)
+        self.assertEqual(response.status_code, 201)
+
+    def test_booked_slot_is_refused(self):
+        booking = Booking.objects.filter(client=self.client_user).first()
+        other = User.objects.create_user(username='other', password='x', role='client')
+        self.client.force_login(other)
+
+        response = self.client.post('/api/bookings/', {
+            'provider_id': self.provider.id, 'date': str(booking.date), 'time': booking.time.strftime('%H:%M'),
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('This time slot is already booked', response.content.decode())
+        self.assertFalse(SlotHold.objects.exists())
+
+
+class BookingUpdateTests(BookingFixtureMixin, TestCase):
+    """PUT /api/bookings/<id>/"""
+
+    def put(self, booking, new_time):
+        return self.client.put(f'/api/bookings/{booking.id}/', {
+            'provider_id': self.provider.id, 'client_id': self.client_user.id,
+            'date': str(booking.date), 'time': new_time, 'notes': 'Ko\'chirildi',
+        }, content_type='application/json')
+
+    def test_moves_booking_to_free_slot(self):
+        booking = Booking.objects.filter(client=self.client_user).first()
+
+        response = self.put(booking, '16:00')
+
+        self.assertEqual(response.status_code, 200)
+        booking.refresh_from_db()
+        self.assertEqual((booking.time, booking.notes), (time(16), 'Ko\'chirildi'))
+        self.assertFalse(SlotHold.objects.exists())
+
+    def test_held_slot_is_refused(self):
+        booking = Booking.objects.filter(client=self.client_user).first()
+        other = User.objects.create_user(username='other', password='x', role='client')
+        ReservationService.acquire_hold(other, self.provider, booking.date, time(16))
+
+        response = self.put(booking, '16:00')
+
+        self.assertEqual(response.status_code, 400)
+        booking.refresh_from_db()
+        self.assertNotEqual(booking.time, time(16))
+
+
+class ConditionalGetTests(BookingFixtureMixin, TestCase):
+    """ETags of read-mostly resources: 304 while unchanged, new tag on change"""
+
+    def setUp(self):
+        super().setUp()
+        self.day = date.today() + timedelta(days=2)
+        self.slots_url = f'/api/providers/{self.provider.id}/slots/?date={self.day}'
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_unchanged_resource_is_not_modified(self):
+        for url in ('/api/services/', '/api/providers/', f'/api/providers/{self.provider.id}/', self.slots_url):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=self.etag(url))
+
+                self.assertEqual(response.status_code, 304)
+
+    def test_booking_rotates_slots_etag(self):
+        before = self.etag(self.slots_url)
+        booking = Booking.objects.create(client=self.client_user, provider=self.provider, date=self.day, time=time(10))
+        booked = self.etag(self.slots_url)
+
+        booking.status = 'cancelled'
+        booking.save()
+        cancelled = self.etag(self.slots_url)
+
+        self.assertEqual(len({before, booked, cancelled}), 3)
+        response = self.client.get(self.slots_url, HTTP_IF_NONE_MATCH=before)
+        self.assertEqual(response.status_code, 200)
+
+    def test_hold_rotates_slots_etag(self):
+        before = self.etag(self.slots_url)
+
+        ReservationService.acquire_hold(self.client_user, self.provider, self.day, time(10))
+
+        self.assertNotEqual(self.etag(self.slots_url), before)
+
+    def test_provider_change_rotates_slots_etag(self):
+        before = self.etag(self.slots_url)
+
+        self.provider.end_time = time(17)
+        self.provider.save()
+        shorter_day = self.etag(self.slots_url)
+
+        self.provider.service.duration_minutes = 60
+        self.provider.service.save()
+
+        self.assertEqual(len({before, shorter_day, self.etag(self.slots_url)}), 3)
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages on (sort key, id) with repeated sort keys"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='client', password='x', role='client')
+        now = timezone.now().replace(microsecond=123456)
+        # Three rows share one sent_at, two another
+        sent_at = [now] * 3 + [now - timedelta(minutes=1)] * 2 + [now - timedelta(minutes=2), now + timedelta(minutes=1)]
+        Notification.objects.bulk_create([
+            Notification(user=self.user, type='provider_message', title='Xabar', message=f'Xabar {i}', sent_at=value)
+            for i, value in enumerate(sent_at)
+        ])
+        self.client.force_login(self.user)
+
+    def test_cursor_round_trip(self):
+        sent_at = Notification.objects.first().sent_at
+        queryset = Notification.objects.all()
+
+        self.assertEqual(decode_cursor(encode_cursor((sent_at, 7)), queryset, 'sent_at'), (sent_at, 7))
+        self.assertEqual(
+            decode_cursor(encode_cursor((date(2026, 3, 1), 7)), Booking.objects.all(), 'date'), (date(2026, 3, 1), 7)
+        )
+
+    def test_api_walks_every_row_once(self):
+        url = '/api/notifications/?page_size=2'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.json()['results'])
+            url = response.json()['next']
+
+        expected = list(Notification.objects.order_by('-sent_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_ties_on_date_across_pages(self):
+        provider = Provider.objects.create(
+            user=User.objects.create_user(username='provider', password='x', role='provider'),
+            service=Service.objects.create(name='Haircut', duration_minutes=30),
+            working_days=['monday'], start_time=time(9), end_time=time(18)
+        )
+        first = date.today() + timedelta(days=1)
+        Booking.objects.bulk_create([
+            Booking(client=self.user, provider=provider, date=first + timedelta(days=hour % 3), time=time(hour))
+            for hour in range(9, 17)
+        ])
+        expected = list(Booking.objects.order_by('date', 'id').values_list('id', flat=True))
+
+        for queryset in (Booking.objects.all(), Booking.objects.values('id', 'date')):
+            seen, cursor = [], None
+            while True:
+                rows, cursor = keyset_page(queryset, 'date', cursor=cursor, page_size=3, descending=False)
+                seen.extend(row['id'] if isinstance(row, dict) else row.id for row in rows)
+                if cursor is None:
+                    break
+            self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_is_400(self):
+        for cursor in ('not-a-cursor', encode_cursor(('yesterday', 1))):
+            response = self.client.get('/api/notifications/', {'cursor': cursor})
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'cursor': ['Invalid cursor']})
+
+    def test_estimate_count_is_capped(self):
+        queryset = Notification.objects.all()
+
+        self.assertEqual(estimate_count(queryset, cap=5), (5, True))
+        self.assertEqual(estimate_count(queryset, cap=7), (7, False))
+
+        response = self.client.get('/api/notifications/', {'total': 'estimate'})
+        self.assertEqual((response.json()['count'], response.json()['count_is_estimate']), (7, False))
+
+
+class SerializerParityTests(TestCase):
+    """Fast serializers render the same JSON as the DRF serializers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.prefix = generate_benchmark_data(40)
+
+    def assertSameJSON(self, drf_serializer, fast_serializer, queryset):
+        if hasattr(drf_serializer, 'apply_query_plan'):
+            planned = drf_serializer.apply_query_plan(queryset)
+        else:
+            planned = queryset
+        renderer = JSONRenderer()
+        drf_data = json.loads(renderer.render(drf_serializer(planned, many=True).data))
+        fast_data = json.loads(renderer.render(fast_serializer.serialize(fast_serializer.project(queryset))))
+        self.assertTrue(fast_data)
+        self.assertEqual(fast_data, drf_data)
+
+    def test_providers(self):
+        self.assertSameJSON(
+            ProviderListSerializer, FastProviderListSerializer,
+            Provider.objects.filter(user__username__startswith=self.prefix)
+        )
+
+    def test_bookings(self):
+        self.assertSameJSON(
+            BookingSerializer, FastBookingSerializer,
+            Booking.objects.filter(client__username__startswith=self.prefix)
+        )
+
+    def test_notifications(self):
+        self.assertSameJSON(
+            NotificationSerializer, FastNotificationSerializer,
+            Notification.objects.filter(user__username__startswith=self.prefix)
+        )
+
+
+@unittest.skipIf(renderers.orjson is None, 'orjson is not installed')
+class RendererParityTests(TestCase):
+    """OrjsonRenderer renders the same documents as DRF's JSONRenderer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.prefix = generate_benchmark_data(20)
+
+    def assertSameDocument(self, data):
+        expected = json.loads(JSONRenderer().render(data))
+        self.assertEqual(json.loads(renderers.OrjsonRenderer().render(data)), expected)
+
+    def test_bookings(self):
+        bookings = Booking.objects.filter(client__username__startswith=self.prefix)
+        self.assertSameDocument({
+            'next': None,
+            'results': FastBookingSerializer.serialize(FastBookingSerializer.project(bookings)),
+        })
+
+    def test_slots(self):
+        provider = Provider.objects.filter(user__username__startswith=self.prefix).first()
+        booking_date = timezone.localdate() + timedelta(days=1)
+        while booking_date.strftime('%A').lower() not in provider.working_days:
+            booking_date += timedelta(days=1)
+        slots = [{'time': slot, 'available': True} for slot in provider.get_available_slots(booking_date)]
+        self.assertTrue(slots)
+        self.assertSameDocument({
+            'provider_id': provider.id,
+            'date': booking_date.strftime('%Y-%m-%d'),
+            'slots': TimeSlotSerializer(slots, many=True).data,
+        })
@@ -16,9 +16,12 @@ urlpatterns = [
     path('providers/', views.ProviderListView.as_view(), name='provider-list'),
     path('providers/<int:pk>/', views.ProviderDetailView.as_view(), name='provider-detail'),
     path('providers/<int:provider_id>/slots/', views.available_slots, name='available-slots'),
+    path('providers/<int:provider_id>/holds/', views.create_slot_hold, name='create-slot-hold'),
+    path('holds/<str:token>/', views.release_slot_hold, name='release-slot-hold'),
     
     # Booking endpoints
     path('bookings/', views.BookingListView.as_view(), name='booking-list'),
+    path('bookings/bulk/', views.bulk_booking_action, name='booking-bulk'),
     path('bookings/<int:pk>/', views.BookingDetailView.as_view(), name='booking-detail'),
     path('bookings/<int:booking_id>/cancel/', views.cancel_booking, name='cancel-booking'),
     
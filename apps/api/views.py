@@ -3,13 +3,28 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from datetime import date, timedelta
 from apps.services.models import Service, Provider
+from apps.services.cache import cache_catalogue_response
 from apps.bookings.models import Booking, Notification
+from apps.bookings.notification_service import NotificationService
+from apps.bookings.booking_service import BookingService
+from apps.bookings.reservation_service import ReservationService, SlotUnavailable, HoldInvalid
+from queue_management.replicas import replica_reads
+from . import conditional
+from .mixins import QueryBudgetMixin, QueryPlanViewMixin
+from .fast_serializers import (
+    FastListMixin, FastBookingSerializer, FastProviderListSerializer, FastNotificationSerializer
+)
+from .pagination import BookingPagination, NotificationPagination
 from .serializers import (
     UserSerializer, ServiceSerializer, ProviderSerializer, ProviderListSerializer,
-    BookingSerializer, BookingCreateSerializer, TimeSlotSerializer, NotificationSerializer
+    BookingSerializer, BookingCreateSerializer, BulkBookingActionSerializer, SlotHoldSerializer,
+    TimeSlotSerializer, NotificationSerializer
 )
 
 User = get_user_model()
@@ -94,20 +109,36 @@ def telegram_login(request):
         return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class ServiceListView(generics.ListAPIView):
+@method_decorator(replica_reads, name='dispatch')
+@method_decorator(condition(
+    etag_func=conditional.etag_func(conditional.service_list_version),
+    last_modified_func=conditional.last_modified_func(conditional.service_list_version),
+), name='get')
+@method_decorator(cache_catalogue_response, name='dispatch')
+class ServiceListView(QueryBudgetMixin, generics.ListAPIView):
     """List all active services"""
     
     queryset = Service.objects.filter(is_active=True)
     serializer_class = ServiceSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = {'GET': 4}
 
 
-class ProviderListView(generics.ListAPIView):
+@method_decorator(replica_reads, name='dispatch')
+@method_decorator(condition(
+    etag_func=conditional.etag_func(conditional.provider_list_version),
+    last_modified_func=conditional.last_modified_func(conditional.provider_list_version),
+), name='get')
+@method_decorator(cache_catalogue_response, name='dispatch')
+class ProviderListView(QueryBudgetMixin, FastListMixin, QueryPlanViewMixin, generics.ListAPIView):
     """List all providers"""
     
-    queryset = Provider.objects.filter(is_accepting=True).select_related('user', 'service')
+    queryset = Provider.objects.filter(is_accepting=True)
     serializer_class = ProviderListSerializer
+    fast_serializer_class = FastProviderListSerializer
     permission_classes = [permissions.AllowAny]
+    sparse_fieldsets = True
+    query_budget = {'GET': 4}
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -117,32 +148,40 @@ class ProviderListView(generics.ListAPIView):
         return queryset
 
 
-class ProviderDetailView(generics.RetrieveAPIView):
+@method_decorator(replica_reads, name='dispatch')
+@method_decorator(condition(
+    etag_func=conditional.etag_func(conditional.provider_detail_version),
+    last_modified_func=conditional.last_modified_func(conditional.provider_detail_version),
+), name='get')
+class ProviderDetailView(QueryBudgetMixin, QueryPlanViewMixin, generics.RetrieveAPIView):
     """Provider detail view"""
     
-    queryset = Provider.objects.select_related('user', 'service')
+    queryset = Provider.objects.all()
     serializer_class = ProviderSerializer
     permission_classes = [permissions.AllowAny]
+    sparse_fieldsets = True
+    query_budget = {'GET': 4}
 
 
-class BookingListView(generics.ListCreateAPIView):
+class BookingListView(QueryBudgetMixin, FastListMixin, QueryPlanViewMixin, generics.ListCreateAPIView):
     """List and create bookings"""
     
     serializer_class = BookingSerializer
+    fast_serializer_class = FastBookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = BookingPagination
+    sparse_fieldsets = True
+    query_budget = {'GET': 4}
     
     def get_queryset(self):
+        # Joins and annotations come from BookingSerializer's query plan
         user = self.request.user
         if user.is_provider():
             # Providers see bookings for their services
-            return Booking.objects.filter(
-                provider__user=user
-            ).select_related('client', 'provider__user', 'provider__service')
+            return Booking.objects.filter(provider__user=user)
         else:
             # Clients see their own bookings
-            return Booking.objects.filter(
-                client=user
-            ).select_related('client', 'provider__user', 'provider__service')
+            return Booking.objects.filter(client=user)
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -150,14 +189,35 @@ class BookingListView(generics.ListCreateAPIView):
         return BookingSerializer
     
     def perform_create(self, serializer):
-        serializer.save(client=self.request.user)
+        data = serializer.validated_data
+        slot = {'provider_id': data['provider_id'], 'date': data['date'], 'time': data['time']}
+        try:
+            if data.get('hold_token'):
+                booking = ReservationService.convert_hold(
+                    self.request.user, data['hold_token'], data.get('notes', ''), **slot
+                )
+            else:
+                provider = Provider.objects.get(id=data['provider_id'])
+                booking = ReservationService.book(
+                    self.request.user, provider, data['date'], data['time'], data.get('notes', '')
+                )
+        except SlotUnavailable:
+            raise ValidationError("This time slot is already booked")
+        except HoldInvalid:
+            raise ValidationError("Slot hold has expired or is invalid")
+        except ValueError as e:
+            # Booking.save() validation
+            raise ValidationError(str(e))
+        serializer.instance = booking
 
 
-class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BookingDetailView(QueryBudgetMixin, QueryPlanViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """Booking detail view"""
     
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    sparse_fieldsets = True
+    query_budget = {'GET': 3}
     
     def get_queryset(self):
         user = self.request.user
@@ -166,29 +226,52 @@ class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
         else:
             return Booking.objects.filter(client=user)
     
+    def perform_update(self, serializer):
+        """Move the booking through ReservationService, then save the rest"""
+        booking = serializer.instance
+        data = serializer.validated_data
+        try:
+            with transaction.atomic():
+                if data.get('provider_id', booking.provider_id) == booking.provider_id:
+                    ReservationService.reschedule(
+                        booking, data.get('date', booking.date), data.get('time', booking.time)
+                    )
+                serializer.save()
+        except (SlotUnavailable, IntegrityError):
+            raise ValidationError("This time slot is already booked")
+        except ValueError as e:
+            # Booking.save() validation
+            raise ValidationError(str(e))
+    
     def perform_destroy(self, instance):
         """Cancel booking instead of deleting"""
         if instance.can_be_cancelled():
-            instance.status = 'cancelled'
-            instance.save()
+            instance.transition_to('cancelled')
         else:
             raise ValidationError("Cannot cancel this booking")
 
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(QueryBudgetMixin, FastListMixin, QueryPlanViewMixin, generics.ListAPIView):
     """List user notifications"""
     
     serializer_class = NotificationSerializer
+    fast_serializer_class = FastNotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationPagination
+    sparse_fieldsets = True
+    query_budget = {'GET': 4}
     
     def get_queryset(self):
+        # Ordering by (sent_at, id) is applied by the pagination class
         return Notification.objects.filter(
             user=self.request.user
-        ).order_by('-sent_at')
+        )
 
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@condition(etag_func=conditional.etag_func(conditional.available_slots_version))
 def available_slots(request, provider_id):
     """Get available time slots for a provider on a specific date"""
     
@@ -229,6 +312,74 @@ def available_slots(request, provider_id):
     return Response(serializer.data)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def create_slot_hold(request, provider_id):
+    """Hold a provider's time slot while the client confirms the booking"""
+    
+    try:
+        provider = Provider.objects.get(id=provider_id, is_accepting=True)
+    except Provider.DoesNotExist:
+        return Response(
+            {'error': 'Provider not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    serializer = SlotHoldSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        hold = ReservationService.acquire_hold(
+            request.user, provider,
+            serializer.validated_data['date'],
+            serializer.validated_data['time']
+        )
+    except SlotUnavailable:
+        return Response(
+            {'error': 'This time slot is already booked'}, 
+            status=status.HTTP_409_CONFLICT
+        )
+    except ValueError as e:
+        return Response(
+            {'error': str(e)}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(SlotHoldSerializer(hold).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def release_slot_hold(request, token):
+    """Release a slot hold"""
+    
+    if not ReservationService.release_hold(request.user, token):
+        return Response(
+            {'error': 'Hold not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_booking_action(request):
+    """Confirm, complete or cancel many bookings at once (for providers)"""
+    
+    if not request.user.is_provider():
+        return Response(
+            {'error': 'Only providers can update bookings in bulk'}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    serializer = BulkBookingActionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    result = BookingService.bulk_transition(
+        request.user,
+        serializer.validated_data['ids'],
+        serializer.validated_data['action']
+    )
+    return Response(result)
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def cancel_booking(request, booking_id):
@@ -251,16 +402,15 @@ def cancel_booking(request, booking_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        booking.status = 'cancelled'
-        booking.save()
+        booking.transition_to('cancelled')
         
         # Create notification
-        Notification.objects.create(
-            user=booking.client,
+        NotificationService.notify(
+            booking.client,
+            'booking_cancelled',
+            NotificationService.booking_params(booking),
             booking=booking,
-            type='booking_cancelled',
-            title='Booking Cancelled',
-            message=f'Your booking with {booking.provider.user.full_name} on {booking.date} at {booking.time} has been cancelled.'
+            locale='en'
         )
         
         return Response({'message': 'Booking cancelled successfully'})
@@ -272,6 +422,7 @@ def cancel_booking(request, booking_id):
         )
 
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def dashboard_stats(request):
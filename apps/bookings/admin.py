@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils import timezone
-from .models import Booking, Notification
+from .models import Booking, Notification, NotificationArchive, SlotHold
 
 
 @admin.register(Booking)
@@ -58,9 +58,11 @@ class BookingAdmin(admin.ModelAdmin):
 class NotificationAdmin(admin.ModelAdmin):
     """Admin configuration for Notification model"""
     
-    list_display = ('user', 'type', 'title', 'is_read', 'sent_at')
+    list_display = ('user', 'type', 'display_title', 'is_read', 'sent_at')
     list_filter = ('type', 'is_read', 'sent_at')
-    search_fields = ('user__username', 'user__first_name', 'user__last_name', 'title', 'message')
+    # title/message are blank for template-rendered rows
+    search_fields = ('user__username', 'user__first_name', 'user__last_name', 'template_key',
+                    'booking__provider__user__username', 'booking__provider__service__name')
     ordering = ('-sent_at',)
     date_hierarchy = 'sent_at'
     
@@ -68,6 +70,10 @@ class NotificationAdmin(admin.ModelAdmin):
         ('Notification Details', {
             'fields': ('user', 'booking', 'type', 'title', 'message', 'is_read')
         }),
+        ('Template', {
+            'fields': ('template_key', 'locale', 'params'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('sent_at',),
             'classes': ('collapse',)
@@ -76,6 +82,40 @@ class NotificationAdmin(admin.ModelAdmin):
     
     readonly_fields = ('sent_at',)
     
+    def display_title(self, obj):
+        """Display rendered notification title"""
+        return obj.get_title()
+    display_title.short_description = 'Title'
+    
     def get_queryset(self, request):
         """Optimize queryset"""
-        return super().get_queryset(request).select_related('user', 'booking')
\ No newline at end of file
+        return super().get_queryset(request).select_related('user', 'booking')
+
+
+@admin.register(SlotHold)
+class SlotHoldAdmin(admin.ModelAdmin):
+    """Admin for slot holds"""
+    
+    list_display = ('provider', 'user', 'date', 'time', 'expires_at')
+    list_filter = ('date',)
+    search_fields = ('user__username', 'provider__user__username')
+    readonly_fields = ('token', 'created_at')
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'provider__user', 'provider__service')
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    """Read-only admin for archived notifications"""
+    
+    list_display = ('original_id', 'user_id', 'type', 'is_sent', 'sent_at', 'archived_at')
+    list_filter = ('type', 'is_sent')
+    search_fields = ('user_id', 'original_id', 'template_key')
+    ordering = ('-sent_at',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,4 +4,10 @@ from django.apps import AppConfig
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.bookings'
-    verbose_name = 'Bookings'
\ No newline at end of file
+    verbose_name = 'Bookings'
+    
+    def ready(self):
+        # Register the notification metrics so /monitoring/metrics/ lists them
+        from . import metrics  # noqa: F401
+        from .task_queue import warn_if_not_durable
+        warn_if_not_durable()
\ No newline at end of file
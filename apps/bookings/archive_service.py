@@ -0,0 +1,140 @@
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Notification, NotificationArchive
+
+logger = logging.getLogger(__name__)
+
+# Columns copied from the notifications table into the archive
+ARCHIVE_FIELDS = [
+    'id', 'user_id', 'booking_id', 'type', 'title', 'message',
+    'template_key', 'locale', 'params', 'is_read', 'is_sent',
+    'sent_at', 'scheduled_for', 'sent_via', 'telegram_message_id',
+]
+
+
+class NotificationArchiveService:
+    """Moves old notifications out of the hot notifications table"""
+
+    @staticmethod
+    def archivable_notifications(older_than):
+        """Notifications that are finished and older than the cutoff"""
+        return Notification.objects.filter(
+            sent_at__lt=older_than
+        ).filter(
+            # Sent reminders, immediate (unscheduled) notifications and
+            # reminders whose send time is long gone
+            Q(is_sent=True) | Q(scheduled_for__isnull=True) | Q(scheduled_for__lt=older_than)
+        )
+
+    @staticmethod
+    def archive_notifications(days=None, batch_size=1000, destination='table',
+                              output_dir=None, pause=0, dry_run=False):
+        """Archive notifications older than `days` in chunks.
+
+        Each chunk is copied and deleted in its own short transaction, so
+        the notifications table is never locked for the whole run. For
+        the jsonl destination each chunk is a complete gzip member, synced
+        to disk before its rows are deleted.
+        Returns a dict with the number of archived rows, elapsed seconds
+        and rows/sec.
+        """
+        if days is None:
+            days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+        cutoff = timezone.now() - timedelta(days=days)
+        queryset = NotificationArchiveService.archivable_notifications(cutoff)
+
+        if dry_run:
+            return {'archived': queryset.count(), 'seconds': 0.0, 'rows_per_sec': 0.0, 'dry_run': True}
+
+        # Opened with the first chunk, so a run with nothing to archive
+        # leaves no empty file behind
+        writer = None
+
+        started = time.monotonic()
+        archived = 0
+        last_id = 0
+        try:
+            while True:
+                ids = list(
+                    queryset.filter(id__gt=last_id)
+                    .order_by('id')
+                    .values_list('id', flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                last_id = ids[-1]
+
+                with transaction.atomic():
+                    rows = list(Notification.objects.filter(id__in=ids).values(*ARCHIVE_FIELDS))
+                    if destination == 'jsonl':
+                        Notification.objects.filter(id__in=ids).delete()
+                        # Written last: the delete only commits once the
+                        # rows are on disk, and a failed write rolls it back
+                        if writer is None:
+                            writer = NotificationArchiveService._open_jsonl(output_dir)
+                        NotificationArchiveService._write_jsonl(writer, rows)
+                    else:
+                        NotificationArchive.objects.bulk_create(
+                            [NotificationArchiveService._to_archive(row) for row in rows],
+                            ignore_conflicts=True
+                        )
+                        Notification.objects.filter(id__in=ids).delete()
+
+                archived += len(rows)
+                logger.info(f"Archived {archived} notifications (up to id {last_id})")
+                if pause:
+                    time.sleep(pause)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        seconds = time.monotonic() - started
+        return {
+            'archived': archived,
+            'seconds': seconds,
+            'rows_per_sec': archived / seconds if seconds else 0.0,
+            'dry_run': False,
+        }
+
+    @staticmethod
+    def _to_archive(row):
+        row = dict(row)
+        row['original_id'] = row.pop('id')
+        return NotificationArchive(**row)
+
+    @staticmethod
+    def _write_jsonl(writer, rows):
+        """Append rows as one gzip member and sync it to disk"""
+        lines = ''.join(
+            json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in rows
+        )
+        position = writer.tell()
+        try:
+            writer.write(gzip.compress(lines.encode('utf-8')))
+            writer.flush()
+            os.fsync(writer.fileno())
+        except BaseException:
+            # The rows stay in the table; drop their partial member
+            writer.truncate(position)
+            raise
+
+    @staticmethod
+    def _open_jsonl(output_dir):
+        """Open a new gzip-compressed JSONL file for this run"""
+        output_dir = Path(output_dir or getattr(
+            settings, 'NOTIFICATION_ARCHIVE_DIR', settings.BASE_DIR / 'archive'
+        ))
+        output_dir.mkdir(parents=True, exist_ok=True)
+        filename = f"notifications-{timezone.now().strftime('%Y%m%d-%H%M%S')}.jsonl.gz"
+        # Concatenated gzip members read back as one stream (gzip.open, zcat)
+        return open(output_dir / filename, 'ab')
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.utils import timezone
+from .models import Booking
+from .notification_service import NotificationService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BookingService:
+    """Service for booking status changes made by providers"""
+
+    # action -> (statuses it applies to, new status, client notification template, error)
+    TRANSITIONS = {
+        'confirm': (['pending'], 'confirmed', 'booking_confirmed', 'Booking is not pending'),
+        'complete': (['confirmed', 'active'], 'completed', 'booking_completed', 'Booking cannot be completed'),
+        'cancel': (['pending', 'confirmed', 'active'], 'cancelled', 'booking_cancelled', 'Cannot cancel this booking'),
+    }
+
+    MAX_BULK_IDS = 500
+
+    @staticmethod
+    def bulk_transition(provider_user, booking_ids, action):
+        """Change the status of many of a provider's bookings at once.
+
+        Runs in one transaction: the bookings are locked and read in one
+        query and updated with one UPDATE; the client notifications are
+        inserted with one bulk_create after commit, off the request path.
+        Booking.save() is bypassed because a status change needs neither
+        its validation nor rescheduling.
+
+        Returns {'action', 'updated', 'results'} where results has one
+        entry per requested id, in request order.
+        """
+        if action not in BookingService.TRANSITIONS:
+            raise ValueError(f"Unknown booking action: {action}")
+        allowed, new_status, template_key, error = BookingService.TRANSITIONS[action]
+
+        # Drop duplicates, keep request order
+        booking_ids = list(dict.fromkeys(booking_ids))
+
+        with transaction.atomic():
+            bookings = {
+                booking.id: booking
+                for booking in Booking.objects.select_for_update(of=('self',)).filter(
+                    id__in=booking_ids,
+                    provider__user=provider_user
+                ).select_related('client', 'provider__user')
+            }
+
+            results = []
+            changed = []
+            for booking_id in booking_ids:
+                booking = bookings.get(booking_id)
+                if booking is None:
+                    results.append({'id': booking_id, 'success': False, 'error': 'Booking not found'})
+                elif booking.status not in allowed:
+                    results.append({'id': booking_id, 'success': False, 'error': error, 'status': booking.status})
+                else:
+                    changed.append(booking)
+                    results.append({'id': booking_id, 'success': True, 'status': new_status})
+
+            if changed:
+                now = timezone.now()
+                changed_ids = [booking.id for booking in changed]
+                # updated_at is set explicitly: update() skips auto_now
+                Booking.objects.filter(id__in=changed_ids).update(status=new_status, updated_at=now)
+
+                if new_status in Booking.FINAL_STATUSES:
+                    NotificationService.emit('bookings_finished', changed_ids)
+
+                notifications = []
+                for booking in changed:
+                    booking.status = new_status
+                    booking.updated_at = now
+                    params = {} if template_key == 'booking_completed' else NotificationService.booking_params(booking)
+                    notifications.append(NotificationService.build_notification(
+                        booking.client, template_key, params, booking=booking
+                    ))
+                NotificationService.notify_many(notifications)
+
+        logger.info(f"Bulk {action} by {provider_user.username}: {len(changed)}/{len(booking_ids)} bookings updated")
+        return {'action': action, 'updated': len(changed), 'results': results}
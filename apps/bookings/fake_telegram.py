@@ -0,0 +1,208 @@
+"""
+Local stand-in for the Telegram Bot API.
+
+Serves ``/bot<token>/<method>`` like api.telegram.org so TelegramService,
+setup_webhook and the aiogram bot can run offline: point
+settings.TELEGRAM_API_BASE_URL (TELEGRAM_API_BASE_URL for the bot) at
+``server.url``. Responses can be slowed down and made to fail:
+
+- ``latency`` / ``jitter``: seconds added to every request
+- ``rate_limit``: messages per second accepted before answering 429
+  with ``retry_after``, like Telegram's flood control
+- ``throttle_rate``: share of sends answered 429 at random
+- ``failure_rate``: share of sends answered 500
+
+Every accepted sendMessage is recorded. ``GET /fake/messages`` returns
+them, ``GET /fake/stats`` the counters and ``POST /fake/reset`` clears
+both. Use as a context manager or run the fake_telegram_server command.
+"""
+
+import json
+import random
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEND_METHODS = {'sendMessage', 'sendPhoto', 'sendDocument', 'editMessageText'}
+
+
+class FakeTelegramServer:
+    """Threaded fake Bot API server"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, rate_limit=None,
+                 retry_after=1, throttle_rate=0.0, failure_rate=0.0, record_path=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.record_path = record_path
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.url = f'http://{host}:{self.server.server_port}'
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def reset(self):
+        with self.lock:
+            self.messages = []
+            self.stats = {'requests': 0, 'sent': 0, 'throttled': 0, 'failed': 0}
+            self.window_start = time.monotonic()
+            self.window_count = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {'stats': dict(self.stats), 'messages': list(self.messages)}
+
+    def _throttled(self):
+        """True when this send is over the rate limit or randomly throttled"""
+        with self.lock:
+            if self.throttle_rate and self.rng.random() < self.throttle_rate:
+                return True
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self.window_start >= 1:
+                    self.window_start, self.window_count = now, 0
+                if self.window_count >= self.rate_limit:
+                    return True
+                self.window_count += 1
+            return False
+
+    def handle_method(self, token, method, params):
+        """Returns (HTTP status, response body) for a Bot API call"""
+        with self.lock:
+            self.stats['requests'] += 1
+
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+
+        if method in SEND_METHODS:
+            if self._throttled():
+                with self.lock:
+                    self.stats['throttled'] += 1
+                return 429, {
+                    'ok': False,
+                    'error_code': 429,
+                    'description': f'Too Many Requests: retry after {self.retry_after}',
+                    'parameters': {'retry_after': self.retry_after},
+                }
+            with self.lock:
+                failed = self.failure_rate and self.rng.random() < self.failure_rate
+                if failed:
+                    self.stats['failed'] += 1
+            if failed:
+                return 500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'}
+            return 200, {'ok': True, 'result': self._record(token, method, params)}
+
+        if method == 'getMe':
+            return 200, {'ok': True, 'result': {
+                'id': 1, 'is_bot': True, 'first_name': 'Fake bot', 'username': 'fake_bot',
+            }}
+        if method == 'getUpdates':
+            # Long polling: nothing ever arrives
+            time.sleep(min(float(params.get('timeout') or 0), 1.0))
+            return 200, {'ok': True, 'result': []}
+        # setWebhook, deleteWebhook, answerCallbackQuery, ...
+        return 200, {'ok': True, 'result': True}
+
+    def _record(self, token, method, params):
+        with self.lock:
+            self.stats['sent'] += 1
+            message = {
+                'message_id': self.stats['sent'],
+                'date': int(time.time()),
+                'chat': {'id': params.get('chat_id')},
+                'text': params.get('text', ''),
+            }
+            self.messages.append({'token': token, 'method': method, 'params': params})
+            if self.record_path:
+                with open(self.record_path, 'a', encoding='utf-8') as record:
+                    record.write(json.dumps({'method': method, 'params': params}, ensure_ascii=False) + '\n')
+        return message
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self.dispatch()
+
+            def do_POST(self):
+                self.dispatch()
+
+            def dispatch(self):
+                path, _, query = self.path.partition('?')
+                params = dict(parse_qsl(query))
+                params.update(self.read_params())
+
+                if path == '/fake/messages':
+                    return self.reply(200, fake.snapshot()['messages'])
+                if path == '/fake/stats':
+                    return self.reply(200, fake.snapshot()['stats'])
+                if path == '/fake/reset':
+                    fake.reset()
+                    return self.reply(200, {'ok': True})
+
+                parts = path.strip('/').split('/')
+                if len(parts) != 2 or not parts[0].startswith('bot'):
+                    return self.reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+                status, body = fake.handle_method(parts[0][3:], parts[1], params)
+                self.reply(status, body)
+
+            def read_params(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if not length:
+                    return {}
+                body = self.rfile.read(length)
+                content_type = self.headers.get('Content-Type', '')
+                if content_type.startswith('application/json'):
+                    return json.loads(body or b'{}')
+                if content_type.startswith('multipart/form-data'):
+                    message = BytesParser().parsebytes(
+                        f'Content-Type: {content_type}\r\n\r\n'.encode() + body
+                    )
+                    return {
+                        part.get_param('name', header='content-disposition'): part.get_payload(decode=True).decode()
+                        for part in message.get_payload()
+                    }
+                return dict(parse_qsl(body.decode()))
+
+            def reply(self, status, data):
+                body = json.dumps(data, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
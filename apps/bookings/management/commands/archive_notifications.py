@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from apps.bookings import metrics
+from apps.bookings.archive_service import NotificationArchiveService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Move old notifications into the archive table or compressed JSONL files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90),
+            help='Archive notifications older than this many days (default: NOTIFICATION_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of notifications moved per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--destination',
+            choices=['table', 'jsonl'],
+            default='table',
+            help='Archive into the notifications_archive table or gzip JSONL files (default: table)',
+        )
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            help='Directory for JSONL archives (default: NOTIFICATION_ARCHIVE_DIR)',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches to leave room for other writers',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the notifications that would be archived',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with metrics.track_job('archive_notifications'):
+                result = NotificationArchiveService.archive_notifications(
+                    days=options['days'],
+                    batch_size=options['batch_size'],
+                    destination=options['destination'],
+                    output_dir=options['output_dir'],
+                    pause=options['pause'],
+                    dry_run=options['dry_run'],
+                )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Notification archiving failed: {e}'))
+            logger.error(f'Notification archiving failed: {e}')
+            return
+
+        if result['dry_run']:
+            self.stdout.write(f"Would archive {result['archived']} notifications older than {options['days']} days")
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {result['archived']} notifications in {result['seconds']:.2f}s "
+                f"({result['rows_per_sec']:.0f} rows/sec)"
+            )
+        )
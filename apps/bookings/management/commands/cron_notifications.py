@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from apps.bookings import metrics
+from apps.monitoring.profiling import ProfileCommandMixin
 from apps.bookings.notification_service import NotificationService
 from apps.bookings.models import Booking, Notification
 from apps.services.models import Provider
@@ -9,16 +11,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(ProfileCommandMixin, BaseCommand):
     help = 'Cron job to send notifications - run every 5 minutes'
     
     def handle(self, *args, **options):
         try:
-            # Send pending notifications
-            self.send_pending_notifications()
-            
-            # Schedule notifications for upcoming bookings
-            self.schedule_upcoming_notifications()
+            with metrics.track_job('cron_notifications'):
+                # Send pending notifications
+                self.send_pending_notifications()
+                
+                # Schedule notifications for upcoming bookings
+                self.schedule_upcoming_notifications()
             
             self.stdout.write(self.style.SUCCESS('Notification cron job completed successfully'))
             
@@ -29,24 +32,31 @@ class Command(BaseCommand):
     def send_pending_notifications(self):
         """Send all pending notifications that are due"""
         now = timezone.now()
-        pending_notifications = Notification.objects.filter(
+        pending_notifications = list(Notification.objects.filter(
             is_sent=False,
             scheduled_for__lte=now
-        )
+        ))
+        metrics.record_due(pending_notifications, now)
         
         sent_count = 0
         failed_count = 0
+        unsent = []
         
         for notification in pending_notifications:
             try:
-                NotificationService._send_notification(notification)
+                if not NotificationService._send_notification(notification):
+                    unsent.append(notification)
                 sent_count += 1
-                self.stdout.write(f"Sent notification: {notification.title}")
+                self.stdout.write(f"Sent notification: {notification.get_title()}")
             except Exception as e:
                 failed_count += 1
+                unsent.append(notification)
+                metrics.notifications_failed.inc(type=notification.type, error=type(e).__name__)
                 self.stdout.write(f"Failed to send notification {notification.id}: {e}")
                 logger.error(f"Failed to send notification {notification.id}: {e}")
         
+        metrics.record_due(unsent)
+        
         if sent_count > 0 or failed_count > 0:
             self.stdout.write(f"Sent {sent_count} notifications, {failed_count} failed")
     
@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.bookings.fake_telegram import FakeTelegramServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local fake Telegram Bot API server for offline load and integration tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            default='127.0.0.1',
+            help='Address to listen on (default: 127.0.0.1)',
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8081,
+            help='Port to listen on (default: 8081)',
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.0,
+            help='Seconds added to every request (default: 0)',
+        )
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=0.0,
+            help='Random +/- seconds around --latency (default: 0)',
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=int,
+            help='Messages per second accepted before answering 429 (default: unlimited)',
+        )
+        parser.add_argument(
+            '--retry-after',
+            type=int,
+            default=1,
+            help='retry_after seconds sent with 429 responses (default: 1)',
+        )
+        parser.add_argument(
+            '--throttle-rate',
+            type=float,
+            default=0.0,
+            help='Share of sends answered 429 at random, 0-1 (default: 0)',
+        )
+        parser.add_argument(
+            '--failure-rate',
+            type=float,
+            default=0.0,
+            help='Share of sends answered 500, 0-1 (default: 0)',
+        )
+        parser.add_argument(
+            '--record',
+            help='Append accepted messages to this JSONL file',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed for jitter, throttling and failures',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('throttle_rate', 'failure_rate'):
+            if not 0 <= options[name] <= 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be between 0 and 1")
+
+        server = FakeTelegramServer(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            rate_limit=options['rate_limit'],
+            retry_after=options['retry_after'],
+            throttle_rate=options['throttle_rate'],
+            failure_rate=options['failure_rate'],
+            record_path=options['record'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Fake Telegram Bot API listening on {server.url}'))
+        self.stdout.write(f'Set TELEGRAM_API_BASE_URL={server.url}; stats at {server.url}/fake/stats')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            stats = server.snapshot()['stats']
+            self.stdout.write(
+                f"\nStopped: {stats['requests']} requests, {stats['sent']} sent, "
+                f"{stats['throttled']} throttled, {stats['failed']} failed"
+            )
+        finally:
+            server.server.server_close()
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from apps.bookings import metrics
+from apps.monitoring.profiling import ProfileCommandMixin
 from apps.bookings.notification_service import NotificationService
 from apps.bookings.models import Booking
 from datetime import date, timedelta
@@ -8,7 +10,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(ProfileCommandMixin, BaseCommand):
     help = 'Schedule notifications for all existing bookings'
     
     def add_arguments(self, parser):
@@ -24,6 +26,7 @@ class Command(BaseCommand):
             help='Show what would be done without actually scheduling notifications',
         )
     
+    @metrics.track_job('schedule_all_notifications')
     def handle(self, *args, **options):
         days_ahead = options['days_ahead']
         dry_run = options['dry_run']
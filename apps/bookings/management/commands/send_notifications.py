@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from apps.bookings import metrics
+from apps.monitoring.profiling import ProfileCommandMixin
 from apps.bookings.notification_service import NotificationService
 from apps.bookings.models import Booking, Notification
 from apps.services.models import Provider
@@ -9,7 +11,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(ProfileCommandMixin, BaseCommand):
     help = 'Send pending notifications and schedule new ones'
     
     def add_arguments(self, parser):
@@ -25,38 +27,47 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No notifications will be sent'))
         
-        # Send pending notifications
-        self.send_pending_notifications(dry_run)
-        
-        # Schedule new notifications for today's bookings
-        self.schedule_today_notifications(dry_run)
-        
-        # Schedule provider notifications
-        self.schedule_provider_notifications(dry_run)
+        with metrics.track_job('send_notifications'):
+            # Send pending notifications
+            self.send_pending_notifications(dry_run)
+            
+            # Schedule new notifications for today's bookings
+            self.schedule_today_notifications(dry_run)
+            
+            # Schedule provider notifications
+            self.schedule_provider_notifications(dry_run)
     
     def send_pending_notifications(self, dry_run):
         """Send all pending notifications that are due"""
         now = timezone.now()
-        pending_notifications = Notification.objects.filter(
+        pending_notifications = list(Notification.objects.filter(
             is_sent=False,
             scheduled_for__lte=now
-        )
+        ))
+        metrics.record_due(pending_notifications, now)
         
-        self.stdout.write(f"Found {pending_notifications.count()} pending notifications")
+        self.stdout.write(f"Found {len(pending_notifications)} pending notifications")
         
+        unsent = []
         for notification in pending_notifications:
             if dry_run:
-                self.stdout.write(f"Would send: {notification.title} to {notification.user.telegram_username}")
+                self.stdout.write(f"Would send: {notification.get_title()} to {notification.user.telegram_username}")
             else:
                 try:
-                    NotificationService._send_notification(notification)
+                    if not NotificationService._send_notification(notification):
+                        unsent.append(notification)
                     self.stdout.write(
-                        self.style.SUCCESS(f"Sent: {notification.title} to {notification.user.telegram_username}")
+                        self.style.SUCCESS(f"Sent: {notification.get_title()} to {notification.user.telegram_username}")
                     )
                 except Exception as e:
+                    unsent.append(notification)
+                    metrics.notifications_failed.inc(type=notification.type, error=type(e).__name__)
                     self.stdout.write(
-                        self.style.ERROR(f"Failed to send {notification.title}: {e}")
+                        self.style.ERROR(f"Failed to send {notification.get_title()}: {e}")
                     )
+        
+        if not dry_run:
+            metrics.record_due(unsent)
     
     def schedule_today_notifications(self, dry_run):
         """Schedule notifications for today's bookings"""
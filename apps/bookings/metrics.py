@@ -0,0 +1,110 @@
+"""
+Metrics of the notification pipeline, served on /monitoring/metrics/.
+
+Everything is recorded by the code doing the work, so a scrape only reads
+the cache (see apps/monitoring/metrics.py) and never counts rows:
+
+- NotificationService: reminders scheduled and cancelled, sends and
+  failures by error class, send time and lateness against scheduled_for.
+  Each send pass sets the due gauges from the rows it has loaded anyway.
+- TelegramService: Bot API call latency, responses by status, 429s.
+- Commands and Celery tasks (track_job): runs, duration and the time of
+  the last successful run, to alert on a sender that stopped.
+"""
+
+import time
+from contextlib import contextmanager
+from django.utils import timezone
+from apps.monitoring.metrics import Counter, Gauge, Histogram, registry
+
+LATENESS_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 21600)
+
+notifications_scheduled = Counter(
+    'notifications_scheduled_total', 'Scheduled notifications created', ['type'],
+)
+notifications_cancelled = Counter(
+    'notifications_cancelled_total', 'Unsent notifications deleted because their booking changed or ended',
+)
+notifications_sent = Counter(
+    'notifications_sent_total', 'Notifications delivered', ['type'],
+)
+notifications_failed = Counter(
+    'notifications_failed_total', 'Notification sends that failed, by error class', ['type', 'error'],
+)
+notification_send_duration = Histogram(
+    'notification_send_duration_seconds', 'Time to deliver one notification, retries included', ['type'],
+)
+notification_lateness = Histogram(
+    'notification_lateness_seconds', 'Delay between scheduled_for and delivery', ['type'],
+    buckets=LATENESS_BUCKETS,
+)
+notifications_due = Gauge(
+    'notifications_due', 'Unsent notifications past scheduled_for, as of the last send pass',
+)
+notifications_due_oldest = Gauge(
+    'notifications_due_oldest_seconds', 'Age of the oldest due unsent notification, as of the last send pass',
+)
+
+telegram_request_duration = Histogram(
+    'telegram_request_duration_seconds', 'Bot API call latency', ['method'],
+)
+telegram_responses = Counter(
+    'telegram_responses_total', 'Bot API responses by HTTP status', ['method', 'status'],
+)
+telegram_rate_limited = Counter(
+    'telegram_rate_limited_total', 'Bot API calls answered 429 Too Many Requests', ['method'],
+)
+telegram_send_failures = Counter(
+    'telegram_send_failures_total', 'Messages that could not be sent, by error class', ['error'],
+)
+
+job_runs = Counter(
+    'notification_job_runs_total', 'Runs of notification commands and tasks', ['job', 'status'],
+)
+job_duration = Histogram(
+    'notification_job_duration_seconds', 'Duration of notification commands and tasks', ['job'],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 900),
+)
+job_last_success = Gauge(
+    'notification_job_last_success_timestamp_seconds', 'Unix time of the last successful run', ['job'],
+)
+
+
+def record_due(notifications, now=None):
+    """Set the due gauges from the unsent notifications past scheduled_for"""
+    now = now or timezone.now()
+    oldest = min((notification.scheduled_for for notification in notifications), default=None)
+    notifications_due.set(len(notifications))
+    notifications_due_oldest.set((now - oldest).total_seconds() if oldest else 0)
+
+
+def record_sent(notification, seconds):
+    """Count a delivered notification and how late it went out"""
+    notifications_sent.inc(type=notification.type)
+    notification_send_duration.observe(seconds, type=notification.type)
+    if notification.scheduled_for and notification.sent_at:
+        lateness = (notification.sent_at - notification.scheduled_for).total_seconds()
+        notification_lateness.observe(max(lateness, 0), type=notification.type)
+
+
+def record_scheduled(notifications):
+    """Count scheduled notifications about to be created"""
+    for notification in notifications:
+        if notification.scheduled_for is not None:
+            notifications_scheduled.inc(type=notification.type)
+
+
+@contextmanager
+def track_job(job):
+    """Record a run of a command or task; flushes so short processes report"""
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        yield
+        status = 'success'
+    finally:
+        job_runs.inc(job=job, status=status)
+        job_duration.observe(time.perf_counter() - start, job=job)
+        if status == 'success':
+            job_last_success.set(time.time(), job=job)
+        registry.flush()
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='is_sent',
+            field=models.BooleanField(default=False, help_text='Whether notification has been sent'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='locale',
+            field=models.CharField(default='uz', help_text='Locale of the message template', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='params',
+            field=models.JSONField(blank=True, default=dict, help_text='Parameters for the message template'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='scheduled_for',
+            field=models.DateTimeField(blank=True, help_text='When notification should be sent', null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='sent_via',
+            field=models.CharField(choices=[('telegram', 'Telegram'), ('email', 'Email'), ('sms', 'SMS'), ('web', 'Web')], default='telegram', help_text='How notification was sent', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='telegram_message_id',
+            field=models.CharField(blank=True, help_text='Telegram message ID for tracking', max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='template_key',
+            field=models.CharField(blank=True, help_text='Message template key, rendered when the notification is sent', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='message',
+            field=models.TextField(blank=True, help_text='Notification message (free-form notifications only)'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='title',
+            field=models.CharField(blank=True, help_text='Notification title (free-form notifications only)', max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('booking_reminder', 'Booking Reminder'), ('booking_confirmed', 'Booking Confirmed'), ('booking_cancelled', 'Booking Cancelled'), ('booking_updated', 'Booking Updated'), ('booking_completed', 'Booking Completed'), ('provider_message', 'Provider Message'), ('queue_reminder_72h', 'Queue Reminder 72h'), ('queue_reminder_36h', 'Queue Reminder 36h'), ('queue_reminder_24h', 'Queue Reminder 24h'), ('queue_reminder_3h', 'Queue Reminder 3h'), ('queue_reminder_1h', 'Queue Reminder 1h'), ('provider_next_queue', 'Provider Next Queue'), ('provider_today_queues', 'Provider Today Queues')], help_text='Type of notification', max_length=30),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:14
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_notification_templates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(help_text='ID of the notification in the notifications table', unique=True)),
+                ('user_id', models.BigIntegerField(db_index=True, help_text='User who received the notification')),
+                ('booking_id', models.BigIntegerField(blank=True, help_text='Related booking (if applicable)', null=True)),
+                ('type', models.CharField(max_length=30)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('message', models.TextField(blank=True)),
+                ('template_key', models.CharField(blank=True, max_length=50)),
+                ('locale', models.CharField(default='uz', max_length=10)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('is_read', models.BooleanField(default=False)),
+                ('is_sent', models.BooleanField(default=False)),
+                ('sent_at', models.DateTimeField()),
+                ('scheduled_for', models.DateTimeField(blank=True, null=True)),
+                ('sent_via', models.CharField(max_length=20)),
+                ('telegram_message_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Archived Notification',
+                'verbose_name_plural': 'Archived Notifications',
+                'db_table': 'notifications_archive',
+                'ordering': ['-sent_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['sent_at'], name='notifications_sent_at_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_keyset_pagination_indexes'),
+        ('services', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Date of the held slot')),
+                ('time', models.TimeField(help_text='Time of the held slot')),
+                ('token', models.CharField(help_text='Token presented to convert the hold into a booking', max_length=64, unique=True)),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='When the hold lapses')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Slot Hold',
+                'verbose_name_plural': 'Slot Holds',
+                'db_table': 'slot_holds',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='booking',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'confirmed', 'active'])), fields=('provider', 'date', 'time'), name='bookings_active_slot_unique'),
+        ),
+        migrations.AddField(
+            model_name='slothold',
+            name='provider',
+            field=models.ForeignKey(help_text='Provider whose slot is held', on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to='services.provider'),
+        ),
+        migrations.AddField(
+            model_name='slothold',
+            name='user',
+            field=models.ForeignKey(help_text='Client holding the slot', on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='slothold',
+            constraint=models.UniqueConstraint(fields=('provider', 'date', 'time'), name='slot_holds_slot_unique'),
+        ),
+    ]
@@ -4,9 +4,56 @@ from apps.users.models import User
 from apps.services.models import Provider
 
 
+class AddMinutes(models.Func):
+    """SQL expression for a time plus a number of minutes"""
+    
+    output_field = models.TimeField()
+    
+    def _compile_args(self, compiler):
+        time_sql, time_params = compiler.compile(self.source_expressions[0])
+        minutes_sql, minutes_params = compiler.compile(self.source_expressions[1])
+        return time_sql, minutes_sql, (*time_params, *minutes_params)
+    
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL
+        time_sql, minutes_sql, params = self._compile_args(compiler)
+        return f"({time_sql} + make_interval(mins => {minutes_sql}))", params
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        time_sql, minutes_sql, params = self._compile_args(compiler)
+        return f"time({time_sql}, '+' || {minutes_sql} || ' minutes')", params
+    
+    def as_mysql(self, compiler, connection, **extra_context):
+        time_sql, minutes_sql, params = self._compile_args(compiler)
+        return f"ADDTIME({time_sql}, SEC_TO_TIME({minutes_sql} * 60))", params
+
+
+class BookingQuerySet(models.QuerySet):
+    """Custom queryset for bookings"""
+    
+    def with_timing(self):
+        """Annotate duration (minutes) and end_time computed in SQL"""
+        return self.annotate(
+            duration=models.F('provider__service__duration_minutes'),
+            end_time=AddMinutes(models.F('time'), models.F('provider__service__duration_minutes')),
+        )
+
+
 class Booking(models.Model):
     """Bookings made by clients"""
     
+    # Statuses that occupy a provider's time slot
+    ACTIVE_STATUSES = ['pending', 'confirmed', 'active']
+    
+    # Statuses after which scheduled reminders are no longer sent
+    FINAL_STATUSES = ['completed', 'cancelled', 'no_show']
+    
+    # Fields whose change requires validation and reminder rescheduling
+    SCHEDULE_FIELDS = {'client', 'client_id', 'provider', 'provider_id', 'date', 'time'}
+    
+    # Columns the scheduled reminders are derived from
+    SCHEDULE_ATTNAMES = ('client_id', 'provider_id', 'date', 'time')
+    
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
@@ -47,12 +94,26 @@ class Booking(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BookingQuerySet.as_manager()
+    
     class Meta:
         db_table = 'bookings'
         verbose_name = 'Booking'
         verbose_name_plural = 'Bookings'
         ordering = ['-created_at']
-        unique_together = ['provider', 'date', 'time']
+        constraints = [
+            # Cancelled, completed and no-show bookings free the slot
+            models.UniqueConstraint(
+                fields=['provider', 'date', 'time'],
+                condition=models.Q(status__in=['pending', 'confirmed', 'active']),
+                name='bookings_active_slot_unique'
+            ),
+        ]
+        indexes = [
+            # Keyset pagination on (created_at, id) per client / provider
+            models.Index(fields=['client', 'created_at', 'id'], name='bookings_client_created_idx'),
+            models.Index(fields=['provider', 'created_at', 'id'], name='bookings_provider_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.client.full_name} - {self.provider.user.full_name} on {self.date} at {self.time}"
@@ -70,17 +131,62 @@ class Booking(models.Model):
     
     def get_duration_minutes(self):
         """Get booking duration in minutes"""
+        # Annotated by BookingQuerySet.with_timing()
+        if hasattr(self, 'duration'):
+            return self.duration
         return self.provider.service.duration_minutes
     
     def get_end_time(self):
         """Get booking end time"""
+        if hasattr(self, 'end_time'):
+            return self.end_time
         from datetime import timedelta
         booking_datetime = timezone.datetime.combine(self.date, self.time)
         end_datetime = booking_datetime + timedelta(minutes=self.get_duration_minutes())
         return end_datetime.time()
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_schedule()
+        return instance
+    
+    def _remember_schedule(self):
+        """Remember the stored schedule so save() can tell what changed"""
+        if self.get_deferred_fields().intersection(self.SCHEDULE_ATTNAMES):
+            self._stored_schedule = None
+        else:
+            self._stored_schedule = {name: getattr(self, name) for name in self.SCHEDULE_ATTNAMES}
+    
+    def get_changed_schedule_fields(self):
+        """Schedule columns changed since the booking was loaded or saved"""
+        stored = getattr(self, '_stored_schedule', None)
+        if stored is None:
+            # Unknown (new or partially loaded): assume everything changed
+            return set(self.SCHEDULE_ATTNAMES)
+        return {name for name, value in stored.items() if getattr(self, name) != value}
+    
+    def transition_to(self, status):
+        """Change the status with a single UPDATE.
+        
+        Only the status columns are written and only the side effects of
+        the new status run: final statuses drop the scheduled reminders
+        (after commit, through the task queue).
+        """
+        self.status = status
+        self.save(update_fields=['status', 'updated_at'])
+        
+        if status in self.FINAL_STATUSES:
+            from .notification_service import NotificationService
+            NotificationService.emit('bookings_finished', [self.pk])
+    
     def save(self, *args, **kwargs):
         """Override save to validate booking and schedule notifications"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not self.SCHEDULE_FIELDS.intersection(update_fields):
+            # Status or notes only: nothing to validate or reschedule
+            return super().save(*args, **kwargs)
+        
         # Validate that client is not a provider
         if self.client.is_provider():
             raise ValueError("Providers cannot book services")
@@ -98,18 +204,20 @@ class Booking(models.Model):
         
         # Check if this is a new booking
         is_new = self.pk is None
+        changed_fields = None if is_new else self.get_changed_schedule_fields()
         
         super().save(*args, **kwargs)
+        self._remember_schedule()
         
-        # Schedule notifications after saving
+        # Schedule notifications once the save is committed
         try:
             from .notification_service import NotificationService
             if is_new:
                 # Schedule notifications for new booking
-                NotificationService.schedule_booking_notifications(self)
-            else:
+                NotificationService.emit('booking_created', self.pk)
+            elif changed_fields:
                 # Update notifications for existing booking
-                NotificationService.update_booking_notifications(self)
+                NotificationService.emit('booking_changed', self.pk, sorted(changed_fields))
         except Exception as e:
             # Log error but don't fail the save
             import logging
@@ -117,6 +225,59 @@ class Booking(models.Model):
             logger.error(f"Failed to schedule notifications for booking {self.id}: {e}")
 
 
+class SlotHold(models.Model):
+    """Short-lived reservation of a provider's time slot.
+
+    A hold is taken when a client picks a slot and converted into a
+    booking on confirm (see ReservationService). The unique constraint
+    makes the first INSERT win; competing requests fail immediately.
+    """
+    
+    provider = models.ForeignKey(
+        Provider,
+        on_delete=models.CASCADE,
+        related_name='slot_holds',
+        help_text="Provider whose slot is held"
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='slot_holds',
+        help_text="Client holding the slot"
+    )
+    date = models.DateField(
+        help_text="Date of the held slot"
+    )
+    time = models.TimeField(
+        help_text="Time of the held slot"
+    )
+    token = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="Token presented to convert the hold into a booking"
+    )
+    expires_at = models.DateTimeField(
+        db_index=True,
+        help_text="When the hold lapses"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'slot_holds'
+        verbose_name = 'Slot Hold'
+        verbose_name_plural = 'Slot Holds'
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'date', 'time'], name='slot_holds_slot_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} holds {self.provider} on {self.date} at {self.time}"
+    
+    def is_expired(self):
+        """Check if the hold has lapsed"""
+        return self.expires_at <= timezone.now()
+
+
 class Notification(models.Model):
     """Notifications for users"""
     
@@ -125,6 +286,7 @@ class Notification(models.Model):
         ('booking_confirmed', 'Booking Confirmed'),
         ('booking_cancelled', 'Booking Cancelled'),
         ('booking_updated', 'Booking Updated'),
+        ('booking_completed', 'Booking Completed'),
         ('provider_message', 'Provider Message'),
         # New notification types for queue management
         ('queue_reminder_72h', 'Queue Reminder 72h'),
@@ -157,10 +319,27 @@ class Notification(models.Model):
     )
     title = models.CharField(
         max_length=200,
-        help_text="Notification title"
+        blank=True,
+        help_text="Notification title (free-form notifications only)"
     )
     message = models.TextField(
-        help_text="Notification message"
+        blank=True,
+        help_text="Notification message (free-form notifications only)"
+    )
+    template_key = models.CharField(
+        max_length=50,
+        blank=True,
+        help_text="Message template key, rendered when the notification is sent"
+    )
+    locale = models.CharField(
+        max_length=10,
+        default='uz',
+        help_text="Locale of the message template"
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Parameters for the message template"
     )
     is_read = models.BooleanField(
         default=False,
@@ -199,6 +378,65 @@ class Notification(models.Model):
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['sent_at'], name='notifications_sent_at_idx'),
+            # Keyset pagination on (sent_at, id) per user
+            models.Index(fields=['user', 'sent_at', 'id'], name='notifications_user_sent_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.get_title()}"
+    
+    def get_title(self):
+        """Get notification title, rendering the template if needed"""
+        if not self.template_key:
+            return self.title
+        from .notification_templates import get_template
+        return get_template(self.template_key, self.locale).render_title(self.params)
+    
+    def get_message(self):
+        """Get notification message, rendering the template if needed"""
+        if not self.template_key:
+            return self.message
+        from .notification_templates import get_template
+        return get_template(self.template_key, self.locale).render_body(self.params)
+
+
+class NotificationArchive(models.Model):
+    """Old notifications moved out of the notifications table"""
+    
+    original_id = models.BigIntegerField(
+        unique=True,
+        help_text="ID of the notification in the notifications table"
+    )
+    user_id = models.BigIntegerField(
+        db_index=True,
+        help_text="User who received the notification"
+    )
+    booking_id = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Related booking (if applicable)"
+    )
+    type = models.CharField(max_length=30)
+    title = models.CharField(max_length=200, blank=True)
+    message = models.TextField(blank=True)
+    template_key = models.CharField(max_length=50, blank=True)
+    locale = models.CharField(max_length=10, default='uz')
+    params = models.JSONField(default=dict, blank=True)
+    is_read = models.BooleanField(default=False)
+    is_sent = models.BooleanField(default=False)
+    sent_at = models.DateTimeField()
+    scheduled_for = models.DateTimeField(null=True, blank=True)
+    sent_via = models.CharField(max_length=20)
+    telegram_message_id = models.CharField(max_length=50, blank=True, null=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'notifications_archive'
+        verbose_name = 'Archived Notification'
+        verbose_name_plural = 'Archived Notifications'
+        ordering = ['-sent_at']
     
     def __str__(self):
-        return f"{self.user.username} - {self.title}"
\ No newline at end of file
+        return f"{self.user_id} - {self.type} ({self.sent_at})"
@@ -0,0 +1,43 @@
+"""
+Notification side effects of booking changes.
+
+These run through the task queue (see NotificationService.emit), after
+the booking change has been committed, so each handler loads the current
+state of the booking and skips bookings that no longer need the work.
+"""
+
+from .models import Booking, Notification
+from .notification_service import NotificationService
+
+
+def _active_booking(booking_id):
+    return Booking.objects.select_related(
+        'client', 'provider__user'
+    ).filter(id=booking_id, status__in=Booking.ACTIVE_STATUSES).first()
+
+
+def booking_created(booking_id):
+    """Schedule the reminders of a new booking"""
+    booking = _active_booking(booking_id)
+    if booking is not None:
+        NotificationService.schedule_booking_notifications(booking)
+
+
+def booking_changed(booking_id, changed_fields=None):
+    """Update the reminders of an edited booking"""
+    booking = _active_booking(booking_id)
+    if booking is not None:
+        changed_fields = set(changed_fields) if changed_fields is not None else None
+        NotificationService.update_booking_notifications(booking, changed_fields)
+
+
+def bookings_finished(booking_ids):
+    """Drop the reminders of bookings that will not take place"""
+    NotificationService.cancel_scheduled_notifications(booking_ids)
+
+
+def create_notifications(notifications):
+    """Create templated notifications from build_notification() kwargs"""
+    Notification.objects.bulk_create([
+        Notification(**kwargs) for kwargs in notifications
+    ])
@@ -1,5 +1,8 @@
+from django.db.models import Case, DateTimeField, Value, When
 from django.utils import timezone
 from datetime import timedelta, datetime
+import time
+from . import metrics
 from .models import Booking, Notification
 from apps.services.models import Provider
 from apps.users.models import User
@@ -27,54 +30,99 @@ class NotificationService:
         # Schedule provider notifications
         NotificationService._schedule_provider_notifications(booking, booking_datetime)
     
+    # Customer reminder types and how long before the booking they are sent
+    CUSTOMER_REMINDERS = [
+        ('queue_reminder_72h', timedelta(hours=72)),
+        ('queue_reminder_36h', timedelta(hours=36)),
+        ('queue_reminder_24h', timedelta(hours=24)),
+        ('queue_reminder_3h', timedelta(hours=3)),
+        ('queue_reminder_1h', timedelta(hours=1)),
+    ]
+    
+    @staticmethod
+    def booking_params(booking):
+        """Template parameters describing a booking"""
+        return {
+            'client': booking.client.full_name,
+            'provider': booking.provider.user.full_name,
+            'date': str(booking.date),
+            'time': str(booking.time),
+        }
+    
+    @staticmethod
+    def build_notification(user, template_key, params, booking=None, notification_type=None, **extra):
+        """Build an unsaved templated notification"""
+        return Notification(
+            user=user,
+            booking=booking,
+            type=notification_type or template_key,
+            template_key=template_key,
+            params=params,
+            **extra
+        )
+    
+    @staticmethod
+    def create_notification(user, template_key, params, booking=None, notification_type=None, **extra):
+        """Create a templated notification"""
+        notification = NotificationService.build_notification(
+            user, template_key, params,
+            booking=booking,
+            notification_type=notification_type,
+            **extra
+        )
+        metrics.record_scheduled([notification])
+        notification.save()
+        return notification
+    
+    # Notification columns passed to the task queue by notify_many()
+    QUEUED_FIELDS = ('user_id', 'booking_id', 'type', 'title', 'message', 'template_key', 'locale', 'params')
+    
+    @staticmethod
+    def emit(event, *args):
+        """Run a notification_events handler after commit, off the request path"""
+        from . import task_queue
+        task_queue.enqueue(f'apps.bookings.notification_events.{event}', *args)
+    
+    @staticmethod
+    def notify(user, template_key, params, booking=None, notification_type=None, **extra):
+        """Create a templated notification after commit, off the request path"""
+        NotificationService.notify_many([NotificationService.build_notification(
+            user, template_key, params,
+            booking=booking,
+            notification_type=notification_type,
+            **extra
+        )])
+    
+    @staticmethod
+    def notify_many(notifications):
+        """Create built (immediate) notifications after commit, off the request path"""
+        NotificationService.emit('create_notifications', [
+            {name: getattr(notification, name) for name in NotificationService.QUEUED_FIELDS}
+            for notification in notifications
+        ])
+    
     @staticmethod
     def _schedule_customer_notifications(booking, booking_datetime):
         """Schedule customer reminder notifications"""
-        notifications = [
-            {
-                'type': 'queue_reminder_72h',
-                'title': 'Navbat eslatmasi - 72 soat',
-                'message': f"Salom {booking.client.full_name}! Sizning navbatingiz {booking.date} kuni {booking.time} da. 72 soat qoldi. Xizmat ko'rsatuvchi: {booking.provider.user.full_name}",
-                'scheduled_for': booking_datetime - timedelta(hours=72)
-            },
-            {
-                'type': 'queue_reminder_36h',
-                'title': 'Navbat eslatmasi - 36 soat',
-                'message': f"Salom {booking.client.full_name}! Sizning navbatingiz {booking.date} kuni {booking.time} da. 36 soat qoldi. Xizmat ko'rsatuvchi: {booking.provider.user.full_name}",
-                'scheduled_for': booking_datetime - timedelta(hours=36)
-            },
-            {
-                'type': 'queue_reminder_24h',
-                'title': 'Navbat eslatmasi - 24 soat',
-                'message': f"Salom {booking.client.full_name}! Sizning navbatingiz {booking.date} kuni {booking.time} da. 24 soat qoldi. Xizmat ko'rsatuvchi: {booking.provider.user.full_name}",
-                'scheduled_for': booking_datetime - timedelta(hours=24)
-            },
-            {
-                'type': 'queue_reminder_3h',
-                'title': 'Navbat eslatmasi - 3 soat',
-                'message': f"Salom {booking.client.full_name}! Sizning navbatingiz {booking.date} kuni {booking.time} da. 3 soat qoldi. Xizmat ko'rsatuvchi: {booking.provider.user.full_name}",
-                'scheduled_for': booking_datetime - timedelta(hours=3)
-            },
-            {
-                'type': 'queue_reminder_1h',
-                'title': 'Navbat eslatmasi - 1 soat',
-                'message': f"Salom {booking.client.full_name}! Sizning navbatingiz {booking.date} kuni {booking.time} da. 1 soat qoldi. Xizmat ko'rsatuvchi: {booking.provider.user.full_name}",
-                'scheduled_for': booking_datetime - timedelta(hours=1)
-            }
-        ]
+        params = NotificationService.booking_params(booking)
+        now = timezone.now()
         
-        for notif_data in notifications:
+        notifications = []
+        for notification_type, offset in NotificationService.CUSTOMER_REMINDERS:
+            scheduled_for = booking_datetime - offset
             # Only schedule if the time hasn't passed yet
-            if notif_data['scheduled_for'] > timezone.now():
-                Notification.objects.create(
-                    user=booking.client,
+            if scheduled_for > now:
+                notifications.append(NotificationService.build_notification(
+                    booking.client,
+                    notification_type,
+                    params,
                     booking=booking,
-                    type=notif_data['type'],
-                    title=notif_data['title'],
-                    message=notif_data['message'],
-                    scheduled_for=notif_data['scheduled_for'],
+                    scheduled_for=scheduled_for,
                     is_sent=False
-                )
+                ))
+        
+        metrics.record_scheduled(notifications)
+        Notification.objects.bulk_create(notifications)
     
     @staticmethod
     def _schedule_provider_notifications(booking, booking_datetime):
@@ -83,16 +131,29 @@ class NotificationService:
             return
         
         # Provider next queue notification (1 hour before)
-        Notification.objects.create(
-            user=booking.provider.user,
+        NotificationService.create_notification(
+            booking.provider.user,
+            'provider_next_queue',
+            NotificationService.booking_params(booking),
             booking=booking,
-            type='provider_next_queue',
-            title='Keyingi navbat eslatmasi',
-            message=f"Salom {booking.provider.user.full_name}! Keyingi navbat {booking.date} kuni {booking.time} da. Mijoz: {booking.client.full_name}. 1 soat qoldi.",
             scheduled_for=booking_datetime - timedelta(hours=1),
             is_sent=False
         )
     
+    @staticmethod
+    def bookings_without_reminders(date):
+        """Active bookings on `date` with no scheduled reminders yet.
+        
+        Immediate notifications (booking_confirmed, ...) have no
+        scheduled_for and do not count; reminders already sent do.
+        """
+        return Booking.objects.filter(
+            date=date,
+            status__in=Booking.ACTIVE_STATUSES
+        ).exclude(
+            notifications__scheduled_for__isnull=False
+        ).select_related('client', 'provider__user')
+    
     @staticmethod
     def schedule_today_queues_notification(provider, date):
         """Schedule notification about today's queues for provider"""
@@ -100,38 +161,36 @@ class NotificationService:
             return
         
         # Get all bookings for today
-        today_bookings = Booking.objects.filter(
+        today_bookings = list(Booking.objects.filter(
             provider=provider,
             date=date,
             status__in=['pending', 'confirmed', 'active']
-        ).order_by('time')
+        ).select_related('client').order_by('time'))
         
-        if not today_bookings.exists():
+        if not today_bookings:
             return
         
-        # Create message with all today's queues
-        message = f"Salom {provider.user.full_name}! Bugungi navbatlar:\n\n"
-        for booking in today_bookings:
-            status_text = {
-                'pending': 'Kutilmoqda',
-                'confirmed': 'Tasdiqlangan',
-                'active': 'Faol'
-            }.get(booking.status, booking.status)
-            
-            message += f"🕐 {booking.time} - {booking.client.full_name} ({status_text})\n"
+        status_text = {
+            'pending': 'Kutilmoqda',
+            'confirmed': 'Tasdiqlangan',
+            'active': 'Faol'
+        }
+        queues = [
+            [str(booking.time), booking.client.full_name, status_text.get(booking.status, booking.status)]
+            for booking in today_bookings
+        ]
         
         # Schedule for 1 hour before first booking
-        first_booking_time = today_bookings.first().time
+        first_booking_time = today_bookings[0].time
         notification_time = timezone.datetime.combine(date, first_booking_time) - timedelta(hours=1)
         if timezone.is_naive(notification_time):
             notification_time = timezone.make_aware(notification_time)
         
         if notification_time > timezone.now():
-            Notification.objects.create(
-                user=provider.user,
-                type='provider_today_queues',
-                title='Bugungi navbatlar',
-                message=message,
+            NotificationService.create_notification(
+                provider.user,
+                'provider_today_queues',
+                {'provider': provider.user.full_name, 'queues': queues},
                 scheduled_for=notification_time,
                 is_sent=False
             )
@@ -140,26 +199,35 @@ class NotificationService:
     def send_pending_notifications():
         """Send all pending notifications that are due"""
         now = timezone.now()
-        pending_notifications = Notification.objects.filter(
+        pending_notifications = list(Notification.objects.filter(
             is_sent=False,
             scheduled_for__lte=now
-        )
+        ))
+        metrics.record_due(pending_notifications, now)
         
+        unsent = []
         for notification in pending_notifications:
             try:
-                NotificationService._send_notification(notification)
+                if not NotificationService._send_notification(notification):
+                    unsent.append(notification)
             except Exception as e:
+                metrics.notifications_failed.inc(type=notification.type, error=type(e).__name__)
+                unsent.append(notification)
                 logger.error(f"Failed to send notification {notification.id}: {e}")
+        
+        # What is still due after this pass, until the next one
+        metrics.record_due(unsent)
     
     @staticmethod
     def _send_notification(notification):
-        """Send a single notification via Telegram"""
+        """Send a single notification via Telegram; returns whether it was sent"""
         from .telegram_service import TelegramService
         
         telegram_service = TelegramService()
+        start = time.perf_counter()
         success = telegram_service.send_message(
             chat_id=notification.user.telegram_username,
-            message=notification.message
+            message=notification.get_message()
         )
         
         if success:
@@ -167,23 +235,114 @@ class NotificationService:
             notification.sent_at = timezone.now()
             notification.sent_via = 'telegram'
             notification.save()
+            metrics.record_sent(notification, time.perf_counter() - start)
             logger.info(f"Notification {notification.id} sent successfully")
         else:
+            metrics.notifications_failed.inc(type=notification.type, error=telegram_service.last_error)
             logger.error(f"Failed to send notification {notification.id}")
+        return success
     
     @staticmethod
     def cancel_booking_notifications(booking):
         """Cancel all scheduled notifications for a booking"""
-        Notification.objects.filter(
+        deleted, _ = Notification.objects.filter(
             booking=booking,
             is_sent=False
         ).delete()
+        metrics.notifications_cancelled.inc(deleted)
     
     @staticmethod
-    def update_booking_notifications(booking):
-        """Update notifications when booking is modified"""
+    def cancel_scheduled_notifications(booking_ids):
+        """Drop reminders not yet sent for bookings that will not take place"""
+        deleted, _ = Notification.objects.filter(
+            booking_id__in=booking_ids,
+            is_sent=False,
+            scheduled_for__isnull=False
+        ).delete()
+        metrics.notifications_cancelled.inc(deleted)
+    
+    @staticmethod
+    def update_booking_notifications(booking, changed_fields=None):
+        """Update notifications when booking is modified.
+        
+        `changed_fields` are the booking columns the edit changed (see
+        Booking.get_changed_schedule_fields); None means unknown. A new
+        date or time moves the existing reminders in place; a new client
+        or provider needs them rebuilt for the new recipients.
+        """
+        if changed_fields is not None:
+            if not changed_fields:
+                return
+            if not changed_fields.intersection(('client_id', 'provider_id')):
+                NotificationService.reschedule_booking_notifications(booking)
+                return
+        
         # Cancel existing notifications
         NotificationService.cancel_booking_notifications(booking)
         
         # Schedule new notifications
         NotificationService.schedule_booking_notifications(booking)
+    
+    @staticmethod
+    def reschedule_booking_notifications(booking):
+        """Move a booking's unsent reminders to its new date and time.
+        
+        Reminders that are still due are updated in place with one UPDATE
+        (scheduled_for per type, params carry the new date/time rendered in
+        the message), reminders now in the past are deleted and reminders
+        that became due are created.
+        """
+        if not booking.client.telegram_username:
+            return
+        
+        booking_datetime = timezone.datetime.combine(booking.date, booking.time)
+        if timezone.is_naive(booking_datetime):
+            booking_datetime = timezone.make_aware(booking_datetime)
+        now = timezone.now()
+        
+        offsets = dict(NotificationService.CUSTOMER_REMINDERS)
+        if booking.provider.user.telegram_username:
+            offsets['provider_next_queue'] = timedelta(hours=1)
+        due = {
+            notification_type: booking_datetime - offset
+            for notification_type, offset in offsets.items()
+            if booking_datetime - offset > now
+        }
+        
+        pending = Notification.objects.filter(
+            booking=booking,
+            is_sent=False,
+            scheduled_for__isnull=False
+        )
+        existing = set(pending.values_list('type', flat=True))
+        
+        if existing - set(due):
+            deleted, _ = pending.exclude(type__in=due).delete()
+            metrics.notifications_cancelled.inc(deleted)
+        
+        params = NotificationService.booking_params(booking)
+        kept = existing.intersection(due)
+        if kept:
+            pending.filter(type__in=kept).update(
+                scheduled_for=Case(
+                    *[When(type=notification_type, then=Value(due[notification_type])) for notification_type in kept],
+                    output_field=DateTimeField()
+                ),
+                params=params
+            )
+        
+        missing = [notification_type for notification_type in due if notification_type not in existing]
+        if missing:
+            notifications = [
+                NotificationService.build_notification(
+                    booking.provider.user if notification_type == 'provider_next_queue' else booking.client,
+                    notification_type,
+                    params,
+                    booking=booking,
+                    scheduled_for=due[notification_type],
+                    is_sent=False
+                )
+                for notification_type in missing
+            ]
+            metrics.record_scheduled(notifications)
+            Notification.objects.bulk_create(notifications)
@@ -0,0 +1,177 @@
+"""
+Notification message templates.
+
+Notification rows store only a template key, a locale and a small parameter
+payload. The text is rendered from this registry when the notification is
+sent or displayed, so editing a message here changes every pending row.
+"""
+
+from string import Formatter
+from django.conf import settings
+
+DEFAULT_LOCALE = getattr(settings, 'NOTIFICATION_DEFAULT_LOCALE', 'uz')
+
+_formatter = Formatter()
+
+
+class NotificationTemplate:
+    """Title and body template compiled once at import time"""
+
+    def __init__(self, title, body, item_templates=None):
+        self.title = title
+        self.body = body
+        self._title_parts = self._compile(title)
+        self._body_parts = self._compile(body)
+        # List-valued params (e.g. today's queues) are rendered item by item
+        self._item_parts = {
+            name: self._compile(template)
+            for name, template in (item_templates or {}).items()
+        }
+
+    @staticmethod
+    def _compile(template):
+        """Split a format string into (literal, field name) pairs"""
+        return [
+            (literal, field_name)
+            for literal, field_name, _spec, _conversion in _formatter.parse(template)
+        ]
+
+    def _render_parts(self, parts, params):
+        chunks = []
+        for literal, field_name in parts:
+            chunks.append(literal)
+            if field_name is None:
+                continue
+            value = params.get(field_name, '')
+            if field_name in self._item_parts and isinstance(value, list):
+                item_parts = self._item_parts[field_name]
+                value = ''.join(
+                    self._render_parts(item_parts, {str(i): v for i, v in enumerate(item)})
+                    for item in value
+                )
+            chunks.append(str(value))
+        return ''.join(chunks)
+
+    def render_title(self, params):
+        return self._render_parts(self._title_parts, params)
+
+    def render_body(self, params):
+        return self._render_parts(self._body_parts, params)
+
+
+_REMINDER_BODY = (
+    "Salom {client}! Sizning navbatingiz {date} kuni {time} da. "
+    "{hours} soat qoldi. Xizmat ko'rsatuvchi: {provider}"
+)
+
+TEMPLATES = {
+    # Customer reminders
+    ('queue_reminder_72h', 'uz'): NotificationTemplate('Navbat eslatmasi - 72 soat', _REMINDER_BODY.replace('{hours}', '72')),
+    ('queue_reminder_36h', 'uz'): NotificationTemplate('Navbat eslatmasi - 36 soat', _REMINDER_BODY.replace('{hours}', '36')),
+    ('queue_reminder_24h', 'uz'): NotificationTemplate('Navbat eslatmasi - 24 soat', _REMINDER_BODY.replace('{hours}', '24')),
+    ('queue_reminder_3h', 'uz'): NotificationTemplate('Navbat eslatmasi - 3 soat', _REMINDER_BODY.replace('{hours}', '3')),
+    ('queue_reminder_1h', 'uz'): NotificationTemplate('Navbat eslatmasi - 1 soat', _REMINDER_BODY.replace('{hours}', '1')),
+
+    # Provider reminders
+    ('provider_next_queue', 'uz'): NotificationTemplate(
+        'Keyingi navbat eslatmasi',
+        "Salom {provider}! Keyingi navbat {date} kuni {time} da. Mijoz: {client}. 1 soat qoldi."
+    ),
+    ('provider_today_queues', 'uz'): NotificationTemplate(
+        'Bugungi navbatlar',
+        "Salom {provider}! Bugungi navbatlar:\n\n{queues}",
+        item_templates={'queues': "🕐 {0} - {1} ({2})\n"}
+    ),
+
+    # Booking lifecycle
+    ('booking_created', 'uz'): NotificationTemplate(
+        'Yangi buyurtma',
+        "{client} sizga buyurtma berdi. Sana: {date}, Vaqt: {time}"
+    ),
+    ('booking_confirmed', 'uz'): NotificationTemplate(
+        'Buyurtma tasdiqlandi',
+        "Buyurtmangiz tasdiqlandi. Sana: {date}, Vaqt: {time}"
+    ),
+    ('booking_cancelled', 'uz'): NotificationTemplate(
+        'Buyurtma bekor qilindi',
+        "Buyurtma bekor qilindi. Sana: {date}, Vaqt: {time}"
+    ),
+    ('booking_cancelled', 'en'): NotificationTemplate(
+        'Booking Cancelled',
+        "Your booking with {provider} on {date} at {time} has been cancelled."
+    ),
+    ('booking_completed', 'uz'): NotificationTemplate(
+        'Xizmat yakunlandi',
+        "Xizmat muvaffaqiyatli yakunlandi. Rahmat!"
+    ),
+    ('booking_updated', 'uz'): NotificationTemplate(
+        'Buyurtma qayta belgilandi',
+        "Buyurtma yangi vaqtga ko'chirildi: {date} {time}"
+    ),
+
+    # Rich Telegram messages sent directly by TelegramService
+    ('telegram_booking_confirmation', 'uz'): NotificationTemplate(
+        'Navbat tasdiqlandi',
+        "🎉 <b>Navbat tasdiqlandi!</b>\n\n"
+        "📅 <b>Sana:</b> {date}\n"
+        "🕐 <b>Vaqt:</b> {time}\n"
+        "👤 <b>Xizmat ko'rsatuvchi:</b> {provider}\n"
+        "📍 <b>Manzil:</b> {location}\n"
+        "📞 <b>Telefon:</b> {phone}\n\n"
+        "<i>Navbat vaqtida kelishingizni so'raymiz!</i>"
+    ),
+    ('telegram_booking_cancellation', 'uz'): NotificationTemplate(
+        'Navbat bekor qilindi',
+        "❌ <b>Navbat bekor qilindi</b>\n\n"
+        "📅 <b>Sana:</b> {date}\n"
+        "🕐 <b>Vaqt:</b> {time}\n"
+        "👤 <b>Xizmat ko'rsatuvchi:</b> {provider}\n\n"
+        "<i>Navbat bekor qilindi. Yangi navbat olish uchun qayta murojaat qiling.</i>"
+    ),
+    ('telegram_booking_reminder', 'uz'): NotificationTemplate(
+        'Navbat eslatmasi',
+        "{emoji} <b>Navbat eslatmasi</b>\n\n"
+        "📅 <b>Sana:</b> {date}\n"
+        "🕐 <b>Vaqt:</b> {time}\n"
+        "👤 <b>Xizmat ko'rsatuvchi:</b> {provider}\n"
+        "📍 <b>Manzil:</b> {location}\n"
+        "⏳ <b>Qolgan vaqt:</b> {hours} soat\n\n"
+        "<i>Navbat vaqtida kelishingizni so'raymiz!</i>"
+    ),
+    ('telegram_provider_next_queue', 'uz'): NotificationTemplate(
+        'Keyingi navbat eslatmasi',
+        "🔔 <b>Keyingi navbat eslatmasi</b>\n\n"
+        "📅 <b>Sana:</b> {date}\n"
+        "🕐 <b>Vaqt:</b> {time}\n"
+        "👤 <b>Mijoz:</b> {client}\n"
+        "📞 <b>Telefon:</b> {phone}\n"
+        "📝 <b>Izoh:</b> {notes}\n\n"
+        "<i>1 soatdan keyin navbat boshlanadi!</i>"
+    ),
+    ('telegram_provider_today_queues', 'uz'): NotificationTemplate(
+        'Bugungi navbatlar',
+        "📋 <b>Bugungi navbatlar</b>\n\n"
+        "👤 <b>Xizmat ko'rsatuvchi:</b> {provider}\n"
+        "📅 <b>Sana:</b> {date}\n\n"
+        "{queues}"
+        "\n<i>Bugungi navbatlar ro'yxati!</i>",
+        item_templates={'queues': "{0} <b>{1}</b> - {2}\n"}
+    ),
+}
+
+
+def get_template(key, locale=None):
+    """Look up a template, falling back to the default locale"""
+    locale = locale or DEFAULT_LOCALE
+    template = TEMPLATES.get((key, locale))
+    if template is None:
+        template = TEMPLATES.get((key, DEFAULT_LOCALE))
+    if template is None:
+        raise KeyError(f"Unknown notification template: {key} ({locale})")
+    return template
+
+
+def render(key, params, locale=None):
+    """Render (title, message) for a template key"""
+    template = get_template(key, locale)
+    return template.render_title(params), template.render_body(params)
@@ -0,0 +1,158 @@
+import secrets
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import Booking, SlotHold
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SlotUnavailable(Exception):
+    """Raised when a slot is booked or held by someone else"""
+
+
+class HoldInvalid(Exception):
+    """Raised when a hold token is unknown, expired or belongs to another user"""
+
+
+class ReservationService:
+    """Service for reserving time slots.
+
+    Picking a slot takes a SlotHold; confirming converts it into a
+    Booking. Both steps are single INSERTs guarded by unique constraints
+    (slot_holds_slot_unique, bookings_active_slot_unique), so competing
+    requests never wait on row locks: the first one wins and the others
+    get SlotUnavailable straight away.
+
+    Bookings Booking.save() would reject raise ValueError before any hold
+    is taken, so they never block the slot.
+    """
+
+    @staticmethod
+    def hold_duration():
+        return timedelta(seconds=getattr(settings, 'SLOT_HOLD_SECONDS', 300))
+
+    @staticmethod
+    def validate_booking(user, provider, date, time):
+        """Raise ValueError if `user` may not book the slot"""
+        if user.is_provider():
+            raise ValueError("Providers cannot book services")
+        if not provider.is_accepting:
+            raise ValueError("Provider is not accepting new bookings")
+
+        booking_datetime = timezone.datetime.combine(date, time)
+        if timezone.is_naive(booking_datetime):
+            booking_datetime = timezone.make_aware(booking_datetime)
+        if booking_datetime < timezone.now():
+            raise ValueError("Cannot book in the past")
+
+        if date.strftime('%A').lower() not in provider.working_days:
+            raise ValueError(f"This day is not a working day for {provider.user.full_name}")
+        if time < provider.start_time or time >= provider.end_time:
+            raise ValueError(f"This time is outside working hours ({provider.start_time} - {provider.end_time})")
+
+    @staticmethod
+    def acquire_hold(user, provider, date, time):
+        """Hold a slot for `user`; returns the SlotHold"""
+        ReservationService.validate_booking(user, provider, date, time)
+        now = timezone.now()
+        expires_at = now + ReservationService.hold_duration()
+        slot = {'provider': provider, 'date': date, 'time': time}
+
+        with transaction.atomic():
+            # Lapsed holds do not count
+            SlotHold.objects.filter(expires_at__lte=now, **slot).delete()
+
+            if Booking.objects.filter(status__in=Booking.ACTIVE_STATUSES, **slot).exists():
+                raise SlotUnavailable()
+
+            # Picking the same slot again extends the user's own hold
+            if SlotHold.objects.filter(user=user, **slot).update(expires_at=expires_at):
+                return SlotHold.objects.get(user=user, **slot)
+
+            try:
+                with transaction.atomic():
+                    return SlotHold.objects.create(
+                        user=user,
+                        token=secrets.token_urlsafe(32),
+                        expires_at=expires_at,
+                        **slot
+                    )
+            except IntegrityError:
+                raise SlotUnavailable()
+
+    @staticmethod
+    def convert_hold(user, token, notes='', **slot):
+        """Turn a hold into a pending booking; returns the Booking.
+
+        Optional provider/date/time keyword arguments must match the hold.
+        """
+        with transaction.atomic():
+            hold = SlotHold.objects.select_for_update().select_related(
+                'provider__user', 'provider__service'
+            ).filter(token=token, user=user, **slot).first()
+            if hold is None or hold.is_expired():
+                raise HoldInvalid()
+
+            try:
+                with transaction.atomic():
+                    booking = Booking.objects.create(
+                        client=user,
+                        provider=hold.provider,
+                        date=hold.date,
+                        time=hold.time,
+                        notes=notes,
+                        status='pending'
+                    )
+            except IntegrityError:
+                # Booked without a hold in the meantime
+                raise SlotUnavailable()
+
+            hold.delete()
+        return booking
+
+    @staticmethod
+    def book(user, provider, date, time, notes=''):
+        """Hold and immediately book a slot"""
+        # One transaction: a booking that fails to convert takes its hold
+        # with it instead of blocking the slot until the hold expires
+        with transaction.atomic():
+            hold = ReservationService.acquire_hold(user, provider, date, time)
+            return ReservationService.convert_hold(user, hold.token, notes)
+
+    @staticmethod
+    def reschedule(booking, date, time):
+        """Move a booking to another slot of its provider; returns the Booking.
+
+        The target slot is held for the booking's client and the booking
+        moved in the same transaction, so a slot another client holds or
+        has booked raises SlotUnavailable.
+        """
+        if (booking.date, booking.time) == (date, time):
+            return booking
+
+        with transaction.atomic():
+            hold = ReservationService.acquire_hold(booking.client, booking.provider, date, time)
+            booking.date = date
+            booking.time = time
+            try:
+                with transaction.atomic():
+                    booking.save()
+            except IntegrityError:
+                raise SlotUnavailable()
+            hold.delete()
+        return booking
+
+    @staticmethod
+    def release_hold(user, token):
+        """Give up a hold; returns True if one was released"""
+        deleted, _ = SlotHold.objects.filter(token=token, user=user).delete()
+        return bool(deleted)
+
+    @staticmethod
+    def purge_expired_holds():
+        """Delete lapsed holds; returns how many were removed"""
+        deleted, _ = SlotHold.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
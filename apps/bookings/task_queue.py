@@ -0,0 +1,104 @@
+"""
+Local task queue for side effects that must not slow down requests.
+
+enqueue() runs a task once the current transaction commits (straight away
+outside a transaction). Tasks are referenced by dotted path and take
+JSON-serializable arguments, so the same call works with either backend:
+
+- Celery, when celery is installed and settings.CELERY_BROKER_URL is set
+  (or CELERY_TASK_ALWAYS_EAGER): the task is sent to the
+  ``run_queued_task`` Celery task on the ``high`` queue.
+- Otherwise an in-process thread pool of settings.TASK_QUEUE_WORKERS
+  threads.
+
+With settings.TASK_QUEUE_EAGER tasks run inline on commit instead, which
+keeps tests and shell sessions deterministic.
+
+The thread pool is not durable: tasks still queued when the process exits
+(deploy, crash, worker recycling) are lost. warn_if_not_durable() logs a
+warning at startup when production runs on it.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from importlib.util import find_spec
+import threading
+from django.conf import settings
+from django.db import close_old_connections, transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def enqueue(path, *args, **kwargs):
+    """Run the function at `path` with the given arguments after commit"""
+    transaction.on_commit(lambda: _dispatch(path, args, kwargs), robust=True)
+
+
+def run(path, args=(), kwargs=None):
+    """Import and call a queued task"""
+    module_path, name = path.rsplit('.', 1)
+    func = getattr(import_module(module_path), name)
+    return func(*args, **(kwargs or {}))
+
+
+def uses_celery():
+    configured = getattr(settings, 'CELERY_BROKER_URL', None) or getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False)
+    return bool(configured) and find_spec('celery') is not None
+
+
+def warn_if_not_durable():
+    """Warn when queued tasks would only live in this process's memory"""
+    if settings.DEBUG or getattr(settings, 'TASK_QUEUE_EAGER', False) or uses_celery():
+        return
+    logger.warning(
+        "Queued tasks run in an in-process thread pool and are lost if the process exits; "
+        "install celery and set CELERY_BROKER_URL for durable delivery"
+    )
+
+
+def _dispatch(path, args, kwargs):
+    if getattr(settings, 'TASK_QUEUE_EAGER', False):
+        _run_logged(path, args, kwargs)
+        return
+
+    if uses_celery():
+        try:
+            from .tasks import run_queued_task
+            run_queued_task.delay(path, list(args), kwargs)
+            return
+        except Exception as e:
+            # Broker unreachable: run it here rather than lose it
+            logger.warning(f"Could not send {path} to Celery, running it locally: {e}")
+
+    _get_executor().submit(_run_in_thread, path, args, kwargs)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'TASK_QUEUE_WORKERS', 4),
+                thread_name_prefix='task-queue'
+            )
+        return _executor
+
+
+def _run_in_thread(path, args, kwargs):
+    # Pool threads keep their own connections; treat each task like a request
+    close_old_connections()
+    try:
+        _run_logged(path, args, kwargs)
+    finally:
+        close_old_connections()
+
+
+def _run_logged(path, args, kwargs):
+    try:
+        run(path, args, kwargs)
+    except Exception:
+        logger.exception(f"Queued task {path} failed")
@@ -1,5 +1,7 @@
 from celery import shared_task
 from django.utils import timezone
+from apps.monitoring.profiling import profiled
+from . import metrics
 from .notification_service import NotificationService
 from .models import Notification
 import logging
@@ -8,10 +10,12 @@ logger = logging.getLogger(__name__)
 
 
 @shared_task
+@profiled()
 def send_pending_notifications():
     """Celery task to send pending notifications"""
     try:
-        NotificationService.send_pending_notifications()
+        with metrics.track_job('send_pending_notifications'):
+            NotificationService.send_pending_notifications()
         logger.info("Successfully processed pending notifications")
         return "Success"
     except Exception as e:
@@ -20,33 +24,28 @@ def send_pending_notifications():
 
 
 @shared_task
+@profiled()
 def schedule_daily_notifications():
     """Celery task to schedule daily notifications"""
     try:
-        from .models import Booking
-        from .services.models import Provider
-        from datetime import date
-        
-        today = date.today()
-        
-        # Schedule notifications for today's bookings
-        today_bookings = Booking.objects.filter(
-            date=today,
-            status__in=['pending', 'confirmed', 'active']
-        )
-        
-        for booking in today_bookings:
-            NotificationService.schedule_booking_notifications(booking)
-        
-        # Schedule provider notifications
-        providers = Provider.objects.filter(
-            user__telegram_username__isnull=False
-        ).distinct()
-        
-        for provider in providers:
-            NotificationService.schedule_today_queues_notification(provider, today)
-        
-        logger.info("Successfully scheduled daily notifications")
+        with metrics.track_job('schedule_daily_notifications'):
+            from apps.services.models import Provider
+            
+            today = timezone.localdate()
+            
+            # Schedule notifications for today's bookings that have none yet
+            for booking in NotificationService.bookings_without_reminders(today):
+                NotificationService.schedule_booking_notifications(booking)
+            
+            # Schedule provider notifications
+            providers = Provider.objects.filter(
+                user__telegram_username__isnull=False
+            ).select_related('user')
+            
+            for provider in providers:
+                NotificationService.schedule_today_queues_notification(provider, today)
+            
+            logger.info("Successfully scheduled daily notifications")
         return "Success"
     except Exception as e:
         logger.error(f"Failed to schedule daily notifications: {e}")
@@ -97,3 +96,45 @@ def send_booking_cancellation(booking_id):
     except Exception as e:
         logger.error(f"Error sending booking cancellation for booking {booking_id}: {e}")
         return f"Error: {e}"
+
+
+@shared_task
+@profiled()
+def archive_old_notifications():
+    """Move notifications past the retention period into the archive"""
+    try:
+        from .archive_service import NotificationArchiveService
+        
+        with metrics.track_job('archive_old_notifications'):
+            result = NotificationArchiveService.archive_notifications()
+        logger.info(
+            f"Archived {result['archived']} notifications "
+            f"({result['rows_per_sec']:.0f} rows/sec)"
+        )
+        return "Success"
+    except Exception as e:
+        logger.error(f"Failed to archive notifications: {e}")
+        return f"Error: {e}"
+
+
+@shared_task
+def purge_expired_slot_holds():
+    """Delete slot holds that lapsed without being booked"""
+    try:
+        from .reservation_service import ReservationService
+        
+        deleted = ReservationService.purge_expired_holds()
+        logger.info(f"Purged {deleted} expired slot holds")
+        return "Success"
+    except Exception as e:
+        logger.error(f"Failed to purge expired slot holds: {e}")
+        return f"Error: {e}"
+
+
+@shared_task
+def run_queued_task(path, args, kwargs):
+    """Run a task enqueued with task_queue.enqueue()"""
+    from .task_queue import run
+    
+    run(path, args, kwargs)
+    return "Success"
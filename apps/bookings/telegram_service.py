@@ -1,6 +1,8 @@
+import time
 import requests
 import logging
 from django.conf import settings
+from . import metrics, notification_templates
 
 logger = logging.getLogger(__name__)
 
@@ -10,27 +12,65 @@ class TelegramService:
     
     def __init__(self):
         self.bot_token = getattr(settings, 'TELEGRAM_BOT_TOKEN', None)
-        self.api_url = f"https://api.telegram.org/bot{self.bot_token}"
+        base_url = getattr(settings, 'TELEGRAM_API_BASE_URL', 'https://api.telegram.org').rstrip('/')
+        self.api_url = f"{base_url}/bot{self.bot_token}"
+        self.send_retries = getattr(settings, 'TELEGRAM_SEND_RETRIES', 2)
+        self.max_retry_after = getattr(settings, 'TELEGRAM_MAX_RETRY_AFTER', 5)
+        # Error class of the last failed send, for metrics and callers
+        self.last_error = None
+    
+    def _retry_after(self, response):
+        """Seconds Telegram asks to wait after a 429, or None"""
+        try:
+            return response.json()['parameters']['retry_after']
+        except (ValueError, KeyError, TypeError):
+            return None
+    
+    def _post(self, method, data):
+        """Call a Bot API method, recording latency and status"""
+        start = time.perf_counter()
+        try:
+            response = requests.post(f"{self.api_url}/{method}", data=data, timeout=10)
+        finally:
+            metrics.telegram_request_duration.observe(time.perf_counter() - start, method=method)
+        metrics.telegram_responses.inc(method=method, status=response.status_code)
+        if response.status_code == 429:
+            metrics.telegram_rate_limited.inc(method=method)
+        return response
+    
+    def _fail(self, error):
+        self.last_error = error
+        metrics.telegram_send_failures.inc(error=error)
+        return False
     
     def send_message(self, chat_id, message, parse_mode='HTML'):
         """Send a message to a Telegram user"""
+        self.last_error = None
         if not self.bot_token:
             logger.error("Telegram bot token not configured")
-            return False
+            return self._fail('not_configured')
         
         if not chat_id:
             logger.error("Chat ID not provided")
-            return False
+            return self._fail('no_chat_id')
         
         try:
-            url = f"{self.api_url}/sendMessage"
             data = {
                 'chat_id': chat_id,
                 'text': message,
                 'parse_mode': parse_mode
             }
             
-            response = requests.post(url, data=data, timeout=10)
+            for attempt in range(self.send_retries + 1):
+                response = self._post('sendMessage', data)
+                if response.status_code != 429 or attempt == self.send_retries:
+                    break
+                # Flood control: wait as asked unless that would stall the sender
+                retry_after = self._retry_after(response)
+                if retry_after is None or retry_after > self.max_retry_after:
+                    break
+                logger.warning(f"Telegram rate limit hit, retrying in {retry_after}s")
+                time.sleep(retry_after)
             response.raise_for_status()
             
             result = response.json()
@@ -39,44 +79,47 @@ class TelegramService:
                 return True
             else:
                 logger.error(f"Telegram API error: {result.get('description')}")
-                return False
+                return self._fail('api_error')
                 
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"Failed to send Telegram message: {e}")
+            status = e.response.status_code if e.response is not None else None
+            return self._fail('rate_limited' if status == 429 else f'http_{status}')
+        except requests.exceptions.Timeout as e:
+            logger.error(f"Failed to send Telegram message: {e}")
+            return self._fail('timeout')
+        except requests.exceptions.ConnectionError as e:
+            logger.error(f"Failed to send Telegram message: {e}")
+            return self._fail('connection_error')
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to send Telegram message: {e}")
-            return False
+            return self._fail(type(e).__name__)
         except Exception as e:
             logger.error(f"Unexpected error sending Telegram message: {e}")
-            return False
+            return self._fail(type(e).__name__)
+    
+    def send_template(self, chat_id, template_key, params, locale=None):
+        """Render a message template and send it"""
+        message = notification_templates.get_template(template_key, locale).render_body(params)
+        return self.send_message(chat_id, message)
     
     def send_booking_confirmation(self, booking):
         """Send booking confirmation message"""
-        message = f"""
-🎉 <b>Navbat tasdiqlandi!</b>
-
-📅 <b>Sana:</b> {booking.date}
-🕐 <b>Vaqt:</b> {booking.time}
-👤 <b>Xizmat ko'rsatuvchi:</b> {booking.provider.user.full_name}
-📍 <b>Manzil:</b> {booking.provider.location or 'Aniqlanmagan'}
-📞 <b>Telefon:</b> {booking.provider.user.phone or 'Aniqlanmagan'}
-
-<i>Navbat vaqtida kelishingizni so'raymiz!</i>
-        """.strip()
-        
-        return self.send_message(booking.client.telegram_username, message)
+        return self.send_template(booking.client.telegram_username, 'telegram_booking_confirmation', {
+            'date': booking.date,
+            'time': booking.time,
+            'provider': booking.provider.user.full_name,
+            'location': booking.provider.location or 'Aniqlanmagan',
+            'phone': booking.provider.user.phone or 'Aniqlanmagan',
+        })
     
     def send_booking_cancellation(self, booking):
         """Send booking cancellation message"""
-        message = f"""
-❌ <b>Navbat bekor qilindi</b>
-
-📅 <b>Sana:</b> {booking.date}
-🕐 <b>Vaqt:</b> {booking.time}
-👤 <b>Xizmat ko'rsatuvchi:</b> {booking.provider.user.full_name}
-
-<i>Navbat bekor qilindi. Yangi navbat olish uchun qayta murojaat qiling.</i>
-        """.strip()
-        
-        return self.send_message(booking.client.telegram_username, message)
+        return self.send_template(booking.client.telegram_username, 'telegram_booking_cancellation', {
+            'date': booking.date,
+            'time': booking.time,
+            'provider': booking.provider.user.full_name,
+        })
     
     def send_booking_reminder(self, booking, hours_remaining):
         """Send booking reminder message"""
@@ -88,21 +131,14 @@ class TelegramService:
             1: "🚨"
         }
         
-        emoji = emoji_map.get(hours_remaining, "⏰")
-        
-        message = f"""
-{emoji} <b>Navbat eslatmasi</b>
-
-📅 <b>Sana:</b> {booking.date}
-🕐 <b>Vaqt:</b> {booking.time}
-👤 <b>Xizmat ko'rsatuvchi:</b> {booking.provider.user.full_name}
-📍 <b>Manzil:</b> {booking.provider.location or 'Aniqlanmagan'}
-⏳ <b>Qolgan vaqt:</b> {hours_remaining} soat
-
-<i>Navbat vaqtida kelishingizni so'raymiz!</i>
-        """.strip()
-        
-        return self.send_message(booking.client.telegram_username, message)
+        return self.send_template(booking.client.telegram_username, 'telegram_booking_reminder', {
+            'emoji': emoji_map.get(hours_remaining, "⏰"),
+            'date': booking.date,
+            'time': booking.time,
+            'provider': booking.provider.user.full_name,
+            'location': booking.provider.location or 'Aniqlanmagan',
+            'hours': hours_remaining,
+        })
     
     def send_provider_notification(self, provider, message):
         """Send notification to provider"""
@@ -110,39 +146,28 @@ class TelegramService:
     
     def send_provider_next_queue(self, booking):
         """Send next queue notification to provider"""
-        message = f"""
-🔔 <b>Keyingi navbat eslatmasi</b>
-
-📅 <b>Sana:</b> {booking.date}
-🕐 <b>Vaqt:</b> {booking.time}
-👤 <b>Mijoz:</b> {booking.client.full_name}
-📞 <b>Telefon:</b> {booking.client.phone or 'Aniqlanmagan'}
-📝 <b>Izoh:</b> {booking.notes or 'Izoh yo\'q'}
-
-<i>1 soatdan keyin navbat boshlanadi!</i>
-        """.strip()
-        
-        return self.send_message(booking.provider.user.telegram_username, message)
+        return self.send_template(booking.provider.user.telegram_username, 'telegram_provider_next_queue', {
+            'date': booking.date,
+            'time': booking.time,
+            'client': booking.client.full_name,
+            'phone': booking.client.phone or 'Aniqlanmagan',
+            'notes': booking.notes or 'Izoh yo\'q',
+        })
     
     def send_provider_today_queues(self, provider, bookings):
         """Send today's queues to provider"""
-        message = f"""
-📋 <b>Bugungi navbatlar</b>
-
-👤 <b>Xizmat ko'rsatuvchi:</b> {provider.user.full_name}
-📅 <b>Sana:</b> {bookings.first().date if bookings else 'N/A'}
-
-"""
-        
-        for booking in bookings:
-            status_emoji = {
-                'pending': '⏳',
-                'confirmed': '✅',
-                'active': '🟢'
-            }.get(booking.status, '❓')
-            
-            message += f"{status_emoji} <b>{booking.time}</b> - {booking.client.full_name}\n"
-        
-        message += "\n<i>Bugungi navbatlar ro'yxati!</i>"
+        status_emoji = {
+            'pending': '⏳',
+            'confirmed': '✅',
+            'active': '🟢'
+        }
+        queues = [
+            [status_emoji.get(booking.status, '❓'), booking.time, booking.client.full_name]
+            for booking in bookings
+        ]
         
-        return self.send_message(provider.user.telegram_username, message)
+        return self.send_template(provider.user.telegram_username, 'telegram_provider_today_queues', {
+            'provider': provider.user.full_name,
+            'date': bookings[0].date if bookings else 'N/A',
+            'queues': queues,
+        })
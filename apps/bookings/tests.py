@@ -1,3 +1,506 @@
-from django.test import TestCase
+import gzip
+import json
+import sys
+import tempfile
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from unittest import mock
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from apps.services.models import Provider, Service
+from apps.users.models import User
+from . import task_queue
+from .archive_service import NotificationArchiveService
+from .booking_service import BookingService
+from .fake_telegram import FakeTelegramServer
+from .models import Booking, Notification, SlotHold
+from .notification_service import NotificationService
+from .reservation_service import ReservationService, SlotUnavailable
 
-# Create your tests here.
+
+def create_provider(username='provider', **user_fields):
+    """A provider working every day from 9:00 to 18:00"""
+    service = Service.objects.create(name='Haircut', duration_minutes=30)
+    user = User.objects.create_user(username=username, password='x', role='provider', **user_fields)
+    return Provider.objects.create(
+        user=user, service=service,
+        working_days=['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'],
+        start_time=time(9), end_time=time(18)
+    )
+
+
+class NotificationArchiveTests(TestCase):
+    """Archiving notifications to gzip JSONL files"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='client', password='x', role='client')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def create_old_notifications(self, count):
+        old = timezone.now() - timedelta(days=200)
+        Notification.objects.bulk_create([
+            Notification(user=self.user, type='booking_confirmed', template_key='booking_confirmed',
+                         is_sent=True, sent_at=old)
+            for _ in range(count)
+        ])
+
+    def archive(self):
+        return NotificationArchiveService.archive_notifications(
+            days=90, batch_size=2, destination='jsonl', output_dir=self.directory.name
+        )
+
+    def test_batches_read_back_as_one_file(self):
+        self.create_old_notifications(5)
+
+        result = self.archive()
+
+        files = list(Path(self.directory.name).iterdir())
+        self.assertEqual(result['archived'], 5)
+        self.assertEqual(len(files), 1)
+        with gzip.open(files[0], 'rt', encoding='utf-8') as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row['template_key'] for row in rows}, {'booking_confirmed'})
+        self.assertFalse(Notification.objects.exists())
+
+    def test_nothing_to_archive_writes_no_file(self):
+        result = self.archive()
+
+        self.assertEqual(result['archived'], 0)
+        self.assertEqual(list(Path(self.directory.name).iterdir()), [])
+
+    def test_failed_write_keeps_rows(self):
+        self.create_old_notifications(3)
+
+        with mock.patch('apps.bookings.archive_service.os.fsync', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.archive()
+
+        self.assertEqual(Notification.objects.count(), 3)
+        path, = Path(self.directory.name).iterdir()
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            self.assertEqual(archive.read(), '')
+
+
+class ReservationTests(TestCase):
+    """Holding and booking slots"""
+
+    def setUp(self):
+        self.provider = create_provider()
+        self.provider_user = self.provider.user
+        self.first = User.objects.create_user(username='first', password='x', role='client')
+        self.second = User.objects.create_user(username='second', password='x', role='client')
+        self.slot = (date.today() + timedelta(days=1), time(12))
+
+    def test_competing_clients_get_one_booking(self):
+        booking = ReservationService.book(self.first, self.provider, *self.slot)
+
+        with self.assertRaises(SlotUnavailable):
+            ReservationService.book(self.second, self.provider, *self.slot)
+
+        self.assertEqual(list(Booking.objects.values_list('id', flat=True)), [booking.id])
+        self.assertFalse(SlotHold.objects.exists())
+
+    def test_held_slot_goes_to_its_holder(self):
+        hold = ReservationService.acquire_hold(self.first, self.provider, *self.slot)
+
+        with self.assertRaises(SlotUnavailable):
+            ReservationService.book(self.second, self.provider, *self.slot)
+
+        booking = ReservationService.convert_hold(self.first, hold.token)
+        self.assertEqual(booking.client, self.first)
+        self.assertFalse(SlotHold.objects.exists())
+
+    def test_rejected_booking_frees_its_slot(self):
+        with self.assertRaisesMessage(ValueError, 'Providers cannot book services'):
+            ReservationService.book(self.provider_user, self.provider, *self.slot)
+        self.assertFalse(SlotHold.objects.exists())
+
+        booking = ReservationService.book(self.first, self.provider, *self.slot)
+        self.assertEqual(booking.client, self.first)
+
+    def test_failed_conversion_releases_hold(self):
+        with mock.patch.object(Booking, 'save', side_effect=ValueError('rejected')):
+            with self.assertRaises(ValueError):
+                ReservationService.book(self.first, self.provider, *self.slot)
+
+        self.assertFalse(SlotHold.objects.exists())
+
+    def test_slot_outside_working_hours_is_not_held(self):
+        with self.assertRaises(ValueError):
+            ReservationService.acquire_hold(self.first, self.provider, self.slot[0], time(20))
+        self.assertFalse(SlotHold.objects.exists())
+
+    def test_reschedule_moves_booking(self):
+        booking = ReservationService.book(self.first, self.provider, *self.slot)
+
+        ReservationService.reschedule(booking, self.slot[0], time(15))
+
+        booking.refresh_from_db()
+        self.assertEqual(booking.time, time(15))
+        self.assertFalse(SlotHold.objects.exists())
+
+    def test_reschedule_onto_held_slot_is_refused(self):
+        booking = ReservationService.book(self.first, self.provider, *self.slot)
+        hold = ReservationService.acquire_hold(self.second, self.provider, self.slot[0], time(15))
+
+        with self.assertRaises(SlotUnavailable):
+            ReservationService.reschedule(booking, self.slot[0], time(15))
+
+        booking.refresh_from_db()
+        self.assertEqual(booking.time, self.slot[1])
+        self.assertTrue(SlotHold.objects.filter(token=hold.token, user=self.second).exists())
+
+    def test_reschedule_view_reports_held_slot(self):
+        booking = ReservationService.book(self.first, self.provider, *self.slot)
+        ReservationService.acquire_hold(self.second, self.provider, self.slot[0], time(15))
+        self.client.force_login(self.first)
+
+        response = self.client.post(f'/bookings/{booking.id}/reschedule/', {
+            'date': str(self.slot[0]), 'time': '15:00',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([str(message) for message in response.context['messages']], ['Bu vaqt band'])
+        booking.refresh_from_db()
+        self.assertEqual(booking.time, self.slot[1])
+
+
+@override_settings(TASK_QUEUE_EAGER=True)
+class RescheduleTests(TestCase):
+    """Moving a booking moves its reminders"""
+
+    def setUp(self):
+        self.provider = create_provider()
+        self.user = User.objects.create_user(
+            username='client', password='x', role='client', telegram_username='client'
+        )
+
+    def book(self, days, hour=12):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                client=self.user, provider=self.provider,
+                date=timezone.localdate() + timedelta(days=days), time=time(hour)
+            )
+
+    def move(self, booking, days=None, hour=12, starts_at=None):
+        if starts_at is None:
+            starts_at = datetime.combine(timezone.localdate() + timedelta(days=days), time(hour))
+        booking.date, booking.time = starts_at.date(), starts_at.time()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+
+    def reminders(self, booking):
+        return {
+            notification.type: notification
+            for notification in Notification.objects.filter(booking=booking, scheduled_for__isnull=False)
+        }
+
+    def assertScheduledFor(self, booking, reminders):
+        starts_at = timezone.make_aware(datetime.combine(booking.date, booking.time))
+        offsets = dict(NotificationService.CUSTOMER_REMINDERS)
+        for notification_type, notification in reminders.items():
+            self.assertEqual(notification.scheduled_for, starts_at - offsets[notification_type])
+            self.assertEqual(notification.params['date'], str(booking.date))
+            self.assertEqual(notification.params['time'], str(booking.time))
+
+    def test_new_time_moves_reminders_in_place(self):
+        booking = self.book(days=5)
+        before = self.reminders(booking)
+        self.assertEqual(len(before), len(NotificationService.CUSTOMER_REMINDERS))
+
+        self.move(booking, days=5, hour=15)
+
+        after = self.reminders(booking)
+        self.assertEqual(
+            {notification_type: notification.id for notification_type, notification in after.items()},
+            {notification_type: notification.id for notification_type, notification in before.items()}
+        )
+        self.assertScheduledFor(booking, after)
+
+    def test_earlier_date_drops_past_reminders(self):
+        booking = self.book(days=5)
+
+        # 72h and 36h before have passed
+        starts_at = timezone.localtime() + timedelta(hours=30)
+        self.move(booking, starts_at=starts_at.replace(tzinfo=None, second=0, microsecond=0))
+
+        after = self.reminders(booking)
+        self.assertEqual(set(after), {'queue_reminder_24h', 'queue_reminder_3h', 'queue_reminder_1h'})
+        self.assertScheduledFor(booking, after)
+
+    def test_later_date_adds_reminders_that_became_due(self):
+        booking = self.book(days=2)
+        before = self.reminders(booking)
+
+        self.move(booking, days=5)
+
+        after = self.reminders(booking)
+        self.assertEqual(set(after), {notification_type for notification_type, _ in NotificationService.CUSTOMER_REMINDERS})
+        for notification_type, notification in before.items():
+            self.assertEqual(after[notification_type].id, notification.id)
+        self.assertScheduledFor(booking, after)
+
+    def test_notes_edit_leaves_reminders_alone(self):
+        booking = self.book(days=5)
+
+        booking.notes = 'Ertaroq kelaman'
+        with self.captureOnCommitCallbacks() as callbacks:
+            booking.save()
+
+        self.assertEqual(callbacks, [])
+
+    def test_new_client_rebuilds_reminders(self):
+        booking = self.book(days=5)
+        before = {notification.id for notification in self.reminders(booking).values()}
+        other = User.objects.create_user(
+            username='other', password='x', role='client', telegram_username='other'
+        )
+
+        booking.client = other
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+
+        after = self.reminders(booking)
+        self.assertEqual(len(after), len(NotificationService.CUSTOMER_REMINDERS))
+        self.assertEqual({notification.user_id for notification in after.values()}, {other.id})
+        self.assertFalse(before & {notification.id for notification in after.values()})
+
+    def test_new_provider_rebuilds_reminders(self):
+        booking = self.book(days=5)
+        other = create_provider('other_provider', telegram_username='other_provider')
+
+        booking.provider = other
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+
+        after = self.reminders(booking)
+        self.assertEqual(after['provider_next_queue'].user_id, other.user_id)
+        self.assertEqual(
+            set(after) - {'provider_next_queue'},
+            {notification_type for notification_type, _ in NotificationService.CUSTOMER_REMINDERS}
+        )
+
+
+class DailySchedulingTests(TestCase):
+    """Picking the bookings schedule_daily_notifications schedules"""
+
+    def setUp(self):
+        self.provider = create_provider()
+        self.user = User.objects.create_user(username='client', password='x', role='client')
+
+    def create_booking(self, hour, *notifications):
+        # bulk_create skips Booking.save(), which would schedule reminders
+        booking, = Booking.objects.bulk_create([
+            Booking(client=self.user, provider=self.provider, date=timezone.localdate(), time=time(hour))
+        ])
+        Notification.objects.bulk_create([
+            Notification(user=self.user, booking=booking, type=notification_type,
+                         template_key=notification_type, **fields)
+            for notification_type, fields in notifications
+        ])
+        return booking
+
+    def test_only_bookings_without_scheduled_reminders(self):
+        later = timezone.now() + timedelta(hours=1)
+        untouched = self.create_booking(9)
+        confirmation_pending = self.create_booking(10, ('booking_confirmed', {'is_sent': False}))
+        self.create_booking(11, ('queue_reminder_1h', {'scheduled_for': later, 'is_sent': False}))
+        self.create_booking(12, ('queue_reminder_1h', {'scheduled_for': later, 'is_sent': True}))
+
+        bookings = NotificationService.bookings_without_reminders(timezone.localdate())
+
+        self.assertEqual(
+            sorted(booking.id for booking in bookings),
+            sorted([untouched.id, confirmation_pending.id])
+        )
+
+
+class SendPendingTests(TestCase):
+    """Sending due reminders through the Bot API"""
+
+    def test_sends_every_due_notification(self):
+        user = User.objects.create_user(username='client', password='x', role='client', telegram_username='client')
+        due = timezone.now() - timedelta(minutes=1)
+        Notification.objects.bulk_create([
+            Notification(user=user, type='provider_message', title='Xabar', message=f'Xabar {i}',
+                         scheduled_for=due, is_sent=False)
+            for i in range(5)
+        ])
+
+        with FakeTelegramServer() as telegram, override_settings(
+            TELEGRAM_BOT_TOKEN='test', TELEGRAM_API_BASE_URL=telegram.url
+        ):
+            NotificationService.send_pending_notifications()
+
+        self.assertFalse(Notification.objects.filter(is_sent=False).exists())
+        self.assertEqual(telegram.snapshot()['stats']['sent'], 5)
+
+
+@override_settings(TASK_QUEUE_EAGER=True)
+class BulkTransitionTests(TestCase):
+    """BookingService.bulk_transition"""
+
+    def setUp(self):
+        self.provider = create_provider()
+        self.client_user = User.objects.create_user(
+            username='client', password='x', role='client', telegram_username='client'
+        )
+
+    def book(self, hour, provider=None, status=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.create(
+                client=self.client_user, provider=provider or self.provider,
+                date=timezone.localdate() + timedelta(days=5), time=time(hour)
+            )
+        if status:
+            # update() keeps the reminders, as if they were still due
+            Booking.objects.filter(id=booking.id).update(status=status)
+        return booking
+
+    def transition(self, ids, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BookingService.bulk_transition(self.provider.user, ids, action)
+
+    def test_disallowed_transitions_are_rejected(self):
+        pending = self.book(10)
+        confirmed = self.book(11, status='confirmed')
+        completed = self.book(12, status='completed')
+
+        result = self.transition([pending.id, confirmed.id, completed.id], 'confirm')
+
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual(result['results'], [
+            {'id': pending.id, 'success': True, 'status': 'confirmed'},
+            {'id': confirmed.id, 'success': False, 'error': 'Booking is not pending', 'status': 'confirmed'},
+            {'id': completed.id, 'success': False, 'error': 'Booking is not pending', 'status': 'completed'},
+        ])
+        self.assertEqual(
+            list(Booking.objects.order_by('time').values_list('status', flat=True)),
+            ['confirmed', 'confirmed', 'completed']
+        )
+
+    def test_unknown_action_is_refused(self):
+        with self.assertRaises(ValueError):
+            BookingService.bulk_transition(self.provider.user, [self.book(10).id], 'no_show')
+
+    def test_other_providers_bookings_are_not_touched(self):
+        theirs = self.book(10, provider=create_provider('other_provider'))
+
+        result = self.transition([theirs.id], 'cancel')
+
+        self.assertEqual(result['results'], [{'id': theirs.id, 'success': False, 'error': 'Booking not found'}])
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.status, 'pending')
+
+    def test_side_effects_only_for_transitioned_bookings(self):
+        cancelled = self.book(10)
+        completed = self.book(11, status='completed')
+        theirs = self.book(12, provider=create_provider('other_provider'))
+
+        with mock.patch.object(
+            NotificationService, 'cancel_scheduled_notifications',
+            wraps=NotificationService.cancel_scheduled_notifications
+        ) as cancel_scheduled:
+            self.transition([cancelled.id, completed.id, theirs.id], 'cancel')
+
+        cancel_scheduled.assert_called_once_with([cancelled.id])
+        reminders = Notification.objects.filter(scheduled_for__isnull=False, is_sent=False)
+        self.assertFalse(reminders.filter(booking=cancelled).exists())
+        self.assertTrue(reminders.filter(booking=completed).exists())
+        self.assertTrue(reminders.filter(booking=theirs).exists())
+        self.assertEqual(
+            list(Notification.objects.filter(template_key='booking_cancelled').values_list('booking_id', flat=True)),
+            [cancelled.id]
+        )
+
+    def test_nothing_transitioned_has_no_side_effects(self):
+        completed = self.book(10, status='completed')
+
+        with mock.patch.object(NotificationService, 'emit') as emit:
+            result = self.transition([completed.id], 'cancel')
+
+        self.assertEqual(result['updated'], 0)
+        emit.assert_not_called()
+
+    def test_id_limit(self):
+        self.client.force_login(self.provider.user)
+        booking = self.book(10)
+
+        response = self.client.post('/api/bookings/bulk/', {
+            'action': 'confirm', 'ids': [booking.id] + list(range(10**6, 10**6 + BookingService.MAX_BULK_IDS)),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ids', response.json())
+
+        response = self.client.post('/api/bookings/bulk/', {
+            'action': 'confirm', 'ids': [booking.id] + list(range(10**6, 10**6 + BookingService.MAX_BULK_IDS - 1)),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 1)
+
+
+class TaskQueueTests(TestCase):
+    """enqueue() runs side effects after commit, on Celery or the thread pool"""
+
+    path = 'apps.bookings.notification_service.NotificationService.send_pending_notifications'
+
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_runs_after_commit(self):
+        with mock.patch.object(task_queue, 'run') as run:
+            with self.captureOnCommitCallbacks() as callbacks:
+                task_queue.enqueue(self.path, 1, key='value')
+            run.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+
+        run.assert_called_once_with(self.path, (1,), {'key': 'value'})
+
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_dropped_on_rollback(self):
+        with mock.patch.object(task_queue, 'run') as run:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                try:
+                    with transaction.atomic():
+                        task_queue.enqueue(self.path)
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+
+        self.assertEqual(callbacks, [])
+        run.assert_not_called()
+
+    @override_settings(TASK_QUEUE_EAGER=False)
+    def test_sent_to_celery_when_configured(self):
+        tasks = mock.Mock()
+        with mock.patch.object(task_queue, 'uses_celery', return_value=True), \
+                mock.patch.dict(sys.modules, {'apps.bookings.tasks': tasks}), \
+                mock.patch.object(task_queue, '_get_executor') as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                task_queue.enqueue(self.path, 1)
+
+        tasks.run_queued_task.delay.assert_called_once_with(self.path, [1], {})
+        get_executor.assert_not_called()
+
+    @override_settings(TASK_QUEUE_EAGER=False)
+    def test_falls_back_to_thread_pool(self):
+        with mock.patch.object(task_queue, 'uses_celery', return_value=False), \
+                mock.patch.object(task_queue, '_get_executor') as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                task_queue.enqueue(self.path, 1)
+
+        get_executor.return_value.submit.assert_called_once_with(
+            task_queue._run_in_thread, self.path, (1,), {}
+        )
+
+    @override_settings(DEBUG=False, TASK_QUEUE_EAGER=False)
+    def test_warns_about_thread_pool_outside_debug(self):
+        with mock.patch.object(task_queue, 'uses_celery', return_value=False):
+            with self.assertLogs(task_queue.logger, 'WARNING'):
+                task_queue.warn_if_not_durable()
+
+            with override_settings(DEBUG=True), self.assertNoLogs(task_queue.logger, 'WARNING'):
+                task_queue.warn_if_not_durable()
@@ -7,6 +7,8 @@ urlpatterns = [
     # Booking URLs
     path('', views.booking_list_view, name='list'),
     path('create/<int:provider_id>/', views.booking_create_view, name='create'),
+    path('hold/<int:provider_id>/', views.booking_hold_view, name='hold'),
+    path('hold/release/', views.booking_hold_release_view, name='hold_release'),
     path('success/<int:booking_id>/', views.booking_success_view, name='success'),
     path('<int:booking_id>/', views.booking_detail_view, name='detail'),
     
@@ -15,6 +17,7 @@ urlpatterns = [
     path('<int:booking_id>/confirm/', views.booking_confirm_view, name='confirm'),
     path('<int:booking_id>/complete/', views.booking_complete_view, name='complete'),
     path('<int:booking_id>/reschedule/', views.booking_reschedule_view, name='reschedule'),
+    path('bulk/', views.booking_bulk_action_view, name='bulk'),
     
     # Booking Management
     path('calendar/', views.booking_calendar_view, name='calendar'),
@@ -5,10 +5,15 @@ from django.http import JsonResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
+import json
 from datetime import date, time, timedelta
 from .models import Booking, Notification
+from .notification_service import NotificationService
+from .booking_service import BookingService
+from .reservation_service import ReservationService, SlotUnavailable, HoldInvalid
 from apps.services.models import Provider
 from apps.users.models import User
+from queue_management.replicas import replica_reads
 
 
 @login_required
@@ -64,35 +69,36 @@ def booking_create_view(request, provider_id):
             messages.error(request, f'Bu vaqt {provider.user.full_name} uchun ish vaqti emas ({provider.start_time} - {provider.end_time})')
             return render(request, 'bookings/create.html', {'provider': provider})
         
-        # Check if slot is available
-        existing_booking = Booking.objects.filter(
-            provider=provider,
-            date=booking_date,
-            time=booking_time,
-            status__in=['pending', 'confirmed', 'active']
-        ).exists()
-        
-        if existing_booking:
+        # Convert the hold taken when the slot was picked, or hold and
+        # book in one step
+        hold_token = request.POST.get('hold_token')
+        try:
+            if hold_token:
+                booking = ReservationService.convert_hold(
+                    request.user, hold_token, notes,
+                    provider=provider, date=booking_date_obj, time=booking_time_obj
+                )
+            else:
+                booking = ReservationService.book(
+                    request.user, provider, booking_date_obj, booking_time_obj, notes
+                )
+        except SlotUnavailable:
             messages.error(request, 'Bu vaqt band')
             return render(request, 'bookings/create.html', {'provider': provider})
-        
-        # Create booking
-        booking = Booking.objects.create(
-            client=request.user,
-            provider=provider,
-            date=date.fromisoformat(booking_date),
-            time=time.fromisoformat(booking_time),
-            notes=notes,
-            status='pending'
-        )
+        except HoldInvalid:
+            messages.error(request, 'Vaqtni band qilish muddati tugadi, qaytadan urinib ko\'ring')
+            return render(request, 'bookings/create.html', {'provider': provider})
+        except ValueError as e:
+            messages.error(request, str(e))
+            return render(request, 'bookings/create.html', {'provider': provider})
         
         # Create notification for provider
-        Notification.objects.create(
-            user=provider.user,
+        NotificationService.notify(
+            provider.user,
+            'booking_created',
+            NotificationService.booking_params(booking),
             booking=booking,
-            type='booking_confirmed',
-            title='Yangi buyurtma',
-            message=f'{request.user.full_name} sizga buyurtma berdi. Sana: {booking_date}, Vaqt: {booking_time}'
+            notification_type='booking_confirmed'
         )
         
         messages.success(request, 'Buyurtma muvaffaqiyatli yaratildi!')
@@ -101,6 +107,40 @@ def booking_create_view(request, provider_id):
     return render(request, 'bookings/create.html', {'provider': provider})
 
 
+@login_required
+@require_POST
+def booking_hold_view(request, provider_id):
+    """Hold a time slot while the client confirms the booking"""
+    provider = get_object_or_404(Provider, id=provider_id, is_accepting=True)
+    
+    try:
+        booking_date = date.fromisoformat(request.POST.get('date', ''))
+        booking_time = time.fromisoformat(request.POST.get('time', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Noto\'g\'ri sana yoki vaqt formati'})
+    
+    try:
+        hold = ReservationService.acquire_hold(request.user, provider, booking_date, booking_time)
+    except SlotUnavailable:
+        return JsonResponse({'success': False, 'error': 'Bu vaqt band'})
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+    
+    return JsonResponse({
+        'success': True,
+        'token': hold.token,
+        'expires_at': hold.expires_at.isoformat()
+    })
+
+
+@login_required
+@require_POST
+def booking_hold_release_view(request):
+    """Release a slot hold"""
+    released = ReservationService.release_hold(request.user, request.POST.get('token', ''))
+    return JsonResponse({'success': released})
+
+
 @login_required
 def booking_success_view(request, booking_id):
     """Booking success page"""
@@ -123,16 +163,14 @@ def booking_cancel_view(request, booking_id):
         if not booking.can_be_cancelled():
             return JsonResponse({'success': False, 'error': 'Cannot cancel this booking'})
         
-        booking.status = 'cancelled'
-        booking.save()
+        booking.transition_to('cancelled')
         
         # Create notification
-        Notification.objects.create(
-            user=booking.client if booking.provider.user == request.user else booking.provider.user,
-            booking=booking,
-            type='booking_cancelled',
-            title='Buyurtma bekor qilindi',
-            message=f'Buyurtma bekor qilindi. Sana: {booking.date}, Vaqt: {booking.time}'
+        NotificationService.notify(
+            booking.client if booking.provider.user == request.user else booking.provider.user,
+            'booking_cancelled',
+            NotificationService.booking_params(booking),
+            booking=booking
         )
         
         return JsonResponse({'success': True})
@@ -149,28 +187,10 @@ def booking_confirm_view(request, booking_id):
     if not request.user.is_provider():
         return JsonResponse({'success': False, 'error': 'Unauthorized'})
     
-    try:
-        booking = Booking.objects.get(id=booking_id, provider__user=request.user)
-        
-        if booking.status != 'pending':
-            return JsonResponse({'success': False, 'error': 'Booking is not pending'})
-        
-        booking.status = 'confirmed'
-        booking.save()
-        
-        # Create notification for client
-        Notification.objects.create(
-            user=booking.client,
-            booking=booking,
-            type='booking_confirmed',
-            title='Buyurtma tasdiqlandi',
-            message=f'Buyurtmangiz tasdiqlandi. Sana: {booking.date}, Vaqt: {booking.time}'
-        )
-        
-        return JsonResponse({'success': True})
-        
-    except Booking.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Booking not found'})
+    result = BookingService.bulk_transition(request.user, [booking_id], 'confirm')['results'][0]
+    if not result['success']:
+        return JsonResponse({'success': False, 'error': result['error']})
+    return JsonResponse({'success': True})
 
 
 @login_required
@@ -192,28 +212,41 @@ def booking_complete_view(request, booking_id):
     if not request.user.is_provider():
         return JsonResponse({'success': False, 'error': 'Unauthorized'})
     
+    result = BookingService.bulk_transition(request.user, [booking_id], 'complete')['results'][0]
+    if not result['success']:
+        return JsonResponse({'success': False, 'error': result['error']})
+    return JsonResponse({'success': True})
+
+
+@login_required
+@require_POST
+@csrf_exempt
+def booking_bulk_action_view(request):
+    """Confirm, complete or cancel many bookings at once (for providers)"""
+    if not request.user.is_provider():
+        return JsonResponse({'success': False, 'error': 'Unauthorized'})
+    
+    # JSON body {"action": ..., "ids": [...]} or form fields action / ids
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid JSON'})
+        action, booking_ids = data.get('action'), data.get('ids') or []
+    else:
+        action, booking_ids = request.POST.get('action'), request.POST.getlist('ids')
+    
+    if action not in BookingService.TRANSITIONS:
+        return JsonResponse({'success': False, 'error': 'Unknown action'})
     try:
-        booking = Booking.objects.get(id=booking_id, provider__user=request.user)
-        
-        if booking.status not in ['confirmed', 'active']:
-            return JsonResponse({'success': False, 'error': 'Booking cannot be completed'})
-        
-        booking.status = 'completed'
-        booking.save()
-        
-        # Create notification for client
-        Notification.objects.create(
-            user=booking.client,
-            booking=booking,
-            type='booking_completed',
-            title='Xizmat yakunlandi',
-            message=f'Xizmat muvaffaqiyatli yakunlandi. Rahmat!'
-        )
-        
-        return JsonResponse({'success': True})
-        
-    except Booking.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Booking not found'})
+        booking_ids = [int(booking_id) for booking_id in booking_ids]
+    except (TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Invalid booking ids'})
+    if not booking_ids or len(booking_ids) > BookingService.MAX_BULK_IDS:
+        return JsonResponse({'success': False, 'error': f'Send 1-{BookingService.MAX_BULK_IDS} booking ids'})
+    
+    result = BookingService.bulk_transition(request.user, booking_ids, action)
+    return JsonResponse({'success': True, **result})
 
 
 @login_required
@@ -230,23 +263,33 @@ def booking_reschedule_view(request, booking_id):
         reason = request.POST.get('reason', '')
         
         try:
-            booking.date = date.fromisoformat(new_date)
-            booking.time = time.fromisoformat(new_time)
-            booking.save()
-            
-            # Create notification
-            Notification.objects.create(
-                user=booking.client if booking.provider.user == request.user else booking.provider.user,
-                booking=booking,
-                type='booking_updated',
-                title='Buyurtma qayta belgilandi',
-                message=f'Buyurtma yangi vaqtga ko\'chirildi: {new_date} {new_time}'
-            )
-            
-            messages.success(request, 'Buyurtma muvaffaqiyatli qayta belgilandi')
-            return redirect('bookings:detail', booking_id=booking.id)
-        except Exception as e:
-            messages.error(request, f'Xatolik yuz berdi: {str(e)}')
+            booking_date = date.fromisoformat(new_date or '')
+            booking_time = time.fromisoformat(new_time or '')
+        except ValueError:
+            messages.error(request, 'Noto\'g\'ri sana yoki vaqt formati')
+            return render(request, 'bookings/reschedule.html', {'booking': booking})
+        
+        try:
+            ReservationService.reschedule(booking, booking_date, booking_time)
+        except SlotUnavailable:
+            messages.error(request, 'Bu vaqt band')
+            booking.refresh_from_db()
+            return render(request, 'bookings/reschedule.html', {'booking': booking})
+        except ValueError as e:
+            messages.error(request, str(e))
+            booking.refresh_from_db()
+            return render(request, 'bookings/reschedule.html', {'booking': booking})
+        
+        # Create notification
+        NotificationService.notify(
+            booking.client if booking.provider.user == request.user else booking.provider.user,
+            'booking_updated',
+            NotificationService.booking_params(booking),
+            booking=booking
+        )
+        
+        messages.success(request, 'Buyurtma muvaffaqiyatli qayta belgilandi')
+        return redirect('bookings:detail', booking_id=booking.id)
     
     return render(request, 'bookings/reschedule.html', {'booking': booking})
 
@@ -266,6 +309,7 @@ def booking_calendar_view(request):
     return render(request, 'bookings/calendar.html', {'bookings': bookings})
 
 
+@replica_reads
 @login_required
 def booking_export_view(request):
     """Export bookings to CSV"""
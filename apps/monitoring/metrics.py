@@ -0,0 +1,267 @@
+"""
+Prometheus-style counters, gauges and histograms.
+
+Values live in the default cache. Only a shared cache (Redis, when
+REDIS_URL is set, see settings.CACHES) lets web workers, Celery workers and
+management commands add to the same series. With the LocMemCache fallback
+every process keeps its own values, and /monitoring/metrics/ only reports
+the process that answered the scrape: use it with a single process only.
+Updates are buffered in the process and
+written with one cache.incr per changed series at most every
+FLUSH_SECONDS; recording a value is only a dict update. Call
+registry.flush() before a short-lived process exits (an atexit hook does
+it too).
+
+Values are stored as integers in millionths, so fractional amounts such
+as seconds can be added with cache.incr. Each metric keeps an index of
+its label values so render() can list every series.
+"""
+
+import atexit
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'metrics:'
+SCALE = 1000000
+FLUSH_SECONDS = 1.0
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    """Metrics of this process and the buffer of updates not yet written"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.pending = defaultdict(int)
+        self.new_series = set()
+        self.indexed = set()
+        self.last_flush = time.monotonic()
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add(self, metric, labels, suffix, amount):
+        """Buffer `amount` for one value of a series"""
+        key = metric.key(labels, suffix)
+        with self.lock:
+            self.pending[key] += round(amount * SCALE)
+            if (metric.name, labels) not in self.indexed:
+                self.new_series.add((metric.name, labels))
+            due = time.monotonic() - self.last_flush >= FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def set(self, metric, labels, value):
+        """Write a gauge value straight away"""
+        key = metric.key(labels, '')
+        with self.lock:
+            self.pending.pop(key, None)
+        cache.set(key, round(value * SCALE), None)
+        self._index({(metric.name, labels)})
+
+    def flush(self):
+        """Write the buffered updates to the cache"""
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(int)
+            new_series, self.new_series = self.new_series, set()
+            self.last_flush = time.monotonic()
+        try:
+            for key, amount in pending.items():
+                if amount:
+                    _incr(key, amount)
+            self._index(new_series)
+        except Exception as e:
+            # Metrics must never break the code being measured
+            logger.warning(f"Could not flush metrics: {e}")
+
+    def _index(self, series):
+        by_metric = defaultdict(set)
+        for name, labels in series:
+            by_metric[name].add(labels)
+        for name, labels in by_metric.items():
+            key = f'{PREFIX}{name}:index'
+            index = cache.get(key) or []
+            missing = [list(value) for value in labels if list(value) not in index]
+            if missing:
+                cache.set(key, index + missing, None)
+            with self.lock:
+                self.indexed.update((name, value) for value in labels)
+
+    def collect(self):
+        """{metric name: (metric, [(labels dict, values dict)])} of every series"""
+        self.flush()
+        collected = {}
+        for name, metric in self.metrics.items():
+            index = cache.get(f'{PREFIX}{name}:index') or []
+            series = [tuple(labels) for labels in index]
+            keys = {
+                (labels, suffix): metric.key(labels, suffix)
+                for labels in series for suffix in metric.suffixes()
+            }
+            stored = cache.get_many(list(keys.values()))
+            collected[name] = (metric, [
+                (
+                    dict(zip(metric.labelnames, labels)),
+                    {suffix: stored.get(keys[labels, suffix], 0) / SCALE for suffix in metric.suffixes()},
+                )
+                for labels in series
+            ])
+        return collected
+
+    def render(self):
+        """Every series in the Prometheus text format"""
+        lines = []
+        for name, (metric, series) in self.collect().items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for labels, values in series:
+                lines.extend(metric.render(labels, values))
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        """Drop every stored value, e.g. between benchmark runs"""
+        with self.lock:
+            self.pending.clear()
+            self.new_series.clear()
+            self.indexed.clear()
+        for name, (metric, series) in self.collect().items():
+            cache.delete_many([
+                metric.key(tuple(labels.values()), suffix)
+                for labels, _ in series for suffix in metric.suffixes()
+            ] + [f'{PREFIX}{name}:index'])
+
+
+def _incr(key, amount):
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, None):
+            cache.incr(key, amount)
+
+
+def _format_labels(labels, **extra):
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def labels_key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {', '.join(self.labelnames) or 'none'}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def key(self, labels, suffix):
+        digest = hashlib.md5(json.dumps(labels).encode('utf-8')).hexdigest()[:16]
+        return f'{PREFIX}{self.name}:{digest}:{suffix}'
+
+    def suffixes(self):
+        return ['']
+
+    def render(self, labels, values):
+        return [f'{self.name}{_format_labels(labels)} {_format_value(values[""])}']
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        registry.add(self, self.labels_key(labels), '', amount)
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        registry.add(self, self.labels_key(labels), '', amount)
+
+    def dec(self, amount=1, **labels):
+        registry.add(self, self.labels_key(labels), '', -amount)
+
+    def set(self, value, **labels):
+        registry.set(self, self.labels_key(labels), value)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        labels = self.labels_key(labels)
+        bucket = next((str(bound) for bound in self.buckets if value <= bound), '+Inf')
+        registry.add(self, labels, f'bucket:{bucket}', 1)
+        registry.add(self, labels, 'count', 1)
+        registry.add(self, labels, 'sum', value)
+
+    def suffixes(self):
+        return [f'bucket:{bound}' for bound in self.buckets] + ['bucket:+Inf', 'count', 'sum']
+
+    def cumulative(self, values):
+        """[(upper bound, observations <= bound)] including +Inf"""
+        total = 0
+        buckets = []
+        for bound in [*self.buckets, float('inf')]:
+            total += values[f"bucket:{'+Inf' if bound == float('inf') else bound}"]
+            buckets.append((bound, total))
+        return buckets
+
+    def quantile(self, q, values):
+        """Estimate a quantile by interpolating inside its bucket"""
+        count = values['count']
+        if not count:
+            return None
+        rank = q * count
+        lower, below = 0.0, 0
+        for bound, total in self.cumulative(values):
+            if total >= rank:
+                if bound == float('inf'):
+                    return lower
+                inside = total - below
+                return lower + (bound - lower) * ((rank - below) / inside if inside else 0)
+            lower, below = bound, total
+        return lower
+
+    def render(self, labels, values):
+        lines = [
+            f"{self.name}_bucket{_format_labels(labels, le='+Inf' if bound == float('inf') else bound)} {_format_value(total)}"
+            for bound, total in self.cumulative(values)
+        ]
+        lines.append(f'{self.name}_count{_format_labels(labels)} {_format_value(values["count"])}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(values["sum"])}')
+        return lines
@@ -0,0 +1,168 @@
+"""
+Per-request performance metrics.
+
+RequestMetricsMiddleware records for every request the number of SQL
+queries, the time spent in the database, in the view and in rendering the
+response (template rendering and DRF serialization run lazily after the
+view returns), and flags N+1 patterns: the same query fingerprint run
+settings.REQUEST_METRICS_N_PLUS_ONE_THRESHOLD times or more.
+
+Each request gets a Server-Timing header and a JSON log line on the
+``apps.monitoring.requests`` logger (INFO when slow or N+1, DEBUG
+otherwise), and feeds the per-endpoint histograms served by
+/monitoring/metrics/.
+"""
+
+import json
+import re
+import time
+from collections import Counter as Tally
+from django.conf import settings
+from django.db import connections
+import logging
+from .metrics import Counter, Histogram
+
+logger = logging.getLogger('apps.monitoring.requests')
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Time spent handling the request', ['endpoint', 'method'],
+)
+request_db_duration = Histogram(
+    'http_request_db_duration_seconds', 'Time spent running SQL queries', ['endpoint', 'method'],
+)
+request_render_duration = Histogram(
+    'http_request_render_duration_seconds', 'Time spent rendering or serializing the response',
+    ['endpoint', 'method'],
+)
+request_queries = Histogram(
+    'http_request_queries', 'SQL queries per request', ['endpoint', 'method'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+request_n_plus_one = Counter(
+    'http_request_n_plus_one_total', 'Requests that repeated a query fingerprint', ['endpoint', 'method'],
+)
+responses = Counter(
+    'http_responses_total', 'Responses by status code', ['endpoint', 'method', 'status'],
+)
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LISTS = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL with literals and IN lists collapsed, so repeats compare equal"""
+    sql = STRINGS.sub('?', sql)
+    sql = NUMBERS.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = IN_LISTS.sub('IN (...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """execute_wrapper that counts and times queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Tally()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+
+class RequestMetricsMiddleware:
+    """Query, timing and N+1 metrics for every request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True)
+        self.slow_seconds = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 500) / 1000
+        self.n_plus_one_threshold = getattr(settings, 'REQUEST_METRICS_N_PLUS_ONE_THRESHOLD', 5)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._metrics = {}
+        start = time.perf_counter()
+        wrappers = [connection.execute_wrapper(recorder) for connection in connections.all()]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        try:
+            response = self.get_response(request)
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+        end = time.perf_counter()
+
+        self.record(request, response, recorder, start, end)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.enabled:
+            request._metrics['view_start'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # The view has returned; rendering happens after this hook
+        if self.enabled:
+            request._metrics['view_end'] = time.perf_counter()
+        return response
+
+    def record(self, request, response, recorder, start, end):
+        marks = request._metrics
+        view_start = marks.get('view_start', start)
+        view_end = marks.get('view_end', end)
+        timings = {
+            'total': end - start,
+            'db': recorder.duration,
+            'view': view_end - view_start,
+            # Template rendering / DRF serialization run between the
+            # template response hook and the end of the middleware chain
+            'render': end - view_end,
+        }
+
+        repeated = [
+            {'fingerprint': sql[:300], 'count': count}
+            for sql, count in recorder.fingerprints.most_common()
+            if count >= self.n_plus_one_threshold
+        ]
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.route or match.view_name) if match else 'unmatched'
+        labels = {'endpoint': endpoint, 'method': request.method}
+        request_duration.observe(timings['total'], **labels)
+        request_db_duration.observe(timings['db'], **labels)
+        request_render_duration.observe(timings['render'], **labels)
+        request_queries.observe(recorder.count, **labels)
+        responses.inc(status=response.status_code, **labels)
+        if repeated:
+            request_n_plus_one.inc(**labels)
+
+        if self.server_timing:
+            response.headers['Server-Timing'] = ', '.join(
+                f'{name};dur={seconds * 1000:.1f}' for name, seconds in timings.items()
+            ) + f', queries;desc="{recorder.count} queries"'
+
+        level = logging.INFO if repeated or timings['total'] >= self.slow_seconds else logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': endpoint,
+                'status': response.status_code,
+                'user_id': getattr(getattr(request, 'user', None), 'pk', None),
+                'queries': recorder.count,
+                **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in timings.items()},
+                'n_plus_one': repeated,
+            }, ensure_ascii=False))
@@ -0,0 +1,234 @@
+"""
+Opt-in profiling of management commands and Celery tasks.
+
+A profiled run writes timestamped files to settings.PROFILING_DIR:
+
+- ``<name>-<timestamp>-<pid>.folded``: stack samples taken every
+  PROFILING_SAMPLE_INTERVAL seconds in ``sample`` mode (the default). One
+  ``frame;frame;frame count`` line per stack, which flamegraph.pl and
+  speedscope open directly. Only a background thread reading the stack
+  costs anything, so it is cheap enough for production runs.
+- ``<name>-<timestamp>-<pid>.prof``: cProfile stats in ``cprofile`` mode
+  (snakeviz, ``python -m pstats``, gprof2dot). Exact call counts, but
+  deterministic profiling slows Python-heavy code down noticeably.
+- ``<name>-<timestamp>-<pid>-sql.jsonl``: every query with its offset and
+  duration (SQL text only, parameters are not written).
+- ``<name>-<timestamp>-<pid>.txt``: summary with the slowest functions and
+  the query fingerprints that took the most time.
+
+Commands get a ``--profile`` flag from ProfileCommandMixin, tasks use the
+``profiled`` decorator. Without the flag a run is profiled with
+probability settings.PROFILING_SAMPLE_RATE, so a share of production runs
+can be captured.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from pathlib import Path
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+import logging
+from .middleware import fingerprint
+
+logger = logging.getLogger(__name__)
+
+MODES = ('sample', 'cprofile')
+
+
+def should_profile():
+    """Whether an unflagged run is picked for profiling"""
+    rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+    return rate > 0 and random.random() < rate
+
+
+class StackSampler:
+    """Samples the stack of one thread from a background thread"""
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def write_folded(self, path):
+        with open(path, 'w', encoding='utf-8') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f'{stack} {count}\n')
+
+    def summary(self, limit=25):
+        """Frames by share of samples they were running in (self) or on the stack (total)"""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        samples = self.samples or 1
+        lines = [f'{self.samples} samples every {self.interval * 1000:.1f} ms', '', 'Self time:']
+        lines += [f'  {count / samples:6.1%}  {frame}' for frame, count in own.most_common(limit)]
+        lines += ['', 'Total time:']
+        lines += [f'  {count / samples:6.1%}  {frame}' for frame, count in total.most_common(limit)]
+        return lines
+
+
+class QueryLog:
+    """execute_wrapper writing every query to a JSONL file"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.start = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        self.by_fingerprint = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            stats = self.by_fingerprint[fingerprint(sql)]
+            stats[0] += 1
+            stats[1] += duration
+            self.file.write(json.dumps({
+                'offset': round(start - self.start, 6),
+                'ms': round(duration * 1000, 3),
+                'alias': context['connection'].alias,
+                'many': many,
+                'sql': sql,
+            }) + '\n')
+
+    def close(self):
+        self.file.close()
+
+    def summary(self, limit=15):
+        lines = [f'{self.count} queries, {self.duration * 1000:.1f} ms in the database', '', 'Slowest fingerprints:']
+        slowest = sorted(self.by_fingerprint.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        lines += [
+            f'  {duration * 1000:9.1f} ms  {count:6d}x  {sql[:200]}'
+            for sql, (count, duration) in slowest
+        ]
+        return lines
+
+
+@contextmanager
+def profile_run(name, mode=None, output_dir=None):
+    """Profile the enclosed block and write its files; yields the path prefix"""
+    mode = mode or getattr(settings, 'PROFILING_MODE', 'sample')
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode {mode!r}, expected one of {', '.join(MODES)}")
+    directory = Path(output_dir or getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles'))
+    directory.mkdir(parents=True, exist_ok=True)
+    base = directory / f"{name}-{timezone.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+    queries = QueryLog(f'{base}-sql.jsonl')
+    profiler = sampler = None
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        stack.callback(queries.close)
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(queries))
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            stack.callback(profiler.disable)
+        else:
+            sampler = StackSampler(getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005))
+            sampler.start()
+            stack.callback(sampler.stop)
+        try:
+            yield base
+        finally:
+            stack.close()
+            elapsed = time.perf_counter() - start
+            lines = [f'{name}: {elapsed:.3f}s wall time, {mode} mode', '']
+            if profiler is not None:
+                profiler.dump_stats(f'{base}.prof')
+                report = io.StringIO()
+                pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(30)
+                lines.append(report.getvalue())
+            else:
+                sampler.write_folded(f'{base}.folded')
+                lines += sampler.summary()
+            lines += [''] + queries.summary()
+            Path(f'{base}.txt').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+            logger.info(f"Profile of {name} written to {base}.*")
+
+
+def profiled(name=None, mode=None):
+    """Profile a task when settings.PROFILING_SAMPLE_RATE picks the run"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not should_profile():
+                return func(*args, **kwargs)
+            with profile_run(name or func.__name__, mode):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProfileCommandMixin:
+    """Adds --profile / --profile-mode / --profile-dir to a management command"""
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help='Profile this run and write the profile and SQL log to timestamped files',
+        )
+        parser.add_argument(
+            '--profile-mode',
+            choices=MODES,
+            help='Stack sampling (low overhead) or cProfile (default: PROFILING_MODE)',
+        )
+        parser.add_argument(
+            '--profile-dir',
+            help='Directory for the profile files (default: PROFILING_DIR)',
+        )
+        return parser
+
+    def execute(self, *args, **options):
+        if not (options.get('profile') or should_profile()):
+            return super().execute(*args, **options)
+        name = self.__module__.rsplit('.', 1)[-1]
+        with profile_run(name, options.get('profile_mode'), options.get('profile_dir')) as base:
+            result = super().execute(*args, **options)
+        self.stdout.write(f'Profile written to {base}.*')
+        return result
@@ -0,0 +1,146 @@
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from apps.users.models import User
+from . import metrics, middleware
+
+
+class MetricsTests(SimpleTestCase):
+    """Counters, histograms and the Prometheus text output"""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(metrics, 'registry', metrics.Registry())
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.jobs = metrics.Counter('test_jobs_total', 'Jobs run', ['job'])
+        self.durations = metrics.Histogram('test_job_seconds', 'Job duration', buckets=(1.0, 0.1, 0.5))
+
+    def values(self, name):
+        return self.registry.collect()[name][1]
+
+    def test_counter_adds_up_per_label_value(self):
+        self.jobs.inc(job='archive')
+        self.jobs.inc(2, job='archive')
+        self.jobs.inc(job='reminders')
+
+        self.assertCountEqual(self.values('test_jobs_total'), [
+            ({'job': 'archive'}, {'': 3}),
+            ({'job': 'reminders'}, {'': 1}),
+        ])
+
+    def test_counter_rejects_unknown_labels(self):
+        with self.assertRaises(ValueError):
+            self.jobs.inc(queue='high')
+
+    def test_histogram_buckets(self):
+        for value in (0.05, 0.1, 0.3, 2):
+            self.durations.observe(value)
+
+        (labels, values), = self.values('test_job_seconds')
+
+        self.assertEqual(self.durations.buckets, (0.1, 0.5, 1.0))
+        self.assertEqual(
+            [values[f'bucket:{bound}'] for bound in ('0.1', '0.5', '1.0', '+Inf')], [2, 1, 0, 1]
+        )
+        self.assertEqual(
+            self.durations.cumulative(values), [(0.1, 2), (0.5, 3), (1.0, 3), (float('inf'), 4)]
+        )
+        self.assertEqual((values['count'], values['sum']), (4, 2.45))
+
+    def test_quantile_interpolates_inside_bucket(self):
+        for value in [0.05] * 5 + [0.3] * 5:
+            self.durations.observe(value)
+        (labels, values), = self.values('test_job_seconds')
+
+        self.assertAlmostEqual(self.durations.quantile(0.5, values), 0.1)
+        self.assertAlmostEqual(self.durations.quantile(0.9, values), 0.42)
+
+    def test_quantile_edges(self):
+        self.assertIsNone(self.durations.quantile(0.5, {'count': 0}))
+
+        self.durations.observe(5)
+        (labels, values), = self.values('test_job_seconds')
+
+        # Above the last bound the estimate is that bound
+        self.assertEqual(self.durations.quantile(0.99, values), 1.0)
+
+    def test_render(self):
+        self.jobs.inc(2, job='say "hi"')
+        self.durations.observe(0.25)
+        self.durations.observe(2)
+
+        self.assertEqual(self.registry.render(), '\n'.join([
+            '# HELP test_jobs_total Jobs run',
+            '# TYPE test_jobs_total counter',
+            'test_jobs_total{job="say \\"hi\\""} 2',
+            '# HELP test_job_seconds Job duration',
+            '# TYPE test_job_seconds histogram',
+            'test_job_seconds_bucket{le="0.1"} 0',
+            'test_job_seconds_bucket{le="0.5"} 1',
+            'test_job_seconds_bucket{le="1.0"} 1',
+            'test_job_seconds_bucket{le="+Inf"} 2',
+            'test_job_seconds_count 2',
+            'test_job_seconds_sum 2.25',
+        ]) + '\n')
+
+
+class FingerprintTests(SimpleTestCase):
+    """Queries that differ only in literals share a fingerprint"""
+
+    def test_literals(self):
+        self.assertEqual(
+            middleware.fingerprint("SELECT * FROM \"t1\" WHERE name = 'O''Brien' AND id = 42 AND price > 3.5"),
+            'SELECT * FROM "t1" WHERE name = ? AND id = ? AND price > ?'
+        )
+
+    def test_in_lists(self):
+        for sql in ('WHERE id IN (%s, %s, %s)', 'WHERE id IN (1,2)', "WHERE code in ('a', 'b')"):
+            with self.subTest(sql=sql):
+                self.assertRegex(middleware.fingerprint(sql), r'^WHERE \w+ IN \(\.\.\.\)$')
+
+    def test_whitespace(self):
+        self.assertEqual(middleware.fingerprint('SELECT  id\n  FROM t\tWHERE id = %s '), 'SELECT id FROM t WHERE id = ?')
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    """Query counting, N+1 detection and the Server-Timing header"""
+
+    threshold = settings.REQUEST_METRICS_N_PLUS_ONE_THRESHOLD
+
+    def call(self, queries):
+        def view(request):
+            for user_id in range(queries):
+                list(User.objects.filter(id=user_id))
+            return HttpResponse()
+
+        with mock.patch.object(middleware.request_n_plus_one, 'inc') as n_plus_one:
+            response = middleware.RequestMetricsMiddleware(view)(RequestFactory().get('/'))
+        return response, n_plus_one
+
+    def test_repeated_query_counts_as_n_plus_one(self):
+        response, n_plus_one = self.call(self.threshold)
+
+        n_plus_one.assert_called_once_with(endpoint='unmatched', method='GET')
+
+    def test_below_threshold_is_not_n_plus_one(self):
+        response, n_plus_one = self.call(self.threshold - 1)
+
+        n_plus_one.assert_not_called()
+
+    def test_server_timing_header(self):
+        response, n_plus_one = self.call(2)
+
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^total;dur=[\d.]+, db;dur=[\d.]+, view;dur=[\d.]+, render;dur=[\d.]+, queries;desc="2 queries"$'
+        )
+        self.assertIn('Server-Timing', self.client.get('/api/services/'))
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        response, n_plus_one = self.call(2)
+
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,46 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from .metrics import Histogram, registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _authorized(request):
+    """Staff users, or a scraper sending settings.METRICS_TOKEN as a bearer token"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus text exposition, or a per-endpoint summary with ?format=json"""
+    if not _authorized(request):
+        return JsonResponse({'error': 'Admin access required'}, status=403)
+
+    if request.GET.get('format') != 'json':
+        return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    metrics = {}
+    for name, (metric, series) in registry.collect().items():
+        entries = []
+        for labels, values in series:
+            if isinstance(metric, Histogram):
+                count = values['count']
+                entries.append({
+                    **labels,
+                    'count': int(count),
+                    'mean': values['sum'] / count if count else None,
+                    'p50': metric.quantile(0.5, values),
+                    'p95': metric.quantile(0.95, values),
+                    'p99': metric.quantile(0.99, values),
+                })
+            else:
+                entries.append({**labels, 'value': values['']})
+        metrics[name] = {'type': metric.type, 'help': metric.documentation, 'series': entries}
+    return JsonResponse({'metrics': metrics})
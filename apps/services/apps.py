@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.services'
-    verbose_name = 'Services'
\ No newline at end of file
+    verbose_name = 'Services'
+    
+    def ready(self):
+        from . import checks, signals  # noqa: F401
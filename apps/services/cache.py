@@ -0,0 +1,153 @@
+"""
+Server-side response cache for the public catalogue.
+
+Anonymous responses for the catalogue pages and endpoints are cached per
+URL, query string and Accept header. Saving a Service or Provider bumps a
+catalogue version (see signals.py), which invalidates every cached page at
+once. Expired or invalidated pages are recomputed by a single request at a
+time (single-flight); while that happens other requests are served the
+stale copy.
+
+The version lives in the default cache, so it is only shared between worker
+processes when that cache is (Redis, see REDIS_URL). With the per-process
+LocMemCache a save invalidates the pages of its own process only, and the
+other workers serve old pages for up to FRESH_SECONDS + STALE_SECONDS;
+``check --deploy`` warns about it (services.W001).
+"""
+
+import hashlib
+import logging
+import time
+from functools import wraps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'catalogue:version'
+
+# Seconds a cached page is fresh, and how much longer it may be served stale
+FRESH_SECONDS = getattr(settings, 'CATALOGUE_CACHE_SECONDS', 60)
+STALE_SECONDS = getattr(settings, 'CATALOGUE_CACHE_STALE_SECONDS', 300)
+
+# How long the recomputing request holds the lock, and how long a request
+# with nothing to serve waits for it
+LOCK_SECONDS = 30
+WAIT_SECONDS = 2.0
+
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Vary')
+
+
+def get_catalogue_version():
+    """Current catalogue version"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalogue_version():
+    """Invalidate every cached catalogue response"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+        cache.incr(VERSION_KEY)
+
+
+def _cache_key(request):
+    query = sorted(request.GET.lists())
+    raw = '|'.join([request.path, repr(query), request.META.get('HTTP_ACCEPT', '')])
+    return 'catalogue:page:' + hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Pending flash messages are rendered into the page
+    if len(get_messages(request)):
+        return False
+    return True
+
+
+def _is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming:
+        return False
+    if response.cookies:
+        return False
+    # The page contains this visitor's CSRF token
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        return False
+    return True
+
+
+def _store(key, response, version):
+    entry = {
+        'version': version,
+        'fresh_until': time.time() + FRESH_SECONDS,
+        'content': response.content,
+        'headers': {name: response[name] for name in CACHED_HEADERS if response.has_header(name)},
+    }
+    cache.set(key, entry, FRESH_SECONDS + STALE_SECONDS)
+
+
+def _from_entry(request, entry, status):
+    etag = entry['headers'].get('ETag')
+    if etag and request.META.get('HTTP_IF_NONE_MATCH') == etag:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+    else:
+        response = HttpResponse(entry['content'])
+        for name, value in entry['headers'].items():
+            response[name] = value
+    response['X-Cache'] = status
+    return response
+
+
+def cache_catalogue_response(view_func):
+    """Cache anonymous responses of a catalogue view.
+
+    Wrap the complete view (for DRF class-based views decorate `dispatch`)
+    so the cached response is fully rendered.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        key = _cache_key(request)
+        version = get_catalogue_version()
+        entry = cache.get(key)
+        if entry and entry['version'] == version and entry['fresh_until'] > time.time():
+            return _from_entry(request, entry, 'HIT')
+
+        lock_key = key + ':lock'
+        if not cache.add(lock_key, 1, LOCK_SECONDS):
+            # Someone else is recomputing this page
+            if entry:
+                return _from_entry(request, entry, 'STALE')
+            deadline = time.monotonic() + WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = cache.get(key)
+                if entry and entry['version'] == version:
+                    return _from_entry(request, entry, 'HIT')
+            return view_func(request, *args, **kwargs)
+
+        try:
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+            if _is_cacheable_response(request, response):
+                _store(key, response, version)
+            response['X-Cache'] = 'MISS'
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose data lives inside one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """The catalogue version is only shared between workers through a shared cache"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        "The default cache is local to each process.",
+        hint=(
+            "Saving a Service or Provider only invalidates the catalogue cache of the "
+            "worker that saved it; others serve old pages until they expire. Request "
+            "metrics are per process too. Set REDIS_URL when running more than one "
+            "worker process."
+        ),
+        id='services.W001',
+    )]
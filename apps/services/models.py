@@ -97,19 +97,25 @@ class Provider(models.Model):
     
     def get_available_slots(self, date):
         """Get available time slots for a given date"""
-        from apps.bookings.models import Booking
+        from apps.bookings.models import Booking, SlotHold
         
         # Check if date is a working day
         day_name = date.strftime('%A').lower()
         if day_name not in self.working_days:
             return []
         
-        # Get existing bookings for this date
-        existing_bookings = Booking.objects.filter(
+        # Slots taken by bookings (pending ones included: they occupy the
+        # slot) or held by a client who is still booking
+        existing_bookings = set(Booking.objects.filter(
             provider=self,
             date=date,
-            status__in=['active', 'confirmed']
-        ).values_list('time', flat=True)
+            status__in=Booking.ACTIVE_STATUSES
+        ).values_list('time', flat=True))
+        existing_bookings.update(SlotHold.objects.filter(
+            provider=self,
+            date=date,
+            expires_at__gt=timezone.now()
+        ).values_list('time', flat=True))
         
         # Generate available slots
         available_slots = []
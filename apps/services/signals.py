@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.users.models import User
+from .cache import bump_catalogue_version
+from .models import Service, Provider
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Provider)
+@receiver(post_delete, sender=Provider)
+def invalidate_catalogue(sender, **kwargs):
+    """Drop cached catalogue responses when services or providers change"""
+    bump_catalogue_version()
+
+
+@receiver(post_save, sender=User)
+def invalidate_catalogue_for_provider_user(sender, instance, update_fields=None, **kwargs):
+    """Provider names are part of the catalogue"""
+    if not instance.is_provider():
+        return
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_catalogue_version()
@@ -1,3 +1,67 @@
-from django.test import TestCase
+from datetime import time
+from django.core import checks
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from apps.users.models import User
+from .checks import check_shared_cache
+from .models import Provider, Service
 
-# Create your tests here.
+
+class CatalogueCacheTests(TestCase):
+    """Saving a Service or Provider invalidates cached catalogue responses"""
+
+    def setUp(self):
+        cache.clear()
+        self.service = Service.objects.create(name='Haircut', duration_minutes=30)
+        user = User.objects.create_user(username='provider', password='x', role='provider')
+        self.provider = Provider.objects.create(
+            user=user, service=self.service, working_days=['monday'],
+            start_time=time(9), end_time=time(18), location='Chilonzor'
+        )
+
+    def get_twice(self, url):
+        first = self.client.get(url)
+        second = self.client.get(url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second['ETag'], first['ETag'])
+        return second
+
+    def test_service_save_changes_response_and_etag(self):
+        before = self.get_twice('/api/services/')
+
+        self.service.name = 'Beard trim'
+        self.service.save()
+        after = self.client.get('/api/services/')
+
+        self.assertEqual(after['X-Cache'], 'MISS')
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertIn('Beard trim', after.content.decode())
+
+    def test_provider_save_changes_response_and_etag(self):
+        before = self.get_twice('/api/providers/')
+
+        self.provider.location = 'Yunusobod'
+        self.provider.save()
+        after = self.client.get('/api/providers/')
+
+        self.assertEqual(after['X-Cache'], 'MISS')
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertIn('Yunusobod', after.content.decode())
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """check --deploy warns when workers cannot share the catalogue version"""
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_warns_about_process_local_cache(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['services.W001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379',
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    def test_registered_for_deploy_only(self):
+        self.assertIn(check_shared_cache, checks.registry.registry.get_checks(include_deployment_checks=True))
+        self.assertNotIn(check_shared_cache, checks.registry.registry.get_checks())
@@ -5,14 +5,19 @@ from django.http import JsonResponse
 from django.utils import timezone
 from datetime import date, timedelta
 from .models import Service, Provider
+from .cache import cache_catalogue_response
+from queue_management.replicas import replica_reads
 
 
+@replica_reads
+@cache_catalogue_response
 def service_list_view(request):
     """List all available services"""
     services = Service.objects.filter(is_active=True)
     return render(request, 'services/list.html', {'services': services})
 
 
+@replica_reads
 def service_detail_view(request, service_id):
     """Service detail with providers"""
     service = get_object_or_404(Service, id=service_id, is_active=True)
@@ -27,6 +32,7 @@ def service_detail_view(request, service_id):
     })
 
 
+@replica_reads
 def provider_detail_view(request, provider_id):
     """Provider detail view"""
     provider = get_object_or_404(Provider, id=provider_id)
@@ -41,6 +47,7 @@ def provider_detail_view(request, provider_id):
     })
 
 
+@replica_reads
 @login_required
 def available_slots_view(request, provider_id):
     """Get available time slots for a provider"""
@@ -64,6 +71,8 @@ def available_slots_view(request, provider_id):
     return JsonResponse(slots, safe=False)
 
 
+@replica_reads
+@cache_catalogue_response
 def provider_list_view(request):
     """List all providers"""
     service_id = request.GET.get('service_id')
@@ -96,18 +105,19 @@ def provider_booking_view(request, provider_id):
         notes = request.POST.get('notes', '')
         
         try:
-            from apps.bookings.models import Booking
-            booking = Booking.objects.create(
-                client=request.user,
-                provider=provider,
-                date=date.fromisoformat(booking_date),
-                time=time.fromisoformat(booking_time),
-                notes=notes,
-                status='pending'
+            from apps.bookings.reservation_service import ReservationService, SlotUnavailable
+            booking = ReservationService.book(
+                request.user,
+                provider,
+                date.fromisoformat(booking_date),
+                time.fromisoformat(booking_time),
+                notes
             )
             
             messages.success(request, 'Buyurtma muvaffaqiyatli yaratildi!')
             return redirect('bookings:success', booking_id=booking.id)
+        except SlotUnavailable:
+            messages.error(request, 'Bu vaqt band')
         except Exception as e:
             messages.error(request, f'Xatolik yuz berdi: {str(e)}')
     
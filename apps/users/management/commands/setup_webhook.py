@@ -50,9 +50,12 @@ class Command(BaseCommand):
         else:
             self.setup_webhook(token, webhook_url)
 
+    def api_base_url(self):
+        return getattr(settings, 'TELEGRAM_API_BASE_URL', 'https://api.telegram.org').rstrip('/')
+
     def setup_webhook(self, token, webhook_url):
         """Set up the Telegram webhook"""
-        url = f"https://api.telegram.org/bot{token}/setWebhook"
+        url = f"{self.api_base_url()}/bot{token}/setWebhook"
         
         data = {
             'url': webhook_url,
@@ -86,7 +89,7 @@ class Command(BaseCommand):
 
     def remove_webhook(self, token):
         """Remove the Telegram webhook"""
-        url = f"https://api.telegram.org/bot{token}/deleteWebhook"
+        url = f"{self.api_base_url()}/bot{token}/deleteWebhook"
         
         try:
             response = requests.post(url, timeout=10)
@@ -5,11 +5,12 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.utils import timezone
 from django.db.models import Q, Count
-from django.core.paginator import Paginator
 from datetime import date, timedelta, datetime
 from .models import User
 from apps.services.models import Provider, Service
 from apps.bookings.models import Booking, Notification
+from apps.api.pagination import keyset_page, estimate_count, InvalidCursor
+from queue_management.replicas import replica_reads
 
 
 def home(request):
@@ -146,6 +147,7 @@ def profile_view(request):
     return render(request, 'users/profile.html')
 
 
+@replica_reads
 @login_required
 def dashboard_view(request):
     """Provider dashboard view"""
@@ -321,10 +323,10 @@ def dashboard_bookings_view(request):
     
     # Get filter type from request
     filter_type = request.GET.get('filter', 'all')
-    page = request.GET.get('page', 1)
+    cursor = request.GET.get('cursor')
     
-    # Base queryset
-    bookings = Booking.objects.filter(provider=provider).order_by('-created_at')
+    # Base queryset (ordered by created_at, id in keyset_page)
+    bookings = Booking.objects.filter(provider=provider).select_related('client')
     
     # Apply filters based on type
     today = timezone.now().date()
@@ -348,13 +350,19 @@ def dashboard_bookings_view(request):
     else:
         title = "Barcha buyurtmalar"
     
-    # Pagination
-    paginator = Paginator(bookings, 10)
-    page_obj = paginator.get_page(page)
+    # Keyset pagination: no OFFSET, and only an estimated total on the first page
+    try:
+        page_bookings, next_cursor = keyset_page(bookings, 'created_at', cursor=cursor, page_size=10)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    
+    total_count = total_is_estimate = None
+    if not cursor:
+        total_count, total_is_estimate = estimate_count(bookings)
     
     # Prepare data for JSON response
     bookings_data = []
-    for booking in page_obj:
+    for booking in page_bookings:
         bookings_data.append({
             'id': booking.id,
             'client_name': booking.client.full_name,
@@ -370,11 +378,10 @@ def dashboard_bookings_view(request):
     return JsonResponse({
         'title': title,
         'bookings': bookings_data,
-        'has_next': page_obj.has_next(),
-        'has_previous': page_obj.has_previous(),
-        'current_page': page_obj.number,
-        'total_pages': paginator.num_pages,
-        'total_count': paginator.count,
+        'has_next': next_cursor is not None,
+        'next_cursor': next_cursor,
+        'total_count': total_count,
+        'total_is_estimate': total_is_estimate,
     })
 
 
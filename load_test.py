@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+HTTP load scenarios for the booking flows.
+
+Virtual users log in and replay user journeys against a running server,
+through the web views and the /api/ endpoints; latency percentiles are
+reported per endpoint. Pure asyncio, no dependencies beyond the standard
+library.
+
+Scenarios:
+  client_api    browse services and providers, poll a provider's slots for
+                7 days, hold a slot and book it through /api/
+  client_web    the same journey through the web views
+  provider_api  dashboard stats, list bookings, confirm the pending ones
+  provider_web  dashboard pages, confirm the pending bookings in bulk
+  mixed         a weighted mix of the above (default)
+
+The users come from generate_load_data, run with a known password:
+
+    python manage.py generate_load_data --password loadtest
+    python load_test.py --base-url http://localhost:8000 --concurrency 50 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+SCENARIO_WEIGHTS = {
+    'client_api': 45,
+    'client_web': 35,
+    'provider_api': 10,
+    'provider_web': 10,
+}
+
+
+class RequestFailed(Exception):
+    """Unexpected status code; the journey is abandoned"""
+
+
+class Stats:
+    """Latencies and failures per endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.conflicts = defaultdict(int)
+        self.journeys = defaultdict(int)
+        self.failed_journeys = defaultdict(int)
+
+    @staticmethod
+    def percentile(values, share):
+        index = min(len(values) - 1, max(0, round(share * len(values)) - 1))
+        return values[index]
+
+    def summary(self, elapsed):
+        rows = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[name])
+            row = {
+                'requests': len(values) + self.errors[name],
+                'errors': self.errors[name],
+                'conflicts': self.conflicts[name],
+                'rps': len(values) / elapsed,
+            }
+            if values:
+                row.update({
+                    f'p{int(share * 100)}_ms': self.percentile(values, share) * 1000
+                    for share in (0.5, 0.9, 0.95, 0.99)
+                })
+                row['max_ms'] = values[-1] * 1000
+            rows[name] = row
+        return rows
+
+
+class HttpSession:
+    """Minimal keep-alive HTTP/1.1 client with a cookie jar and CSRF support"""
+
+    def __init__(self, base_url, stats, timeout):
+        parts = urlsplit(base_url)
+        if parts.scheme != 'http':
+            raise ValueError('Only http:// base URLs are supported')
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.stats = stats
+        self.timeout = timeout
+        self.cookies = {}
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method, path, name=None, form=None, json_body=None, expect=(200,), conflict=()):
+        """Send a request; returns (status, headers, body) and records its latency"""
+        name = name or f'{method} {path}'
+        headers = {'Host': f'{self.host}:{self.port}', 'Accept': 'application/json, text/html'}
+        body = b''
+        if form is not None:
+            body = urlencode(form, doseq=True).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        if method != 'GET' and 'csrftoken' in self.cookies:
+            headers['X-CSRFToken'] = self.cookies['csrftoken']
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{key}={value}' for key, value in self.cookies.items())
+        headers['Content-Length'] = str(len(body))
+
+        start = time.perf_counter()
+        try:
+            status, response_headers, response_body = await asyncio.wait_for(
+                self.send(method, self.prefix + path, headers, body), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            await self.close()
+            self.stats.errors[name] += 1
+            raise RequestFailed(f'{name}: {e.__class__.__name__}')
+        elapsed = time.perf_counter() - start
+
+        if status in conflict:
+            self.stats.conflicts[name] += 1
+        elif status not in expect:
+            self.stats.errors[name] += 1
+            raise RequestFailed(f'{name}: HTTP {status}')
+        self.stats.latencies[name].append(elapsed)
+        return status, response_headers, response_body
+
+    async def get_json(self, path, name=None):
+        _, _, body = await self.request('GET', path, name)
+        return json.loads(body)
+
+    async def send(self, method, path, headers, body):
+        for attempt in (1, 2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            request = f'{method} {path} HTTP/1.1\r\n' + ''.join(
+                f'{key}: {value}\r\n' for key, value in headers.items()
+            ) + '\r\n'
+            self.writer.write(request.encode('latin-1') + body)
+            await self.writer.drain()
+
+            status_line = await self.reader.readline()
+            if status_line:
+                break
+            # The server closed the kept-alive connection; reconnect once
+            await self.close()
+            if attempt == 2:
+                raise ConnectionResetError('Server closed the connection')
+
+        status = int(status_line.split()[1])
+        response_headers = defaultdict(list)
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').rstrip('\r\n')
+            if not line:
+                break
+            key, _, value = line.partition(':')
+            response_headers[key.strip().lower()].append(value.strip())
+
+        if 'chunked' in ''.join(response_headers['transfer-encoding']).lower():
+            response_body = b''
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if not size:
+                    await self.reader.readline()
+                    break
+                response_body += await self.reader.readexactly(size)
+                await self.reader.readline()
+        elif response_headers['content-length']:
+            response_body = await self.reader.readexactly(int(response_headers['content-length'][0]))
+        else:
+            response_body = await self.reader.read()
+            await self.close()
+
+        if 'close' in ''.join(response_headers['connection']).lower():
+            await self.close()
+        for header in response_headers['set-cookie']:
+            for key, morsel in SimpleCookie(header).items():
+                if morsel.value and morsel['max-age'] != '0':
+                    self.cookies[key] = morsel.value
+                else:
+                    self.cookies.pop(key, None)
+        return status, response_headers, response_body
+
+    async def login(self, username, password):
+        await self.request('GET', '/users/login/', 'GET /users/login/')
+        _, headers, _ = await self.request('POST', '/users/login/', 'POST /users/login/', form={
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': self.cookies.get('csrftoken', ''),
+        }, expect=(302,))
+        if 'sessionid' not in self.cookies:
+            raise RequestFailed(f'Login failed for {username}')
+
+
+def upcoming_days(count=7):
+    today = date.today()
+    return [(today + timedelta(days=offset)).isoformat() for offset in range(1, count + 1)]
+
+
+async def client_api(session, rng):
+    await session.request('GET', '/api/services/')
+    providers = (await session.get_json('/api/providers/'))['results']
+    if not providers:
+        return
+    provider_id = rng.choice(providers)['id']
+    await session.request('GET', f'/api/providers/{provider_id}/', 'GET /api/providers/:id/')
+
+    free = []
+    for day in upcoming_days():
+        slots = await session.get_json(
+            f'/api/providers/{provider_id}/slots/?date={day}', 'GET /api/providers/:id/slots/'
+        )
+        free.extend((day, slot['time']) for slot in slots if slot['available'])
+    if not free:
+        return
+
+    day, slot_time = rng.choice(free)
+    status, _, body = await session.request(
+        'POST', f'/api/providers/{provider_id}/holds/', 'POST /api/providers/:id/holds/',
+        json_body={'date': day, 'time': slot_time}, expect=(200, 201), conflict=(409,)
+    )
+    if status == 409:
+        return
+    await session.request('POST', '/api/bookings/', 'POST /api/bookings/', json_body={
+        'provider_id': provider_id,
+        'date': day,
+        'time': slot_time,
+        'hold_token': json.loads(body)['token'],
+    }, expect=(201,), conflict=(400,))
+
+
+async def client_web(session, rng):
+    await session.request('GET', '/services/')
+    _, _, body = await session.request('GET', '/services/providers/')
+    provider_ids = sorted(set(re.findall(rb'/services/providers/(\d+)/', body)))
+    if not provider_ids:
+        return
+    provider_id = int(rng.choice(provider_ids))
+    await session.request('GET', f'/bookings/create/{provider_id}/', 'GET /bookings/create/:id/')
+
+    free = []
+    for day in upcoming_days():
+        slots = await session.get_json(
+            f'/services/providers/{provider_id}/slots/?date={day}', 'GET /services/providers/:id/slots/'
+        )
+        if isinstance(slots, list):
+            free.extend((day, slot['time']) for slot in slots)
+    if not free:
+        return
+
+    day, slot_time = rng.choice(free)
+    _, _, body = await session.request(
+        'POST', f'/bookings/hold/{provider_id}/', 'POST /bookings/hold/:id/',
+        form={'date': day, 'time': slot_time}
+    )
+    hold = json.loads(body)
+    if not hold.get('success'):
+        session.stats.conflicts['POST /bookings/hold/:id/'] += 1
+        return
+    await session.request(
+        'POST', f'/bookings/create/{provider_id}/', 'POST /bookings/create/:id/',
+        form={'date': day, 'time': slot_time, 'hold_token': hold['token']}, expect=(302,), conflict=(200,)
+    )
+
+
+async def pending_booking_ids(session, pages=3):
+    """Pending bookings from the first pages of the provider's booking list"""
+    ids = []
+    path = '/api/bookings/?fields=id,status'
+    for _ in range(pages):
+        page = await session.get_json(path, 'GET /api/bookings/')
+        ids.extend(booking['id'] for booking in page['results'] if booking['status'] == 'pending')
+        if not page.get('next'):
+            break
+        parts = urlsplit(page['next'])
+        path = parts.path[len(session.prefix):] + f'?{parts.query}'
+    return ids
+
+
+async def provider_api(session, rng):
+    await session.request('GET', '/api/dashboard/stats/')
+    ids = await pending_booking_ids(session)
+    if ids:
+        await session.request('POST', '/api/bookings/bulk/', json_body={'action': 'confirm', 'ids': ids[:50]})
+
+
+async def provider_web(session, rng):
+    await session.request('GET', '/users/dashboard/')
+    await session.request('GET', '/users/dashboard/bookings/')
+    ids = await pending_booking_ids(session, pages=1)
+    if ids:
+        await session.request('POST', '/bookings/bulk/', json_body={'action': 'confirm', 'ids': ids[:50]})
+
+
+SCENARIOS = {
+    'client_api': client_api,
+    'client_web': client_web,
+    'provider_api': provider_api,
+    'provider_web': provider_web,
+}
+
+
+async def virtual_user(number, args, stats, deadline):
+    rng = random.Random(args.seed * 100003 + number)
+    if args.scenario == 'mixed':
+        scenario = rng.choices(list(SCENARIO_WEIGHTS), list(SCENARIO_WEIGHTS.values()))[0]
+    else:
+        scenario = args.scenario
+    if scenario.startswith('provider'):
+        username = f'{args.prefix}provider_{rng.randrange(args.provider_count)}'
+    else:
+        username = f'{args.prefix}client_{rng.randrange(args.client_count)}'
+
+    session = HttpSession(args.base_url, stats, args.timeout)
+    try:
+        await session.login(username, args.password)
+        iterations = 0
+        while time.monotonic() < deadline and (not args.iterations or iterations < args.iterations):
+            iterations += 1
+            stats.journeys[scenario] += 1
+            try:
+                await SCENARIOS[scenario](session, rng)
+            except RequestFailed:
+                stats.failed_journeys[scenario] += 1
+            if args.think_time:
+                await asyncio.sleep(rng.expovariate(1 / args.think_time))
+    except RequestFailed as e:
+        stats.failed_journeys['login'] += 1
+        if args.verbose:
+            print(f'user {number}: {e}', file=sys.stderr)
+    finally:
+        await session.close()
+
+
+async def run(args):
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.duration
+    users = []
+    for number in range(args.concurrency):
+        users.append(asyncio.create_task(virtual_user(number, args, stats, deadline)))
+        # Ramp up instead of logging everyone in at once
+        if args.ramp_up:
+            await asyncio.sleep(args.ramp_up / args.concurrency)
+    await asyncio.gather(*users)
+    return stats, time.monotonic() - started
+
+
+def print_report(summary, stats, elapsed):
+    print(f'\n{"endpoint":<40} {"reqs":>7} {"err":>5} {"409":>5} {"rps":>7} '
+          f'{"p50":>8} {"p90":>8} {"p95":>8} {"p99":>8} {"max":>8}')
+    for name, row in summary.items():
+        timings = ''.join(
+            f' {row[key]:>8.1f}' if key in row else f' {"-":>8}'
+            for key in ('p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms')
+        )
+        print(f'{name:<40} {row["requests"]:>7} {row["errors"]:>5} {row["conflicts"]:>5} '
+              f'{row["rps"]:>7.1f}{timings}')
+    print(f'\nLatencies in ms over {elapsed:.1f}s. Journeys: ' + ', '.join(
+        f'{scenario} {count} ({stats.failed_journeys[scenario]} failed)'
+        for scenario, count in sorted(stats.journeys.items())
+    ))
+    if stats.failed_journeys['login']:
+        print(f'{stats.failed_journeys["login"]} virtual users could not log in')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP load scenarios for the booking flows')
+    parser.add_argument('--base-url', default='http://localhost:8000', help='Server to test (default: %(default)s)')
+    parser.add_argument('--scenario', default='mixed', choices=['mixed', *SCENARIOS], help='Journey to replay (default: mixed)')
+    parser.add_argument('--concurrency', type=int, default=20, help='Virtual users (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run (default: %(default)s)')
+    parser.add_argument('--iterations', type=int, default=0, help='Journeys per virtual user, 0 for no limit (default: 0)')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which the users start (default: %(default)s)')
+    parser.add_argument('--think-time', type=float, default=1.0, help='Mean pause between journeys in seconds (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds (default: %(default)s)')
+    parser.add_argument('--prefix', default='load_', help='Username prefix used by generate_load_data (default: %(default)s)')
+    parser.add_argument('--client-count', type=int, default=10000, help='Client usernames to pick from (default: %(default)s)')
+    parser.add_argument('--provider-count', type=int, default=200, help='Provider usernames to pick from (default: %(default)s)')
+    parser.add_argument('--password', default='loadtest', help='Password of the generated users (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: %(default)s)')
+    parser.add_argument('--json', help='Also write the per-endpoint summary to this file')
+    parser.add_argument('--verbose', action='store_true', help='Print login failures')
+    args = parser.parse_args()
+
+    stats, elapsed = asyncio.run(run(args))
+    summary = stats.summary(elapsed)
+    print_report(summary, stats, elapsed)
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump({'elapsed': elapsed, 'args': vars(args), 'endpoints': summary}, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+# Load the Celery app when Django starts so @shared_task uses it.
+# Celery is optional: without it tasks run through the local task queue.
+try:
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
+
+__all__ = ('celery_app',)
@@ -0,0 +1,70 @@
+"""
+Celery application.
+
+Tasks are split over three queues by priority:
+
+- ``high``: user-facing messages (booking confirmations and cancellations,
+  notification events queued by apps/bookings/task_queue.py)
+- ``default``: sending due reminders
+- ``low``: daily scheduling and maintenance
+
+Run a worker per priority so maintenance never delays user-facing work::
+
+    celery -A queue_management worker -Q high -c 4
+    celery -A queue_management worker -Q default,low -c 2
+    celery -A queue_management beat
+
+The beat schedule below replaces the cron_notifications and
+archive_notifications cron jobs. Settings are read from Django settings
+with the CELERY_ prefix.
+"""
+
+import os
+from celery import Celery
+from celery.schedules import crontab
+from kombu import Queue
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'queue_management.settings')
+
+app = Celery('queue_management')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+app.conf.task_queues = (
+    Queue('high'),
+    Queue('default'),
+    Queue('low'),
+)
+app.conf.task_default_queue = 'default'
+app.conf.task_routes = {
+    'apps.bookings.tasks.run_queued_task': {'queue': 'high'},
+    'apps.bookings.tasks.send_booking_confirmation': {'queue': 'high'},
+    'apps.bookings.tasks.send_booking_cancellation': {'queue': 'high'},
+    'apps.bookings.tasks.send_pending_notifications': {'queue': 'default'},
+    'apps.bookings.tasks.schedule_daily_notifications': {'queue': 'low'},
+    'apps.bookings.tasks.archive_old_notifications': {'queue': 'low'},
+    'apps.bookings.tasks.purge_expired_slot_holds': {'queue': 'low'},
+}
+
+app.conf.beat_schedule = {
+    'send-pending-notifications': {
+        'task': 'apps.bookings.tasks.send_pending_notifications',
+        'schedule': 60.0,
+        # A run that waited past the next one is redundant
+        'options': {'expires': 55},
+    },
+    'schedule-daily-notifications': {
+        'task': 'apps.bookings.tasks.schedule_daily_notifications',
+        'schedule': crontab(hour=0, minute=5),
+    },
+    'archive-old-notifications': {
+        'task': 'apps.bookings.tasks.archive_old_notifications',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'purge-expired-slot-holds': {
+        'task': 'apps.bookings.tasks.purge_expired_slot_holds',
+        'schedule': crontab(minute='*/10'),
+        'options': {'expires': 300},
+    },
+}
+
+app.autodiscover_tasks()
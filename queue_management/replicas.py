@@ -0,0 +1,148 @@
+"""
+Read-replica routing.
+
+Reads go to the primary ('default') unless code opts in: views decorated
+with replica_reads (GET, HEAD and OPTIONS requests) and blocks run inside
+``with replica_reads():`` send their reads to one of
+settings.DATABASE_REPLICAS. Writes always go to the primary.
+
+Reads stay on the primary, even where replica reads were asked for:
+
+- inside a transaction on the primary;
+- for models of settings.REPLICA_PRIMARY_APPS (sessions, users and
+  auth, so request.user is never missing or stale after registration
+  or a profile change);
+- for the rest of a request once it has written to a model of
+  settings.REPLICA_PIN_APPS (bookings);
+- for REPLICA_STICKY_SECONDS after such a write, through a signed cookie
+  set by ReplicaRoutingMiddleware, so users see their own bookings before
+  the replicas have caught up (read-your-writes).
+
+Without replicas configured every read goes to the primary.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_primary_until'
+PIN_SALT = 'queue_management.replicas'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """What the current request or block may read from"""
+
+    def __init__(self, use_replica=False, pinned=False):
+        self.use_replica = use_replica
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def read_alias():
+    """Alias reads should use right now"""
+    state = _state.get()
+    candidates = replicas()
+    if state is None or not state.use_replica or state.pinned or state.wrote or not candidates:
+        return DEFAULT_DB_ALIAS
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return random.choice(candidates)
+
+
+@contextmanager
+def _replica_block():
+    state = _state.get()
+    if state is None:
+        # Outside a request, e.g. in a management command
+        token = _state.set(RoutingState(use_replica=True))
+        try:
+            yield
+        finally:
+            _state.reset(token)
+        return
+    previous, state.use_replica = state.use_replica, True
+    try:
+        yield
+    finally:
+        state.use_replica = previous
+
+
+def replica_reads(view=None):
+    """Send reads to a replica: ``@replica_reads`` on a view (safe methods
+    only) or ``with replica_reads():`` around a block"""
+    if view is None:
+        return _replica_block()
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        with _replica_block():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Database router for settings.DATABASE_REPLICAS"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in getattr(settings, 'REPLICA_PRIMARY_APPS', ()):
+            return DEFAULT_DB_ALIAS
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label in getattr(settings, 'REPLICA_PIN_APPS', ()):
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema from the primary
+        return db not in replicas()
+
+
+class ReplicaRoutingMiddleware:
+    """Pins a client's reads to the primary for a while after it wrote"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 15)
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+
+        until = request.get_signed_cookie(PIN_COOKIE, default=None, salt=PIN_SALT)
+        try:
+            pinned = until is not None and float(until) > time.time()
+        except ValueError:
+            pinned = False
+        state = RoutingState(pinned=pinned)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote:
+            response.set_signed_cookie(
+                PIN_COOKIE, str(time.time() + self.sticky_seconds), salt=PIN_SALT,
+                max_age=self.sticky_seconds, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,90 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from apps.bookings.models import Booking
+from apps.users.models import User
+from .replicas import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, replica_reads
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Which alias ReplicaRouter picks for reads and migrations"""
+
+    router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Booking), 'default')
+
+    def test_replica_reads_use_replica(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Booking), 'replica')
+
+    def test_primary_apps_read_from_primary(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_write_pins_rest_of_block(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Booking), 'default')
+            self.assertEqual(self.router.db_for_read(Booking), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_falls_back_to_primary_without_replicas(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Booking), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'bookings'))
+        self.assertFalse(self.router.allow_migrate('replica', 'bookings'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """The signed cookie keeps a client on the primary after it wrote"""
+
+    factory = RequestFactory()
+    router = ReplicaRouter()
+
+    def setUp(self):
+        self.read_from = []
+
+    def call(self, request):
+        @replica_reads
+        def view(request):
+            if request.method == 'POST':
+                self.router.db_for_write(Booking)
+            self.read_from.append(self.router.db_for_read(Booking))
+            return HttpResponse()
+
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_get_reads_from_replica(self):
+        response = self.call(self.factory.get('/'))
+
+        self.assertEqual(self.read_from, ['replica'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_client_to_primary(self):
+        response = self.call(self.factory.post('/'))
+
+        self.assertEqual(self.read_from, ['default'])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        self.call(request)
+        self.assertEqual(self.read_from, ['default', 'default'])
+
+    def test_unsigned_cookie_is_ignored(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '9999999999'
+
+        self.call(request)
+
+        self.assertEqual(self.read_from, ['replica'])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_nothing_is_pinned(self):
+        response = self.call(self.factory.post('/'))
+
+        self.assertEqual(self.read_from, ['default'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
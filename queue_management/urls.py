@@ -21,7 +21,9 @@ from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 import json
+from apps.services.cache import cache_catalogue_response
 
+@cache_catalogue_response
 def home_view(request):
     """Home page view"""
     return render(request, 'index.html')
@@ -73,4 +75,5 @@ urlpatterns = [
     path('services/', include('apps.services.urls')),
     path('bookings/', include('apps.bookings.urls')),
     path('api-info/', api_root, name='api-root'),
+    path('monitoring/', include('apps.monitoring.urls')),
 ]
@@ -17,6 +17,8 @@ from pathlib import Path
 
 import aiohttp
 from aiogram import Bot, Dispatcher, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -37,13 +39,21 @@ logger = logging.getLogger(__name__)
 # Bot configuration
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8001/api')
+# Bot API server; point it at the fake_telegram_server command for offline tests
+TELEGRAM_API_BASE_URL = os.getenv('TELEGRAM_API_BASE_URL')
 
 if not BOT_TOKEN:
     logger.error("BOT_TOKEN not found in environment variables")
     sys.exit(1)
 
 # Initialize bot and dispatcher
-bot = Bot(token=BOT_TOKEN)
+if TELEGRAM_API_BASE_URL:
+    bot = Bot(
+        token=BOT_TOKEN,
+        session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_BASE_URL.rstrip('/')))
+    )
+else:
+    bot = Bot(token=BOT_TOKEN)
 storage = MemoryStorage()
 dp = Dispatcher(storage=storage)
 